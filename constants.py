@@ -14,6 +14,13 @@ class Constants:
     APP_VERSION = "0.6.2"
     SETTINGS_FILE = "user_settings.json"
     XML_FILE = "film_simulations.xml"
+    SQLITE_FILE = "film_simulations.db"   # optional SQLite backend, imported from XML_FILE
+    XML_FLUSH_DELAY = 1.0   # seconds; recipe edits are saved once per burst
+    HISTOGRAM_CACHE_DIR = "histogram_cache"
+
+    # Recipe fields ignored when matching a photo against recipes
+    MATCH_SKIP_FIELDS = {"Name", "FilmMode", "DevelopmentDynamicRange", "Sensor", "Clarity",
+                         "Sharpness", "Favourite", "Description", "URL"}
     
     RECIPE_FIELDS = [
         RecipeField("Name", ""),
@@ -4,4 +4,5 @@ from .edit_recipe_dialog import EditRecipeDialog
 from .delete_recipe_dialog import DeleteRecipeDialog
 from .recipe_browser_dialog import RecipeBrowserDialog
 from .settings_dialog import SettingsDialog
-from .about_dialog import AboutDialog
\ No newline at end of file
+from .about_dialog import AboutDialog
+from .batch_export_dialog import BatchExportDialog
\ No newline at end of file
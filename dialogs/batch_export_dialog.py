@@ -0,0 +1,226 @@
+# ──────────────────────────────────────────────
+# BATCH EXPORT DIALOG
+# ──────────────────────────────────────────────
+import os
+import threading
+
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import (
+    QCheckBox, QComboBox, QDialog, QFileDialog, QHBoxLayout, QLabel, QLineEdit,
+    QListWidget, QListWidgetItem, QMessageBox, QProgressBar, QPushButton, QSpinBox,
+    QVBoxLayout
+)
+
+from exporters.batch_exporter import BatchFailure, export_batch, plan_batch
+from exporters.recipe_card_exporter import CARD_FORMATS, DEFAULT_QUALITY
+from dialogs.recipe_dialog import get_button_color
+
+
+class BatchExportDialog(QDialog):
+    """
+    Exports recipe cards for several matched photos into one folder.
+    The cards are rendered on a process pool off the UI thread; progress is
+    shown as each file finishes and failures are listed at the end. Each
+    card is rendered once and encoded to every selected size.
+    """
+    _progress = pyqtSignal(int, int)     # done, total
+    _finished = pyqtSignal(object)       # list of BatchFailure
+
+    def __init__(self, parent, photos, output_dir=""):
+        """photos: (photo_path, recipe dict) pairs of the matched cards."""
+        super().__init__(parent)
+        self.setWindowTitle("Export Recipe Cards")
+        self.setMinimumWidth(520)
+        self.setModal(True)
+        self._cancel = None
+        self._progress.connect(self._on_progress)
+        self._finished.connect(self._on_finished)
+
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+        layout.setContentsMargins(24, 24, 24, 24)
+
+        title = QLabel("Export Recipe Cards")
+        title.setFont(QFont("Segoe UI", 13, QFont.Weight.Bold))
+        layout.addWidget(title)
+
+        layout.addWidget(QLabel(f"Photos with a matched recipe ({len(photos)}):"))
+        self.photo_list = QListWidget()
+        for photo_path, recipe in photos:
+            item = QListWidgetItem(f"{os.path.basename(photo_path)}  —  {recipe.get('Name', '')}")
+            item.setData(Qt.ItemDataRole.UserRole, (photo_path, recipe))
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked)
+            self.photo_list.addItem(item)
+        layout.addWidget(self.photo_list)
+
+        select_row = QHBoxLayout()
+        all_btn = QPushButton("Select All")
+        none_btn = QPushButton("Select None")
+        all_btn.clicked.connect(lambda: self._check_all(Qt.CheckState.Checked))
+        none_btn.clicked.connect(lambda: self._check_all(Qt.CheckState.Unchecked))
+        select_row.addWidget(all_btn)
+        select_row.addWidget(none_btn)
+        select_row.addStretch()
+        layout.addLayout(select_row)
+
+        layout.addWidget(QLabel("Output Folder:"))
+        dir_row = QHBoxLayout()
+        self.dir_edit = QLineEdit(output_dir)
+        browse_btn = QPushButton("Browse…")
+        browse_btn.clicked.connect(self._browse)
+        dir_row.addWidget(self.dir_edit)
+        dir_row.addWidget(browse_btn)
+        layout.addLayout(dir_row)
+
+        # ── Output ──
+        format_row = QHBoxLayout()
+        format_row.addWidget(QLabel("Format:"))
+        self.format_combo = QComboBox()
+        self.format_combo.addItems(CARD_FORMATS.keys())
+        self.format_combo.setCurrentText("JPEG")
+        self.format_combo.currentTextChanged.connect(
+            lambda fmt: self.quality_spin.setEnabled(fmt != "PNG")
+        )
+        format_row.addWidget(self.format_combo)
+        format_row.addWidget(QLabel("Quality:"))
+        self.quality_spin = QSpinBox()
+        self.quality_spin.setRange(1, 100)
+        self.quality_spin.setValue(DEFAULT_QUALITY)
+        format_row.addWidget(self.quality_spin)
+        format_row.addStretch()
+        layout.addLayout(format_row)
+
+        size_row = QHBoxLayout()
+        size_row.addWidget(QLabel("Sizes:"))
+        self.size_cbs = {
+            "card":   QCheckBox("Card 4:5"),
+            "story":  QCheckBox("Story 9:16"),
+            "square": QCheckBox("Square 1:1"),
+        }
+        self.size_cbs["card"].setChecked(True)
+        for cb in self.size_cbs.values():
+            size_row.addWidget(cb)
+        size_row.addStretch()
+        layout.addLayout(size_row)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("Exporting %v / %m")
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
+        # ── Buttons ──
+        c_primary = get_button_color(parent, "primary")
+        c_neutral = get_button_color(parent, "neutral")
+
+        btn_row = QHBoxLayout()
+        self.export_btn = QPushButton("Export")
+        self.export_btn.setStyleSheet(
+            f"QPushButton {{ background-color: {c_primary}; color: white; "
+            f"border-radius: 6px; padding: 7px 18px; font-weight: bold; }}"
+            f"QPushButton:hover {{ background-color: {c_primary}cc; }}"
+        )
+        self.export_btn.clicked.connect(self._export)
+        self.close_btn = QPushButton("Close")
+        self.close_btn.setStyleSheet(
+            f"QPushButton {{ background-color: {c_neutral}; color: white; "
+            f"border-radius: 6px; padding: 7px 18px; }}"
+        )
+        self.close_btn.clicked.connect(self.reject)
+        btn_row.addWidget(self.export_btn)
+        btn_row.addWidget(self.close_btn)
+        btn_row.addStretch()
+        layout.addLayout(btn_row)
+
+    # ── selection ─────────────────────────────────────────────────────────
+
+    def _check_all(self, state):
+        for i in range(self.photo_list.count()):
+            self.photo_list.item(i).setCheckState(state)
+
+    def _selected(self):
+        return [
+            self.photo_list.item(i).data(Qt.ItemDataRole.UserRole)
+            for i in range(self.photo_list.count())
+            if self.photo_list.item(i).checkState() == Qt.CheckState.Checked
+        ]
+
+    def _browse(self):
+        directory = QFileDialog.getExistingDirectory(self, "Choose Output Folder", self.dir_edit.text())
+        if directory:
+            self.dir_edit.setText(directory)
+
+    # ── export ────────────────────────────────────────────────────────────
+
+    def _export(self):
+        photos = self._selected()
+        output_dir = self.dir_edit.text().strip()
+        if not photos:
+            QMessageBox.warning(self, "Nothing Selected", "Select at least one photo to export.")
+            return
+        if not output_dir:
+            QMessageBox.warning(self, "No Folder", "Choose an output folder.")
+            return
+        sizes = [size for size, cb in self.size_cbs.items() if cb.isChecked()]
+        if not sizes:
+            QMessageBox.warning(self, "No Size", "Select at least one card size.")
+            return
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+        except OSError as e:
+            QMessageBox.critical(self, "Export Failed", str(e))
+            return
+
+        items = plan_batch(photos, output_dir, sizes,
+                           self.format_combo.currentText(), self.quality_spin.value())
+        self._output_dir = output_dir
+        self._total = len(items)
+        self._cancel = threading.Event()
+        self.export_btn.setEnabled(False)
+        self.photo_list.setEnabled(False)
+        self.progress_bar.setRange(0, len(items))
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.close_btn.setText("Cancel")
+
+        threading.Thread(target=self._run, args=(items, self._cancel), daemon=True).start()
+
+    def _run(self, items, cancel):
+        try:
+            failures = export_batch(items, progress=self._progress.emit, cancel=cancel)
+        except Exception as e:    # the pool could not be started
+            failures = [BatchFailure(item.photo_path, str(e)) for item in items]
+        self._finished.emit(failures)
+
+    def _on_progress(self, done, total):
+        self.progress_bar.setValue(done)
+
+    def _on_finished(self, failures):
+        cancelled = self._cancel.is_set()
+        self._cancel = None
+        self.progress_bar.hide()
+        self.export_btn.setEnabled(True)
+        self.photo_list.setEnabled(True)
+        self.close_btn.setText("Close")
+        self.close_btn.setEnabled(True)
+        if cancelled:
+            super().reject()
+            return
+        exported = self._total - len(failures)
+        text = f"Recipe cards of {exported} photo(s) saved to:\n{self._output_dir}"
+        if failures:
+            text += "\n\nFailed to export:\n" + "\n".join(
+                f"{os.path.basename(f.photo_path)}: {f.error}" for f in failures
+            )
+            QMessageBox.warning(self, "Exported", text)
+        else:
+            QMessageBox.information(self, "Exported", text)
+
+    def reject(self):
+        if self._cancel is not None:
+            self._cancel.set()    # files already rendering finish; the rest are skipped
+            self.close_btn.setEnabled(False)
+            self.close_btn.setText("Cancelling…")
+            return
+        super().reject()
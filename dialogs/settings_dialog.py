@@ -3,7 +3,7 @@
 # ──────────────────────────────────────────────
 from PyQt6.QtWidgets import (
     QButtonGroup, QCheckBox, QComboBox, QDialog, QHBoxLayout,
-    QLabel, QPushButton, QRadioButton, QVBoxLayout
+    QLabel, QLineEdit, QPushButton, QRadioButton, QVBoxLayout
 )
 
 from constants import Constants
@@ -49,6 +49,10 @@ class SettingsDialog(QDialog):
         self.show_grid_cb.setChecked(settings.get("histogram_grid", True))
         layout.addWidget(self.show_grid_cb)
 
+        self.hist_cache_cb = QCheckBox("Cache Histograms on Disk")
+        self.hist_cache_cb.setChecked(settings.get("histogram_disk_cache", False))
+        layout.addWidget(self.hist_cache_cb)
+
         layout.addWidget(QLabel("Histogram Type:"))
         self.btn_group = QButtonGroup(self)
         self.radio_step = QRadioButton("Step")
@@ -61,6 +65,33 @@ class SettingsDialog(QDialog):
             self.radio_step.setChecked(True)
         layout.addWidget(self.radio_step)
         layout.addWidget(self.radio_bar)
+
+        layout.addSpacing(8)
+
+        self.raw_preview_cb = QCheckBox("Use Embedded RAW Previews")
+        self.raw_preview_cb.setToolTip("Show RAW files from their embedded JPEG instead of demosaicing them")
+        self.raw_preview_cb.setChecked(settings.get("raw_previews", True))
+        layout.addWidget(self.raw_preview_cb)
+
+        layout.addSpacing(8)
+
+        # ── Recipe database ──
+        layout.addWidget(QLabel("Recipe Database:"))
+        self.database_combo = QComboBox()
+        self.database_combo.addItem("XML File", "xml")
+        self.database_combo.addItem("SQLite", "sqlite")
+        self.database_combo.setToolTip("Recipes are carried over when switching")
+        idx = self.database_combo.findData(settings.get("recipe_database", "xml"))
+        self.database_combo.setCurrentIndex(idx if idx >= 0 else 0)
+        layout.addWidget(self.database_combo)
+
+        layout.addSpacing(8)
+
+        # ── ExifTool ──
+        layout.addWidget(QLabel("ExifTool Path:"))
+        self.exiftool_edit = QLineEdit(settings.get("exiftool_path", ""))
+        self.exiftool_edit.setPlaceholderText("Auto-detect")
+        layout.addWidget(self.exiftool_edit)
         layout.addStretch()
 
         # ── Buttons ──
@@ -92,6 +123,10 @@ class SettingsDialog(QDialog):
         self.settings["rgb_histogram"]    = self.rgb_hist_cb.isChecked()
         self.settings["histogram_grid"]   = self.show_grid_cb.isChecked()
         self.settings["histogram_type"]   = "bar" if self.radio_bar.isChecked() else "step"
+        self.settings["histogram_disk_cache"] = self.hist_cache_cb.isChecked()
+        self.settings["raw_previews"]     = self.raw_preview_cb.isChecked()
+        self.settings["recipe_database"]  = self.database_combo.currentData()
+        self.settings["exiftool_path"]    = self.exiftool_edit.text().strip()
         SettingsManager.save(self.settings)
         self.accept()
         self.on_success()
\ No newline at end of file
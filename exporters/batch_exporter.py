@@ -0,0 +1,121 @@
+# ──────────────────────────────────────────────
+# BATCH RECIPE CARD EXPORTER
+# ──────────────────────────────────────────────
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from managers.image_manager import ImageManager
+from exporters.recipe_card_exporter import (
+    CARD_FORMATS, CARD_SIZES, DEFAULT_QUALITY, CardOutput, export_recipe_card_outputs
+)
+
+
+class BatchItem(NamedTuple):
+    photo_path: str
+    recipe: Dict[str, str]
+    outputs: Tuple[CardOutput, ...]    # every format / size is encoded from one render
+
+
+class BatchFailure(NamedTuple):
+    photo_path: str
+    error: str
+
+
+def card_filename(photo_path: str, recipe: Dict[str, str], ext: str = ".png") -> str:
+    """File name for the card of one photo: <photo>_<recipe>_card<ext>."""
+    base = os.path.splitext(os.path.basename(photo_path))[0]
+    recipe_name = re.sub(r'[\\/:*?"<>|\s]+', "_", recipe.get("Name", "")).strip("_")
+    return f"{base}_{recipe_name}_card{ext}" if recipe_name else f"{base}_card{ext}"
+
+
+def plan_batch(
+    photos: List[Tuple[str, Dict[str, str]]],
+    output_dir: str,
+    sizes: Sequence[str] = ("card",),
+    fmt: str = "PNG",
+    quality: int = DEFAULT_QUALITY,
+) -> List[BatchItem]:
+    """
+    BatchItems for (photo_path, recipe) pairs written into output_dir, one
+    file per size name of CARD_SIZES ("card" keeps the plain name, others
+    add _story / _square). Names that would collide (same file name in
+    different folders, or a file already in output_dir) get a numeric
+    suffix, so existing files are never overwritten.
+    """
+    ext = CARD_FORMATS[fmt]
+    try:
+        existing = {name.lower() for name in os.listdir(output_dir)}
+    except OSError:
+        existing = set()
+    items: List[BatchItem] = []
+    used = set()
+
+    def names(stem: str) -> List[str]:
+        return [f"{stem}{'' if size == 'card' else '_' + size}{ext}" for size in sizes]
+
+    for photo_path, recipe in photos:
+        stem = os.path.splitext(card_filename(photo_path, recipe, ext))[0]
+        unique, n = stem, 2
+        while unique.lower() in used or any(name.lower() in existing for name in names(unique)):
+            unique = f"{stem}_{n}"
+            n += 1
+        used.add(unique.lower())
+        outputs = tuple(
+            CardOutput(os.path.join(output_dir, name), CARD_SIZES[size], fmt, quality)
+            for name, size in zip(names(unique), sizes)
+        )
+        items.append(BatchItem(photo_path, recipe, outputs))
+    return items
+
+
+def _init_worker(raw_previews: bool) -> None:
+    ImageManager.set_raw_previews(raw_previews)
+
+
+def _export_one(item: BatchItem) -> Optional[str]:
+    """Runs in a worker process. Returns None on success, else the error text."""
+    try:
+        export_recipe_card_outputs(item.photo_path, item.recipe, list(item.outputs))
+        return None
+    except Exception as e:
+        return str(e) or type(e).__name__
+
+
+def export_batch(
+    items: List[BatchItem],
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> List[BatchFailure]:
+    """
+    Render the cards of items on a process pool (one process per core by
+    default). progress(done, total) is called from the calling thread after
+    each file; setting cancel stops before the remaining files. Returns the
+    files that failed with their error; one failure never stops the batch.
+    """
+    total = len(items)
+    failures: List[BatchFailure] = []
+    if not total:
+        return failures
+    workers = min(max_workers or os.cpu_count() or 1, total)
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(ImageManager.raw_previews(),)) as pool:
+        futures = {pool.submit(_export_one, item): item for item in items}
+        for future in as_completed(futures):
+            if cancel is not None and cancel.is_set():
+                pool.shutdown(wait=True, cancel_futures=True)
+                break
+            try:
+                error = future.result()
+            except Exception as e:   # the worker process died
+                error = str(e) or type(e).__name__
+            if error is not None:
+                failures.append(BatchFailure(futures[future].photo_path, error))
+            done += 1
+            if progress is not None:
+                progress(done, total)
+    return failures
@@ -3,20 +3,42 @@
 # ──────────────────────────────────────────────
 import os
 import math
-from PIL import Image, ImageDraw, ImageFilter, ImageFont
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageStat
+
+from managers import ImageManager
 
 
 # ── Helpers ────────────────────────────────────
 
 def _dominant_color(img: Image.Image) -> tuple[int, int, int]:
     """Return the average color of the image (used for background tint)."""
-    small = img.copy().convert("RGB")
+    small = img.copy()
     small.thumbnail((50, 50))
-    pixels = list(small.getdata())
-    r = sum(p[0] for p in pixels) // len(pixels)
-    g = sum(p[1] for p in pixels) // len(pixels)
-    b = sum(p[2] for p in pixels) // len(pixels)
-    return (r, g, b)
+    r, g, b = ImageStat.Stat(small.convert("RGB")).mean
+    return (int(r), int(g), int(b))
+
+
+def _blurred_background(img: Image.Image, size: tuple[int, int], radius: float) -> Image.Image:
+    """
+    img stretched to size (as the card always did – the blur hides the aspect
+    change) and Gaussian-blurred by radius. The blur runs on
+    a copy BG_DOWNSCALE times smaller which is then upscaled – at this radius
+    the result is visually the same and far cheaper than blurring at full size.
+    """
+    small_size = (max(1, size[0] // BG_DOWNSCALE), max(1, size[1] // BG_DOWNSCALE))
+    small = img.resize(small_size, Image.BILINEAR, reducing_gap=2.0)
+    small = small.filter(ImageFilter.GaussianBlur(radius=radius / BG_DOWNSCALE))
+    return small.resize(size, Image.BICUBIC)
+
+
+def _backdrop(src: Image.Image, dom: tuple[int, int, int], size: tuple[int, int]) -> Image.Image:
+    """Blurred photo tinted toward its darkened dominant colour, at size."""
+    bg_photo = _blurred_background(src, size, BG_BLUR_RADIUS)
+    overlay = Image.new("RGB", size, _darken(dom, 0.25))
+    return Image.blend(bg_photo, overlay, alpha=0.55)
 
 
 def _darken(color: tuple[int, int, int], factor: float = 0.35) -> tuple[int, int, int]:
@@ -29,7 +51,32 @@ def _blend(color: tuple[int, int, int], factor: float = 0.55) -> tuple[int, int,
     return tuple(int(color[i] * factor + target[i] * (1 - factor)) for i in range(3))
 
 
+# ── Cached resources ───────────────────────────
+# Fonts, masks and layout measurements depend only on constants, so they are
+# resolved once per process and shared by every export. lru_cache is
+# thread-safe; the cached objects are only read (paste masks, draw fonts).
+
+_FONT_CANDIDATES = {
+    True:  ["arialbd.ttf", "Arial Bold.ttf", "DejaVuSans-Bold.ttf", "LiberationSans-Bold.ttf"],
+    False: ["arial.ttf", "Arial.ttf", "DejaVuSans.ttf", "LiberationSans-Regular.ttf"],
+}
+
+
+@lru_cache(maxsize=None)
+def _font_name(bold: bool) -> Optional[str]:
+    """First TrueType candidate that loads, probed once per weight; None if there is none."""
+    for name in _FONT_CANDIDATES[bold]:
+        try:
+            ImageFont.truetype(name, 12)
+            return name
+        except OSError:
+            pass
+    return None
+
+
+@lru_cache(maxsize=None)
 def _rounded_rect_mask(size: tuple[int, int], radius: int) -> Image.Image:
+    """Shared, read-only mask – do not draw on it."""
     mask = Image.new("L", size, 0)
     d = ImageDraw.Draw(mask)
     d.rounded_rectangle([(0, 0), (size[0] - 1, size[1] - 1)], radius=radius, fill=255)
@@ -46,18 +93,71 @@ def _draw_pill(draw: ImageDraw.ImageDraw, xy, fill, radius=18, alpha=160):
     draw.rounded_rectangle(xy, radius=radius, fill=fill)
 
 
+@lru_cache(maxsize=None)
 def _try_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
-    candidates = (
-        ["arialbd.ttf", "Arial Bold.ttf", "DejaVuSans-Bold.ttf", "LiberationSans-Bold.ttf"]
-        if bold else
-        ["arial.ttf", "Arial.ttf", "DejaVuSans.ttf", "LiberationSans-Regular.ttf"]
-    )
-    for name in candidates:
+    name = _font_name(bold)
+    if name is not None:
         try:
             return ImageFont.truetype(name, size)
         except OSError:
             pass
-    return ImageFont.load_default()
+    # Pillow's built-in font needs no files on disk; it honours the size on Pillow 10.1+
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+_MEASURE = ImageDraw.Draw(Image.new("RGB", (1, 1)), "RGBA")
+
+
+@lru_cache(maxsize=2048)
+def _text_width(text: str, size: int, bold: bool = False) -> int:
+    """Rendered width of text (labels and recipe values repeat across cards)."""
+    bbox = _MEASURE.textbbox((0, 0), text, font=_try_font(size, bold))
+    return bbox[2] - bbox[0]
+
+
+class _Layout(NamedTuple):
+    title_h: int
+    photo_y: int
+    photo_w: int
+    photo_h: int
+    big_pill_y: int
+    big_pill_w: int
+    small_y: int
+    small_pill_w: int
+
+
+@lru_cache(maxsize=None)
+def _layout() -> _Layout:
+    """Positions of the card sections, computed once."""
+    title_h = _try_font(30, bold=True).size + 6
+    # Header block height: top pad + title + sub + gap
+    header_block_h = PADDING + title_h + 20 + 14
+
+    # Distribute remaining vertical space:
+    #   big pills row  →  90 px
+    #   gap after big  →  20 px
+    #   small pills    →  2 rows × 72 px + 1 × 10 gap = 154 px
+    #   bottom padding →  PADDING
+    rows_small = math.ceil(SMALL_PILLS / SMALL_COLS)
+    bottom_reserved = (BIG_PILL_H + 20 + rows_small * SMALL_PILL_H
+                       + (rows_small - 1) * SMALL_GAP + PADDING)
+
+    photo_y = header_block_h
+    photo_h = CARD_H - photo_y - bottom_reserved - 24   # 24 = gap between photo and big pills
+    big_pill_y = photo_y + photo_h + 24
+    return _Layout(
+        title_h=title_h,
+        photo_y=photo_y,
+        photo_w=CARD_W - 2 * PADDING,
+        photo_h=photo_h,
+        big_pill_y=big_pill_y,
+        big_pill_w=(CARD_W - 2 * PADDING - BIG_PILL_GAP * (BIG_PILLS - 1)) // BIG_PILLS,
+        small_y=big_pill_y + BIG_PILL_H + 20,
+        small_pill_w=(CARD_W - 2 * PADDING - SMALL_GAP * (SMALL_COLS - 1)) // SMALL_COLS,
+    )
 
 
 # ── Layout constants ────────────────────────────
@@ -70,32 +170,126 @@ PADDING = 36
 PHOTO_RADIUS = 22
 PILL_RADIUS = 16
 PILL_ALPHA = 180   # 0-255
-
-
-# ── Main export function ────────────────────────
+BIG_PILL_H = 90
+BIG_PILL_GAP = 12
+BIG_PILLS = 3      # Film Sim · WB · Grain
+SMALL_PILL_H = 72
+SMALL_GAP = 10
+SMALL_COLS = 5
+SMALL_PILLS = 9
+BG_BLUR_RADIUS = 40
+BG_DOWNSCALE = 8   # background blur runs at 1/8 of the card size
+
+# Output sizes: None is the native CARD_W × CARD_H card; other sizes place the
+# card (never upscaled) on a backdrop of the same blurred photo
+CARD_SIZES = {
+    "card":   None,
+    "story":  (1080, 1920),   # 9:16
+    "square": (1080, 1080),   # 1:1
+}
+CARD_FORMATS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp"}
+# Save dialog filter; the first entry is the default
+CARD_FILE_FILTER = "JPEG Image (*.jpg *.jpeg);;PNG Image (*.png);;WebP Image (*.webp)"
+DEFAULT_QUALITY = 90
+
+
+class CardOutput(NamedTuple):
+    """One encoded file of a rendered card."""
+    path: str
+    size: Optional[Tuple[int, int]] = None   # None = native card size
+    format: Optional[str] = None             # PNG / JPEG / WEBP; None = from the file extension
+    quality: int = DEFAULT_QUALITY           # JPEG / WebP only
+
+
+class RenderedCard(NamedTuple):
+    image: Image.Image                  # CARD_W × CARD_H, RGB
+    source: Image.Image                 # decoded photo, shared with ImageManager's cache
+    color: tuple[int, int, int]         # dominant colour of the photo
+
+
+# ── Main export functions ───────────────────────
 
 def export_recipe_card(
     photo_path: str,
     recipe: dict,
     output_path: str,
     app_name: str = "Film Recipe Finder",
+    quality: int = DEFAULT_QUALITY,
 ) -> str:
+    """Render one card and save it; the format follows the extension of output_path."""
+    card = render_recipe_card(photo_path, recipe, app_name)
+    return save_card(card, CardOutput(output_path, quality=quality))
+
+
+def export_recipe_card_outputs(
+    photo_path: str,
+    recipe: dict,
+    outputs: List[CardOutput],
+    app_name: str = "Film Recipe Finder",
+) -> List[str]:
+    """Render the card layout once and encode it to every output (format / size)."""
+    card = render_recipe_card(photo_path, recipe, app_name)
+    return [save_card(card, output) for output in outputs]
+
+
+def save_card(card: RenderedCard, output: CardOutput) -> str:
+    """Encode a rendered card straight to output.path."""
+    fmt = (output.format or _format_for(output.path)).upper()
+    img = card.image if output.size is None else _fit_card(card, output.size)
+
+    os.makedirs(os.path.dirname(output.path) or ".", exist_ok=True)
+    if fmt == "PNG":
+        img.save(output.path, "PNG")
+    elif fmt == "JPEG":
+        img.save(output.path, "JPEG", quality=output.quality, optimize=True, progressive=True)
+    elif fmt == "WEBP":
+        img.save(output.path, "WEBP", quality=output.quality, method=4)
+    else:
+        raise ValueError(f"Unsupported card format: {fmt}")
+    return output.path
+
+
+def with_card_extension(path: str, name_filter: str) -> str:
+    """path with the extension of the chosen save-dialog filter if it has no known one."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in CARD_FORMATS.values() or ext == ".jpeg":
+        return path
+    for fmt_ext in CARD_FORMATS.values():
+        if f"*{fmt_ext}" in name_filter:
+            return path + fmt_ext
+    return path + CARD_FORMATS["PNG"]
+
+
+def _format_for(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, fmt_ext in CARD_FORMATS.items():
+        if ext == fmt_ext or (fmt == "JPEG" and ext == ".jpeg"):
+            return fmt
+    raise ValueError(f"Unsupported card format: {ext or path}")
+
+
+def _fit_card(card: RenderedCard, size: tuple[int, int]) -> Image.Image:
+    """The card centred on a size backdrop, scaled down (never up) to fit with a margin."""
+    canvas = _backdrop(card.source, card.color, size)
+    margin = PADDING * 2
+    scale = min(1.0, (size[0] - margin) / CARD_W, (size[1] - margin) / CARD_H)
+    img = card.image
+    if scale < 1.0:
+        img = img.resize((round(CARD_W * scale), round(CARD_H * scale)), Image.LANCZOS)
+    pos = ((size[0] - img.width) // 2, (size[1] - img.height) // 2)
+    _paste_rounded(canvas, img, pos, PHOTO_RADIUS)
+    return canvas
+
+
+def render_recipe_card(
+    photo_path: str,
+    recipe: dict,
+    app_name: str = "Film Recipe Finder",
+) -> RenderedCard:
 
     # ── 1. Load & orient source photo ──────────────
-    src = Image.open(photo_path)
-    from PIL import ExifTags
-    try:
-        exif = src.getexif()
-        orientation = exif.get(ExifTags.Base.Orientation, 1)
-        if orientation == 8:
-            src = src.rotate(90, expand=True)
-        elif orientation == 6:
-            src = src.rotate(-90, expand=True)
-        elif orientation == 3:
-            src = src.rotate(180, expand=True)
-    except Exception:
-        pass
-    src = src.convert("RGB")
+    # Decoded at twice the card size – enough for the photo crop and the blurred background
+    src, _size = ImageManager.load(photo_path, (2 * CARD_W, 2 * CARD_H))
 
     # ── 2. Fixed card dimensions (4:5 portrait) ────
     # CARD_W and CARD_H are defined as module-level constants above.
@@ -104,22 +298,16 @@ def export_recipe_card(
     # ── 3. Build blurred background ────────────────
     dom = _dominant_color(src)
 
-    bg_photo = src.copy()
-    bg_photo = bg_photo.resize((CARD_W, CARD_H), Image.LANCZOS)
-    bg_photo = bg_photo.filter(ImageFilter.GaussianBlur(radius=40))
-    overlay = Image.new("RGB", (CARD_W, CARD_H), _darken(dom, 0.25))
-    bg = Image.blend(bg_photo, overlay, alpha=0.55)
-
-    card = bg.copy()
+    card = _backdrop(src, dom, (CARD_W, CARD_H))
     draw = ImageDraw.Draw(card, "RGBA")
 
-    # ── 3. Fonts ────────────────────────────────────
+    # ── 3. Fonts & layout (cached per process) ─────
     f_title   = _try_font(30, bold=True)
     f_sub     = _try_font(20)
     f_brand   = _try_font(22, bold=True)
     f_pill_lg = _try_font(26, bold=True)
-    f_pill_sm = _try_font(18, bold=True)
     f_label   = _try_font(15)
+    lay = _layout()
 
     # ── 4. Header ───────────────────────────────────
     name = recipe.get("Name", "Unknown Recipe")
@@ -127,55 +315,31 @@ def export_recipe_card(
 
     # Recipe name
     draw.text((PADDING, PADDING), name, font=f_title, fill=(255, 255, 255))
-    title_h = f_title.size + 6
     sub_text = film_mode if film_mode and film_mode.strip() and film_mode != "None" else ""
-    draw.text((PADDING, PADDING + title_h), sub_text, font=f_sub, fill=(200, 200, 200))
+    draw.text((PADDING, PADDING + lay.title_h), sub_text, font=f_sub, fill=(200, 200, 200))
 
     # Branding top-right
-    brand_bbox = draw.textbbox((0, 0), app_name, font=f_brand)
-    brand_w = brand_bbox[2] - brand_bbox[0]
+    brand_w = _text_width(app_name, 22, bold=True)
     draw.text((CARD_W - PADDING - brand_w, PADDING + 6), app_name, font=f_brand, fill=(150, 150, 150))
 
     # ── 5. Photo thumbnail ──────────────────────────
-    # Header block height
-    header_block_h = PADDING + title_h + 20 + 14   # top pad + title + sub + gap
-
-    # Distribute remaining vertical space:
-    #   big pills row  →  90 px
-    #   gap after big  →  20 px
-    #   small pills    →  2 rows × 72 px + 1 × 10 gap = 154 px
-    #   bottom padding →  PADDING
-    ROWS_SMALL = math.ceil(9 / 5)
-    small_pill_h = 72
-    small_gap = 10
-    big_pill_h = 90
-    bottom_reserved = big_pill_h + 20 + ROWS_SMALL * small_pill_h + (ROWS_SMALL - 1) * small_gap + PADDING
-
-    photo_y = header_block_h
-    photo_h = CARD_H - photo_y - bottom_reserved - 24   # 24 = gap between photo and big pills
-
-    photo_w = CARD_W - 2 * PADDING
-
-    thumb = src.copy()
+    photo_w, photo_h = lay.photo_w, lay.photo_h
     src_ratio = src.width / src.height
     target_ratio = photo_w / photo_h
     if src_ratio > target_ratio:
         new_w = int(src.height * target_ratio)
         offset = (src.width - new_w) // 2
-        thumb = thumb.crop((offset, 0, offset + new_w, src.height))
+        crop = (offset, 0, offset + new_w, src.height)
     else:
         new_h = int(src.width / target_ratio)
         offset = (src.height - new_h) // 2
-        thumb = thumb.crop((0, offset, src.width, offset + new_h))
-    thumb = thumb.resize((photo_w, photo_h), Image.LANCZOS)
+        crop = (0, offset, src.width, offset + new_h)
+    thumb = src.crop(crop).resize((photo_w, photo_h), Image.LANCZOS)
 
-    _paste_rounded(card, thumb, (PADDING, photo_y), PHOTO_RADIUS)
+    _paste_rounded(card, thumb, (PADDING, lay.photo_y), PHOTO_RADIUS)
     draw = ImageDraw.Draw(card, "RGBA")  # redraw after paste
 
     # ── 6. Big pills row (Film Sim · WB · Grain) ────
-    big_pill_y = photo_y + photo_h + 24
-    gap = 12
-
     wb_val = recipe.get("WhiteBalance", "Auto")
     ct = recipe.get("ColorTemperature", "")
     wb_display = f"{ct}K" if ct and ct.strip() else wb_val
@@ -195,25 +359,21 @@ def export_recipe_card(
         {"top": grain_display,       "bot": "Grain Effect"},
     ]
 
-    total_gap = gap * (len(big_pills) - 1)
-    pill_w = (CARD_W - 2 * PADDING - total_gap) // len(big_pills)
-
+    pill_w = lay.big_pill_w
     pill_bg = (*_darken(dom, 0.55), PILL_ALPHA)  # RGBA
 
     for i, p in enumerate(big_pills):
-        x0 = PADDING + i * (pill_w + gap)
-        y0 = big_pill_y
+        x0 = PADDING + i * (pill_w + BIG_PILL_GAP)
+        y0 = lay.big_pill_y
         x1 = x0 + pill_w
-        y1 = y0 + big_pill_h
+        y1 = y0 + BIG_PILL_H
         draw.rounded_rectangle([(x0, y0), (x1, y1)], radius=PILL_RADIUS, fill=pill_bg)
 
-        tb = draw.textbbox((0, 0), p["top"], font=f_pill_lg)
-        tw = tb[2] - tb[0]
+        tw = _text_width(p["top"], 26, bold=True)
         cx = x0 + (pill_w - tw) // 2
         draw.text((cx, y0 + 10), p["top"], font=f_pill_lg, fill=(240, 240, 240))
 
-        lb = draw.textbbox((0, 0), p["bot"], font=f_label)
-        lw = lb[2] - lb[0]
+        lw = _text_width(p["bot"], 15)
         draw.text((x0 + (pill_w - lw) // 2, y1 - 26), p["bot"], font=f_label, fill=(170, 170, 170))
 
     # ── 7. Small pills grid ─────────────────────────
@@ -229,32 +389,24 @@ def export_recipe_card(
         ("Clarity",            "Clarity"),
     ]
 
-    COLS = 5
-    small_y = big_pill_y + big_pill_h + 20
-    small_pill_w = (CARD_W - 2 * PADDING - small_gap * (COLS - 1)) // COLS
-
+    small_pill_w = lay.small_pill_w
     for idx, (field, label) in enumerate(small_fields):
-        col = idx % COLS
-        row = idx // COLS
-        x0 = PADDING + col * (small_pill_w + small_gap)
-        y0 = small_y + row * (small_pill_h + small_gap)
+        col = idx % SMALL_COLS
+        row = idx // SMALL_COLS
+        x0 = PADDING + col * (small_pill_w + SMALL_GAP)
+        y0 = lay.small_y + row * (SMALL_PILL_H + SMALL_GAP)
         x1 = x0 + small_pill_w
-        y1 = y0 + small_pill_h
+        y1 = y0 + SMALL_PILL_H
 
         draw.rounded_rectangle([(x0, y0), (x1, y1)], radius=12, fill=pill_bg)
 
         val = recipe.get(field, "—") or "—"
         short_val = val.split(" ")[0] if " " in val else val
 
-        vb = draw.textbbox((0, 0), short_val, font=f_pill_lg)
-        vw = vb[2] - vb[0]
+        vw = _text_width(short_val, 26, bold=True)
         draw.text((x0 + (small_pill_w - vw) // 2, y0 + 8), short_val, font=f_pill_lg, fill=(230, 230, 230))
 
-        lb = draw.textbbox((0, 0), label, font=f_label)
-        lw = lb[2] - lb[0]
+        lw = _text_width(label, 15)
         draw.text((x0 + (small_pill_w - lw) // 2, y1 - 22), label, font=f_label, fill=(160, 160, 160))
 
-    # ── 8. Save ──────────────────────────────────────
-    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    card.convert("RGB").save(output_path, "PNG", quality=95)
-    return output_path
\ No newline at end of file
+    return RenderedCard(card, src, dom)
\ No newline at end of file
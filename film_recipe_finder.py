@@ -24,6 +24,7 @@
 # ExifTool is licensed under the Artistic License / GPL
 # ──────────────────────────────────────────────────────────────────────────────
 
+import multiprocessing
 import os
 import sys
 
@@ -37,6 +38,7 @@ from PyQt6.QtCore import qInstallMessageHandler
 from PyQt6.QtWidgets import QApplication
 
 from main_window import MainWindow
+from managers import ExifManager, SettingsManager
 
 
 def suppress_qt_warnings(msg_type, context, message):
@@ -44,7 +46,13 @@ def suppress_qt_warnings(msg_type, context, message):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()   # batch export workers in frozen builds
     qInstallMessageHandler(suppress_qt_warnings)
+    if "--exiftool-info" in sys.argv:
+        ExifManager.set_exiftool_path(SettingsManager.load().get("exiftool_path", ""))
+        for key, value in ExifManager.exiftool_info().items():
+            print(f"{key}: {value}")
+        sys.exit(0)
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
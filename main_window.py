@@ -1,26 +1,31 @@
 # ──────────────────────────────────────────────
 # MAIN WINDOW
 # ──────────────────────────────────────────────
+import bisect
 import os
 
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QAction, QCursor, QIcon, QPixmap
 from PyQt6.QtWidgets import (
     QApplication, QComboBox, QFileDialog, QLabel, QMainWindow,
-    QMessageBox, QPushButton, QScrollArea, QStatusBar,
+    QMessageBox, QProgressBar, QPushButton, QScrollArea, QStatusBar,
     QToolBar, QVBoxLayout, QWidget
 )
 
 from constants import Constants
-from managers import ExifManager, SettingsManager, XMLManager
+from managers import (
+    ExifManager, HistogramCache, ImageManager, RecipeIndex, RecipeRanker, SettingsManager, XMLManager
+)
 from themes import THEMES, DEFAULT_THEME
 from utils import resource_path
-from widgets import ImageCard
+from widgets import CardVirtualizer, IdentifyPipeline, ImageCard
 from dialogs import (
-    AboutDialog,AddRecipeDialog, DeleteRecipeDialog, EditRecipeDialog,
+    AboutDialog,AddRecipeDialog, BatchExportDialog, DeleteRecipeDialog, EditRecipeDialog,
     RecipeBrowserDialog, SettingsDialog
 )
 
+RECIPE_FILE_FILTER = "Recipe XML (*.xml);;SQLite Database (*.db *.sqlite *.sqlite3)"
+
 
 class MainWindow(QMainWindow):
 
@@ -40,11 +45,34 @@ class MainWindow(QMainWindow):
         )
 
         self.settings      = SettingsManager.load()
-        self.simulations   = XMLManager.load_simulations(Constants.XML_FILE)
+        XMLManager.set_flush_delay(Constants.XML_FLUSH_DELAY)
+        XMLManager.enable_snapshot(Constants.XML_FILE)
+        QApplication.instance().aboutToQuit.connect(XMLManager.flush)
+        self._apply_recipe_database(carry_over=False)
+        self.simulations   = XMLManager.load_simulations(XMLManager.database())
+        self.recipe_index  = RecipeIndex(self.simulations)
+        self.recipe_ranker = RecipeRanker(self.simulations)
         self.current_theme = self.settings.get("theme", DEFAULT_THEME)
         self.last_dir      = self.settings.get("last_dir", "")
 
+        ExifManager.set_exiftool_path(self.settings.get("exiftool_path", ""))
+        ExifManager.start_session()
+        self._apply_histogram_cache()
+        ImageManager.set_raw_previews(self.settings.get("raw_previews", True))
+        QApplication.instance().aboutToQuit.connect(ExifManager.stop_session)
+
+        self.pipeline = IdentifyPipeline(self)
+        self.pipeline.result_ready.connect(self._on_identified)
+        self.pipeline.failed.connect(self._on_identify_failed)
+        self.pipeline.progress.connect(self._on_identify_progress)
+        self.pipeline.finished.connect(self._on_identify_finished)
+        QApplication.instance().aboutToQuit.connect(self.pipeline.cancel)
+        self._card_order    = []
+        self._identify_errors = []
+
         self._build_ui()
+        self.virtualizer = CardVirtualizer(self.scroll_area, parent=self)
+        QApplication.instance().aboutToQuit.connect(self.virtualizer.shutdown)
         self._build_menu()
         self._build_toolbar()
         self._apply_theme()
@@ -55,6 +83,14 @@ class MainWindow(QMainWindow):
     def _about(self):
         AboutDialog(self).exec()
 
+    def _exiftool_info(self):
+        info = ExifManager.exiftool_info()
+        text = "\n".join(f"{k}: {v}" for k, v in info.items())
+        if "Error" in info:
+            QMessageBox.warning(self, "ExifTool Info", text)
+        else:
+            QMessageBox.information(self, "ExifTool Info", text)
+
     # ── UI BUILD ──────────────────────────────
     def _build_ui(self):
         central = QWidget()
@@ -87,6 +123,12 @@ class MainWindow(QMainWindow):
         self.status_label = QLabel()
         self.status_bar.addPermanentWidget(self.status_label)
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(220)
+        self.progress_bar.setFormat("Identifying %v / %m")
+        self.progress_bar.hide()
+        self.status_bar.addWidget(self.progress_bar)
+
     def _refresh_cards(self):
         for i in range(self.cards_layout.count()):
             widget = self.cards_layout.itemAt(i).widget()
@@ -152,10 +194,16 @@ class MainWindow(QMainWindow):
         recipes_menu.addAction(self._action("Edit Recipe",      self.open_edit_recipe))
         recipes_menu.addAction(self._action("Delete Recipe",    self.open_delete_recipe))
         recipes_menu.addSeparator()
+        recipes_menu.addAction(self._action("Export Recipe Cards…", self.open_batch_export))
+        recipes_menu.addSeparator()
         recipes_menu.addAction(self._action("Exit", self.close))
 
         view_menu = menubar.addMenu("Tools")        
         view_menu.addAction(self._action("Settings", self.open_settings))
+        view_menu.addAction(self._action("ExifTool Info", self._exiftool_info))
+        view_menu.addSeparator()
+        view_menu.addAction(self._action("Import Recipes…", self._import_recipes))
+        view_menu.addAction(self._action("Export Recipes…", self._export_recipes))
 
         help_menu = menubar.addMenu("Help")
         help_menu.addAction(self._action("About", self._about))
@@ -182,17 +230,11 @@ class MainWindow(QMainWindow):
         )
         self.status_label.setText(f"{recipes_text}     |     {self.current_theme}     |     {self.last_dir}   ")
 
-    # ── COMPARE ───────────────────────────────
-    def _compare(self, exif_data):
-        skip = {"Name", "FilmMode", "DevelopmentDynamicRange", "Sensor", "Clarity", "Sharpness", "Favourite", "Description", "URL"}
-        for sim_name, sim_data in self.simulations.items():
-            if all(exif_data.get(k) == v for k, v in sim_data.items() if k not in skip):
-                return sim_name
-        return None
-
     # ── CLEAR CARDS ───────────────────────────
     def _clear_cards(self):
         self.placeholder.show()
+        self._card_order = []
+        self.virtualizer.clear()
         while self.cards_layout.count() > 1:
             item = self.cards_layout.takeAt(0)
             if item.widget() and item.widget() is not self.placeholder:
@@ -225,30 +267,74 @@ class MainWindow(QMainWindow):
 
     # ── PROCESS FILES ─────────────────────────
     def _process_files(self, filenames):
-        self.placeholder.hide()
+        self.pipeline.cancel()
         self.last_dir = os.path.dirname(filenames[0])
         self.settings["last_dir"] = self.last_dir
         SettingsManager.save(self.settings)
         self._clear_cards()
+        self.placeholder.hide()
 
         relevant_keys = set()
         for sim_data in self.simulations.values():
             relevant_keys.update(sim_data.keys())
+        relevant_keys -= Constants.MATCH_SKIP_FIELDS
+
+        # The run matches against snapshots: recipes edited meanwhile
+        # must not change the index under the worker threads
+        simulations = dict(self.simulations)
+        recipe_index  = self.recipe_index.snapshot()
+        recipe_ranker = self.recipe_ranker.snapshot()
+
+        self._identify_errors = []
+        self.progress_bar.setRange(0, len(filenames))
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.pipeline.start(
+            filenames, relevant_keys, recipe_index.lookup,
+            simulations, recipe_ranker.rank
+        )
+
+    def _on_identified(self, index, result):
+        try:
+            card = ImageCard(
+                result.filename, result.sim_data, result.exif_fallback, self.settings,
+                nearest=result.nearest, thumb=result.thumb, info=result.info
+            )
+        except Exception as e:
+            self._on_identify_failed(index, result.filename, str(e))
+            return
+        # Keep cards in the original file order although they finish out of order
+        pos = bisect.bisect(self._card_order, index)
+        self._card_order.insert(pos, index)
+        self.cards_layout.insertWidget(pos, card)
+        self.virtualizer.add(card)
+
+    def _on_identify_failed(self, index, filename, error):
+        self._identify_errors.append(f"{os.path.basename(filename)}: {error}")
+
+    def _on_identify_progress(self, done, total):
+        self.progress_bar.setValue(done)
 
-        for filename in filenames:
-            try:
-                exif_data    = ExifManager.get_exif_data(filename, relevant_keys)
-                sim_name     = self._compare(exif_data)
-                sim_data     = self.simulations.get(sim_name) if sim_name else None
-                exif_fallback = {} if sim_data else ExifManager.get_exif(filename, 'short')
-                card = ImageCard(filename, sim_data, exif_fallback, self.settings)
-                self.cards_layout.insertWidget(self.cards_layout.count() - 1, card)
-            except Exception as e:
-                QMessageBox.warning(
-                    self, "Error",
-                    f"Failed to process {os.path.basename(filename)}:\n{e}"
-                )
+    def _on_identify_finished(self):
+        self.progress_bar.hide()
         self._update_status()
+        if self._identify_errors:
+            QMessageBox.warning(
+                self, "Error",
+                "Failed to process:\n" + "\n".join(self._identify_errors)
+            )
+
+    # ── BATCH EXPORT ──────────────────────────
+    def open_batch_export(self):
+        photos = []
+        for i in range(self.cards_layout.count()):
+            widget = self.cards_layout.itemAt(i).widget()
+            if isinstance(widget, ImageCard) and widget.sim_data:
+                photos.append((widget.filename, widget.sim_data))
+        if not photos:
+            QMessageBox.information(self, "Export Recipe Cards", "No photos with a matched recipe.")
+            return
+        BatchExportDialog(self, photos, self.last_dir).exec()
 
     # ── RECIPE CRUD ───────────────────────────
     def open_add_recipe(self):
@@ -264,15 +350,81 @@ class MainWindow(QMainWindow):
         RecipeBrowserDialog(self, self.simulations, self._refresh_simulations).show()
 
     def _refresh_simulations(self):
-        self.simulations = XMLManager.load_simulations(Constants.XML_FILE)
+        self.simulations = XMLManager.load_simulations(XMLManager.database())
+        self.recipe_index.sync(self.simulations)
+        self.recipe_ranker.rebuild(self.simulations)
         self._update_status()
 
+    # ── RECIPE DATABASE ───────────────────────
+    def _apply_recipe_database(self, carry_over=True):
+        """
+        Switch to the recipe file chosen in settings. With carry_over the
+        recipes in use are copied into it; a new database is always seeded
+        from the current file. Returns True if the file changed.
+        """
+        wanted = Constants.SQLITE_FILE if self.settings.get("recipe_database") == "sqlite" else Constants.XML_FILE
+        current = XMLManager.database()
+        if wanted == current:
+            return False
+        try:
+            if carry_over or not os.path.exists(resource_path(wanted)):
+                XMLManager.copy_recipes(current, wanted)
+                XMLManager.flush()
+        except Exception as e:
+            QMessageBox.critical(self, "Recipe Database", f"Could not switch the recipe database: {e}")
+            self.settings["recipe_database"] = "sqlite" if XMLManager.is_sqlite(current) else "xml"
+            SettingsManager.save(self.settings)
+            return False
+        XMLManager.use_database(wanted)
+        return True
+
+    def _import_recipes(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Recipes", self.last_dir, RECIPE_FILE_FILTER
+        )
+        if not path:
+            return
+        answer = QMessageBox.question(
+            self, "Import Recipes",
+            f"Replace all {len(self.simulations)} recipes with the ones in\n{path}?"
+        )
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            XMLManager.copy_recipes(path, XMLManager.database())
+            XMLManager.flush()
+        except Exception as e:
+            QMessageBox.critical(self, "Import Recipes", f"Failed to import recipes: {e}")
+            return
+        self._refresh_simulations()
+
+    def _export_recipes(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Recipes", os.path.join(self.last_dir, Constants.XML_FILE), RECIPE_FILE_FILTER
+        )
+        if not path:
+            return
+        if os.path.abspath(path) == os.path.abspath(resource_path(XMLManager.database())):
+            return
+        try:
+            XMLManager.copy_recipes(XMLManager.database(), path)
+            XMLManager.flush()
+        except Exception as e:
+            QMessageBox.critical(self, "Export Recipes", f"Failed to export recipes: {e}")
+            return
+        QMessageBox.information(self, "Export Recipes", f"{len(self.simulations)} recipes saved to:\n{path}")
+
     # ── SETTINGS ──────────────────────────────
     def open_settings(self):
         SettingsDialog(self, self.settings, self._on_settings_saved).exec()
 
     def _on_settings_saved(self):
+        if self._apply_recipe_database():
+            self._refresh_simulations()
         self.current_theme = self.settings.get("theme", DEFAULT_THEME)
+        ExifManager.set_exiftool_path(self.settings.get("exiftool_path", ""))
+        self._apply_histogram_cache()
+        ImageManager.set_raw_previews(self.settings.get("raw_previews", True))
         self._apply_theme()
         for toolbar in self.findChildren(QToolBar):
             self.removeToolBar(toolbar)
@@ -281,6 +433,10 @@ class MainWindow(QMainWindow):
         self._update_status()
         self._refresh_histograms()
 
+    def _apply_histogram_cache(self):
+        enabled = self.settings.get("histogram_disk_cache", False)
+        HistogramCache.set_disk_dir(Constants.HISTOGRAM_CACHE_DIR if enabled else None)
+
     def _refresh_histograms(self):
         for i in range(self.cards_layout.count()):
             widget = self.cards_layout.itemAt(i).widget()
@@ -1,4 +1,10 @@
 from .settings_manager import SettingsManager
 from .xml_manager import XMLManager
 from .exif_manager import ExifManager
-from .recipe_manager import RecipeManager
\ No newline at end of file
+from .recipe_manager import RecipeManager
+from .recipe_index import RecipeIndex
+from .recipe_ranker import RecipeRanker
+from .histogram_cache import HistogramCache
+from .image_manager import ImageManager
+from .recipe_store import RecipeStore
+from .sqlite_store import SQLiteRecipeStore
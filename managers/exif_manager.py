@@ -1,20 +1,45 @@
 # ──────────────────────────────────────────────
 # EXIF MANAGER
 # ──────────────────────────────────────────────
+import atexit
+import io
+import json
 import os
+import queue
 import shutil
 import subprocess
 import sys
-from typing import Dict, Optional, List
+import threading
+from typing import Dict, Iterable, Optional, List, Tuple
 
 from utils import resource_path, parse_wbft
+from utils.fuji_makernote import FUJI_MAKERNOTE_TAGS, read_fuji_makernote
 
 
-def _find_exiftool() -> str:
-    """Locate the exiftool executable – check PATH, beside the exe or script."""
+# Environment variable overriding the exiftool location
+EXIFTOOL_ENV = "EXIFTOOL_PATH"
+
+# Explicit path from user settings (takes precedence over everything else)
+_override_path = ""
+
+# Cached lookup result: (path, source) or (None, error message)
+_lookup: Optional[Tuple[Optional[str], str]] = None
+
+
+def _locate_exiftool() -> Tuple[str, str]:
+    """Search for exiftool – setting, env var, PATH, beside the exe or script."""
+    for source, configured in (("setting", _override_path),
+                               ("environment", os.environ.get(EXIFTOOL_ENV, ""))):
+        if configured:
+            if os.path.isfile(configured):
+                return configured, source
+            raise FileNotFoundError(
+                f"ExifTool not found!\nConfigured path ({source}) does not exist: {configured}"
+            )
+
     path = shutil.which('exiftool')
     if path:
-        return path
+        return path, "PATH"
 
     if hasattr(sys, '_MEIPASS'):
         base = os.path.dirname(sys.executable)
@@ -28,7 +53,7 @@ def _find_exiftool() -> str:
         os.path.join(base, 'bin', 'exiftool.exe'),
     ]:
         if os.path.exists(candidate):
-            return candidate
+            return candidate, "bundled"
 
     raise FileNotFoundError(
         f"ExifTool not found!\nSearched in: {base}\n"
@@ -36,6 +61,20 @@ def _find_exiftool() -> str:
     )
 
 
+def _find_exiftool() -> str:
+    """Return the exiftool path; the lookup (or its failure) is done once per process."""
+    global _lookup
+    if _lookup is None:
+        try:
+            _lookup = _locate_exiftool()
+        except FileNotFoundError as e:
+            _lookup = (None, str(e))
+    path, detail = _lookup
+    if path is None:
+        raise FileNotFoundError(detail)
+    return path
+
+
 def _parse_lines(lines: List[str], filter_keys: Optional[List[str]] = None) -> Dict[str, str]:
     """Parse lines from exiftool output into a dictionary; convert WBFT ÷20."""
     exif_data = {}
@@ -53,27 +92,291 @@ def _parse_lines(lines: List[str], filter_keys: Optional[List[str]] = None) -> D
     return exif_data
 
 
-class ExifManager:
+# Recipe fields that are not EXIF tags and never need to be requested
+NON_EXIF_KEYS = {"Name", "Sensor", "Favourite", "Description", "URL"}
+
+# Files per exiftool call in batch mode (keeps one-shot command lines short)
+BATCH_SIZE = 200
+
+
+def _json_value(value: object) -> str:
+    """Convert a -json value to the string form exiftool prints with -s."""
+    if isinstance(value, list):
+        return ", ".join(_json_value(v) for v in value)
+    return str(value)
+
+
+def _parse_json(output: str, filter_keys: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, str]]:
+    """Parse exiftool -json output into {SourceFile: {tag: value}}; convert WBFT ÷20."""
+    try:
+        records = json.loads(output) if output.strip() else []
+    except json.JSONDecodeError:
+        return {}
+    keys = set(filter_keys) if filter_keys else None
+    result: Dict[str, Dict[str, str]] = {}
+    for record in records:
+        source = record.pop("SourceFile", None)
+        if source is None:
+            continue
+        exif_data = {}
+        for key, value in record.items():
+            if keys is not None and key not in keys:
+                continue
+            value = _json_value(value)
+            if key == 'WhiteBalanceFineTune':
+                value = parse_wbft(value)
+            exif_data[key] = value
+        result[source] = exif_data
+    return result
+
+
+def _path_key(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path))
+
+
+class ExifToolError(RuntimeError):
+    """Raised when the persistent exiftool process fails or times out."""
+
+
+class ExifToolSession:
+    """
+    Long-lived exiftool process running in -stay_open mode.
+    Each request is written to stdin as an argument file and terminated with
+    -execute{N}; the reply is everything on stdout up to the matching {readyN}.
+    """
+    def __init__(self, executable: str, timeout: float = 30.0):
+        self.executable = executable
+        self.timeout = timeout
+        self._proc: Optional["subprocess.Popen[bytes]"] = None
+        self._stdout: Optional["queue.Queue[Optional[bytes]]"] = None
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    @property
+    def running(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> None:
+        """Launch the exiftool process (no-op when it is already running)."""
+        if self.running:
+            return
+        self._kill()
+        creationflags = 0
+        if sys.platform == 'win32':
+            creationflags = subprocess.CREATE_NO_WINDOW
+        self._proc = subprocess.Popen(
+            [self.executable, '-stay_open', 'True', '-@', '-',
+             '-common_args', '-charset', 'filename=utf8'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, creationflags=creationflags
+        )
+        # Reader thread – pipes cannot be polled with a timeout on Windows
+        self._stdout = queue.Queue()
+        threading.Thread(
+            target=self._pump, args=(self._proc.stdout, self._stdout), daemon=True
+        ).start()
+
     @staticmethod
-    def get_exif_data(filename: str, relevant_keys: Optional[List[str]]) -> Dict[str, str]:
-        """Load EXIF data relevant for comparison with recipes."""
+    def _pump(stream: io.BufferedReader, sink: "queue.Queue[Optional[bytes]]") -> None:
+        while True:
+            chunk = stream.read1(65536)
+            if not chunk:
+                sink.put(None)
+                return
+            sink.put(chunk)
+
+    def execute(self, *args: str) -> str:
+        """Run one exiftool command and return its stdout; restarts a dead process once."""
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    self.start()
+                    return self._execute(args)
+                except (OSError, ExifToolError):
+                    self._kill()
+                    if attempt == 2:
+                        raise
+        raise ExifToolError("unreachable")  # pragma: no cover
+
+    def _execute(self, args: Tuple[str, ...]) -> str:
+        proc, stdout = self._proc, self._stdout
+        if proc is None or proc.stdin is None or stdout is None:
+            raise ExifToolError("exiftool is not running")
+        self._counter += 1
+        marker = f"{{ready{self._counter}}}".encode()
+        request = "\n".join(list(args) + [f"-execute{self._counter}", ""])
+        proc.stdin.write(request.encode('utf-8'))
+        proc.stdin.flush()
+
+        buf = bytearray()
+        while True:
+            try:
+                chunk = stdout.get(timeout=self.timeout)
+            except queue.Empty:
+                raise ExifToolError(f"exiftool did not respond within {self.timeout} s")
+            if chunk is None:
+                raise ExifToolError("exiftool terminated unexpectedly")
+            buf += chunk
+            pos = buf.rfind(marker)
+            if pos != -1 and buf[pos + len(marker):].strip() == b"":
+                return buf[:pos].decode('utf-8', errors='replace')
+
+    def close(self) -> None:
+        """Ask exiftool to exit gracefully, kill it if it does not."""
+        with self._lock:
+            proc = self._proc
+            if self.running and proc is not None and proc.stdin is not None:
+                try:
+                    proc.stdin.write(b"-stay_open\nFalse\n")
+                    proc.stdin.flush()
+                    proc.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+            self._kill()
+
+    def _kill(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        for stream in (proc.stdin, proc.stdout):
+            if stream is None:
+                continue
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class ExifManager:
+    _session: Optional[ExifToolSession] = None
+    _want_session = False       # start_session() was called; retried when the path changes
+    _atexit_registered = False
+
+    @classmethod
+    def start_session(cls) -> bool:
+        """Switch to a persistent exiftool process; returns False if exiftool is missing."""
+        cls._want_session = True
+        if cls._session is not None:
+            return True
+        try:
+            cls._session = ExifToolSession(_find_exiftool())
+        except FileNotFoundError:
+            return False
+        if not cls._atexit_registered:
+            atexit.register(cls.stop_session)
+            cls._atexit_registered = True
+        return True
+
+    @classmethod
+    def stop_session(cls) -> None:
+        """Shut down the persistent exiftool process, if any, and stay in one-shot mode."""
+        cls._want_session = False
+        cls._close_session()
+
+    @classmethod
+    def _close_session(cls) -> None:
+        session, cls._session = cls._session, None
+        if session is not None:
+            session.close()
+
+    @classmethod
+    def set_exiftool_path(cls, path: str) -> None:
+        """Override the exiftool location ("" = auto-detect) and drop the cached lookup."""
+        global _override_path, _lookup
+        if (path or "") == _override_path and _lookup is not None:
+            return
+        _override_path = path or ""
+        _lookup = None
+        if cls._want_session:   # also when exiftool was missing at startup
+            cls._close_session()
+            cls.start_session()
+
+    @classmethod
+    def exiftool_info(cls) -> Dict[str, str]:
+        """Diagnostic summary of the exiftool binary in use."""
+        try:
+            path = _find_exiftool()
+        except FileNotFoundError as e:
+            return {"Error": str(e)}
+        info = {
+            "Path":    path,
+            "Source":  _lookup[1] if _lookup else "",
+            "Mode":    "persistent" if cls._session is not None else "one-shot",
+        }
+        try:
+            info["Version"] = cls._run(['-ver']).strip() or "unknown"
+        except OSError as e:
+            info["Version"] = f"failed to run: {e}"
+        return info
+
+    @classmethod
+    def _run(cls, args: List[str]) -> str:
+        """Run exiftool with args – via the session when active, otherwise one-shot."""
+        if cls._session is not None:
+            try:
+                return cls._session.execute(*args)
+            except (OSError, ExifToolError) as e:
+                print(f"ExifTool session failed, falling back to one-shot mode: {e}")
         exiftool_path = _find_exiftool()
         result = subprocess.run(
-            [exiftool_path, '-s', filename],
+            [exiftool_path, *args],
             capture_output=True, text=True
         )
-        return _parse_lines(result.stdout.splitlines(), filter_keys=relevant_keys)
+        return result.stdout
 
-    @staticmethod
-    def get_exif(filename: str, exif_type: str = 'short') -> Dict[str, str]:
-        """Read either a short or full EXIF dump."""
-        exiftool_path = _find_exiftool()
+    @classmethod
+    def get_exif_data(cls, filename: str, relevant_keys: Optional[List[str]]) -> Dict[str, str]:
+        """Load EXIF data relevant for comparison with recipes."""
+        if relevant_keys and set(relevant_keys) - NON_EXIF_KEYS <= FUJI_MAKERNOTE_TAGS:
+            exif_data = read_fuji_makernote(filename, relevant_keys)
+            if exif_data is not None:
+                return exif_data
+        output = cls._run(['-s', filename])
+        return _parse_lines(output.splitlines(), filter_keys=relevant_keys)
+
+    @classmethod
+    def get_exif_batch(cls, filenames: List[str], keys: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, str]]:
+        """
+        Read EXIF for many files with as few exiftool calls as possible (-json).
+        Only the tags named in keys are requested; returns {filename: exif_data},
+        with an empty dict for files exiftool could not read. When all tags live
+        in the Fujifilm MakerNote, files are decoded in-process and only the
+        ones the native reader cannot handle are passed to exiftool.
+        """
+        tags = sorted(set(keys) - NON_EXIF_KEYS) if keys else []
+        tag_args = [f'-{tag}' for tag in tags]
+        result: Dict[str, Dict[str, str]] = {f: {} for f in filenames}
 
+        pending = filenames
+        if tags and set(tags) <= FUJI_MAKERNOTE_TAGS:
+            pending = []
+            for filename in filenames:
+                exif_data = read_fuji_makernote(filename, tags)
+                if exif_data is None:
+                    pending.append(filename)
+                else:
+                    result[filename] = exif_data
+
+        by_path = {_path_key(f): f for f in pending}
+        for start in range(0, len(pending), BATCH_SIZE):
+            chunk = pending[start:start + BATCH_SIZE]
+            output = cls._run(['-json', *tag_args, *chunk])
+            for source, exif_data in _parse_json(output, tags or None).items():
+                original = by_path.get(_path_key(source))
+                if original is not None:
+                    result[original] = exif_data
+        return result
+
+    @classmethod
+    def get_exif(cls, filename: str, exif_type: str = 'short') -> Dict[str, str]:
+        """Read either a short or full EXIF dump."""
         if exif_type == 'full':
-            cmd = [exiftool_path, '-s', filename]
+            cmd = ['-s', filename]
         else:
             cmd = [
-                exiftool_path,
                 '-Model', '-PictureControlName', '-Description',
                 '-FilmMode', '-GrainEffectRoughness',
                 '-GrainEffectSize', '-ColorChromeEffect', '-ColorChromeFXBlue',
@@ -84,5 +387,4 @@ class ExifManager:
                 filename
             ]
 
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return _parse_lines(result.stdout.splitlines())
\ No newline at end of file
+        return _parse_lines(cls._run(cmd).splitlines())
@@ -0,0 +1,107 @@
+# ──────────────────────────────────────────────
+# HISTOGRAM CACHE
+# ──────────────────────────────────────────────
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+# Bump when the bucket computation changes so stale disk entries are ignored
+CACHE_VERSION = 1
+
+Buckets = Tuple[List[List[int]], Tuple[float, float]]   # per-channel counts, (shadows, highlights)
+Key = Tuple[str, float, int, str, str]                  # (abspath, mtime, size, source, "RGB" / "L")
+
+
+class HistogramCache:
+    """
+    LRU cache of histogram buckets and clipping ratios.
+    Entries depend only on the pixels and the mode (RGB / luma), so theme and
+    style changes reuse them. The key is the file identity – path, mtime and
+    size – plus the source the pixels were decoded from (e.g. a RAW file's
+    embedded preview rather than a demosaic) and the mode. An optional disk
+    directory keeps entries across sessions.
+    """
+    MAX_ENTRIES = 1024
+
+    _entries: "OrderedDict[Key, Buckets]" = OrderedDict()
+    _lock = threading.Lock()
+    _disk_dir: Optional[str] = None
+
+    @staticmethod
+    def key(path: str, mtime: float, size: int, rgb: bool, source: str = "") -> Key:
+        return (os.path.abspath(path), mtime, size, source, "RGB" if rgb else "L")
+
+    @classmethod
+    def set_disk_dir(cls, directory: Optional[str]) -> None:
+        """Enable the disk layer in directory, or disable it with None."""
+        cls._disk_dir = directory or None
+
+    @classmethod
+    def get(cls, key: Key) -> Optional[Buckets]:
+        with cls._lock:
+            if key in cls._entries:
+                cls._entries.move_to_end(key)
+                return cls._entries[key]
+        value = cls._read_disk(key)
+        if value is not None:
+            cls._remember(key, value)
+        return value
+
+    @classmethod
+    def put(cls, key: Key, buckets: List[List[int]], clipping: Tuple[float, float]) -> None:
+        shadows, highlights = clipping
+        value: Buckets = (buckets, (shadows, highlights))
+        cls._remember(key, value)
+        cls._write_disk(key, value)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._entries.clear()
+
+    # ── internals ──────────────────────────────────────────────────────────
+
+    @classmethod
+    def _remember(cls, key: Key, value: Buckets) -> None:
+        with cls._lock:
+            cls._entries[key] = value
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > cls.MAX_ENTRIES:
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def _disk_path(cls, key: Key) -> Optional[str]:
+        if not cls._disk_dir:
+            return None
+        digest = hashlib.sha1(repr((CACHE_VERSION,) + key).encode("utf-8")).hexdigest()
+        return os.path.join(cls._disk_dir, f"{digest}.json")
+
+    @classmethod
+    def _read_disk(cls, key: Key) -> Optional[Buckets]:
+        path = cls._disk_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            shadows, highlights = data["clipping"]
+            return data["buckets"], (float(shadows), float(highlights))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    @classmethod
+    def _write_disk(cls, key: Key, value: Buckets) -> None:
+        path = cls._disk_path(key)
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"buckets": value[0], "clipping": list(value[1])}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Error writing histogram cache: {e}")
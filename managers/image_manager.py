@@ -0,0 +1,265 @@
+# ──────────────────────────────────────────────
+# IMAGE MANAGER
+# ──────────────────────────────────────────────
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from PIL import ExifTags, Image
+
+from utils.fuji_makernote import read_raf_preview, read_raf_raw_size
+
+RAW_EXTENSIONS = ('.raf', '.nef', '.cr2', '.arw', '.dng')
+
+# EXIF orientation -> transpose that brings the image upright
+_ORIENTATION = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+# LibRaw "flip" value -> transpose, for previews without an EXIF orientation
+_RAW_FLIP = {
+    3: Image.Transpose.ROTATE_180,
+    5: Image.Transpose.ROTATE_90,
+    6: Image.Transpose.ROTATE_270,
+}
+
+Box = Optional[Tuple[int, int]]
+Size = Tuple[int, int]
+Identity = Tuple[str, float, int, bool]       # (abspath, mtime, size, demosaiced)
+CacheKey = Tuple[str, float, int, bool, Box]  # identity + box
+Entry = Tuple[Image.Image, Size]
+Preview = Tuple[Image.Image, Optional[Image.Transpose]]
+
+
+def _open_raw(filename: str) -> Image.Image:
+    try:
+        import rawpy  # type: ignore[import-not-found]
+        with rawpy.imread(filename) as raw:
+            rgb = raw.postprocess(use_camera_wb=True, no_auto_bright=False, output_bps=8)
+        return Image.fromarray(rgb)
+    except ImportError:
+        raise RuntimeError(
+            "rawpy is required to open RAW files.\n"
+            "Install it with: pip install rawpy"
+        )
+    except Exception as e:
+        raise RuntimeError(f"Failed to open RAW file: {e}")
+
+
+def _open_raw_preview(filename: str) -> Optional[Preview]:
+    """
+    Embedded preview of a RAW file as (image, fallback transpose), or None.
+    RAF previews are read directly; other formats need rawpy.extract_thumb().
+    """
+    if filename.lower().endswith('.raf'):
+        jpeg = read_raf_preview(filename)
+        if jpeg:
+            return Image.open(io.BytesIO(jpeg)), None
+    try:
+        import rawpy
+        with rawpy.imread(filename) as raw:
+            thumb = raw.extract_thumb()
+            flip = raw.sizes.flip
+    except Exception:
+        return None
+    img: Image.Image
+    if thumb.format == rawpy.ThumbFormat.JPEG:
+        img = Image.open(io.BytesIO(thumb.data))
+    else:
+        img = Image.fromarray(thumb.data)
+    return img, _RAW_FLIP.get(flip)
+
+
+def _nbytes(img: Image.Image) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+def apply_orientation(img: Image.Image) -> Image.Image:
+    """Rotate/flip according to the EXIF Orientation tag (all 8 values)."""
+    method = _ORIENTATION.get(_orientation(img))
+    return img.transpose(method) if method is not None else img
+
+
+def _orientation(img: Image.Image) -> int:
+    try:
+        return int(img.getexif().get(ExifTags.Base.Orientation, 1))
+    except Exception:
+        return 1
+
+
+class ImageManager:
+    """
+    Shared image loading for cards, the detail view and the exporter.
+    Images are decoded at the size the caller needs (JPEG draft mode),
+    oriented, converted to RGB and kept in an LRU cache bounded by decoded
+    bytes. A request for a smaller size is served from a larger cached image
+    of the same file without decoding again.
+
+    RAW files use their embedded JPEG preview unless demosaicing is asked for
+    explicitly or previews are disabled with set_raw_previews(False).
+
+    Returned images are shared – callers must copy before modifying them.
+    """
+    CACHE_BYTES = 512 * 1024 * 1024
+
+    _cache: "OrderedDict[CacheKey, Entry]" = OrderedDict()
+    _cache_bytes = 0
+    _lock = threading.Lock()
+    _raw_previews = True
+
+    @classmethod
+    def set_raw_previews(cls, enabled: bool) -> None:
+        """Use embedded previews for RAW files (default) or always demosaic."""
+        cls._raw_previews = bool(enabled)
+
+    @classmethod
+    def raw_previews(cls) -> bool:
+        return cls._raw_previews
+
+    @classmethod
+    def uses_raw_preview(cls, filename: str) -> bool:
+        """True if load() would show filename from its embedded RAW preview by default."""
+        return cls._raw_previews and os.path.splitext(filename)[1].lower() in RAW_EXTENSIONS
+
+    @staticmethod
+    def raw_size(filename: str) -> Optional[Size]:
+        """
+        (width, height) of the sensor data of a RAW file as stored, before any
+        rotation, or None if it cannot be read. load() reports the preview's
+        size for RAW files shown from their embedded preview; this is the
+        resolution the file actually has.
+        """
+        if filename.lower().endswith('.raf'):
+            size = read_raf_raw_size(filename)
+            if size is not None:
+                return size
+        try:
+            import rawpy
+            with rawpy.imread(filename) as raw:
+                return int(raw.sizes.width), int(raw.sizes.height)
+        except Exception:
+            return None
+
+    @classmethod
+    def load(cls, filename: str, box: Box = None,
+             demosaic: Optional[bool] = None) -> Tuple[Image.Image, Size]:
+        """
+        Return (image, original size). With box=(w, h) the image fits inside
+        the box; without it the image is full resolution. The original size is
+        the upright size of the decoded source at full resolution (the
+        embedded preview for RAW files that are not demosaiced).
+        demosaic=True forces a full rawpy decode of RAW files; None follows
+        the set_raw_previews() setting.
+        """
+        if demosaic is None:
+            demosaic = not cls._raw_previews
+        is_raw = os.path.splitext(filename)[1].lower() in RAW_EXTENSIONS
+        ident = cls._identity(filename, is_raw and demosaic)
+        key = ident + (box,)
+        with cls._lock:
+            hit = cls._cache.get(key)
+            if hit is not None:
+                cls._cache.move_to_end(key)
+                return hit
+            source = cls._covering(ident, box)
+
+        if source is not None and box is None:        # a sized entry that is already full resolution
+            return source
+        if source is not None and box is not None:
+            img, size = source
+            img = img.copy()
+            img.thumbnail(box, Image.Resampling.LANCZOS)
+        else:
+            img, size = cls._decode(filename, box, demosaic)
+        cls._store(key, (img, size))
+        return img, size
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._lock:
+            cls._cache.clear()
+            cls._cache_bytes = 0
+
+    # ── decoding ───────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _decode(filename: str, box: Box, demosaic: bool) -> Entry:
+        img, raw_flip = None, None
+        ext = os.path.splitext(filename)[1].lower()
+        if ext in RAW_EXTENSIONS and not demosaic:
+            preview = _open_raw_preview(filename)
+            if preview is not None:
+                img, raw_flip = preview
+        if img is None:
+            img = _open_raw(filename) if ext in RAW_EXTENSIONS else Image.open(filename)
+
+        width, height = img.size
+        if box and img.format == "JPEG":
+            # DCT scaling to no less than the box on the long side, whatever the orientation
+            side = max(box)
+            img.draft("RGB", (side, side))
+        img.load()
+        decoded = img.size
+        if raw_flip is not None and _orientation(img) == 1:
+            img = img.transpose(raw_flip)
+        else:
+            img = apply_orientation(img)   # no-op for rawpy output, which has no EXIF
+        if img.size != decoded:            # rotated by 90°
+            width, height = height, width
+        img = img.convert("RGB")
+        if box:
+            img.thumbnail(box, Image.Resampling.LANCZOS)
+        return img, (width, height)
+
+    # ── cache ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _identity(filename: str, demosaic: bool) -> Identity:
+        stat = os.stat(filename)
+        return (os.path.abspath(filename), stat.st_mtime, stat.st_size, demosaic)
+
+    @classmethod
+    def _covering(cls, ident: Identity, box: Box) -> Optional[Entry]:
+        """
+        Smallest cached image of the same file that can be reduced to box
+        without upscaling; for box=None, one that was decoded at full resolution.
+        """
+        best_key, best_area = None, None
+        for key, (img, size) in cls._cache.items():
+            if key[:4] != ident:
+                continue
+            if box is None:
+                covers = img.size == size
+            else:
+                covers = (key[4] is None or img.size == size
+                          or min(box[0] / img.width, box[1] / img.height) <= 1.0)
+            area = img.width * img.height
+            if covers and (best_area is None or area < best_area):
+                best_key, best_area = key, area
+        if best_key is None:
+            return None
+        cls._cache.move_to_end(best_key)
+        return cls._cache[best_key]
+
+    @classmethod
+    def _store(cls, key: CacheKey, value: Entry) -> None:
+        nbytes = _nbytes(value[0])
+        if nbytes > cls.CACHE_BYTES:
+            return
+        with cls._lock:
+            old = cls._cache.pop(key, None)
+            if old is not None:
+                cls._cache_bytes -= _nbytes(old[0])
+            cls._cache[key] = value
+            cls._cache_bytes += nbytes
+            while cls._cache_bytes > cls.CACHE_BYTES:
+                _k, (evicted, _s) = cls._cache.popitem(last=False)
+                cls._cache_bytes -= _nbytes(evicted)
@@ -0,0 +1,97 @@
+# ──────────────────────────────────────────────
+# RECIPE INDEX
+# ──────────────────────────────────────────────
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from constants import Constants
+
+Fields = Tuple[str, ...]
+Values = Tuple[str, ...]
+
+
+class RecipeIndex:
+    """
+    Hash index for exact recipe matching.
+    Recipes are grouped by the set of fields they compare (their signature) and
+    keyed by the tuple of those field values, so a lookup costs one dict probe
+    per signature instead of a scan over every recipe. When several recipes
+    match, the one loaded first wins – the same result as a linear scan.
+    """
+    def __init__(self, simulations: Optional[Dict[str, Dict[str, str]]] = None,
+                 skip: Iterable[str] = Constants.MATCH_SKIP_FIELDS):
+        self._skip = frozenset(skip)
+        self._groups: Dict[Fields, Dict[Values, List[Tuple[int, str]]]] = {}
+        self._entries: Dict[str, Tuple[Fields, Values, int]] = {}
+        self._data: Dict[str, Dict[str, str]] = {}
+        self._next_order = 0
+        if simulations:
+            self.sync(simulations)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _key(self, sim_data: Dict[str, str]) -> Tuple[Fields, Values]:
+        fields = tuple(sorted(k for k in sim_data if k not in self._skip))
+        return fields, tuple(sim_data[k] for k in fields)
+
+    def add(self, name: str, sim_data: Dict[str, str], order: Optional[int] = None) -> None:
+        """Insert or replace a recipe."""
+        if name in self._entries:
+            order = self._entries[name][2] if order is None else order
+            self.remove(name)
+        if order is None:
+            order = self._next_order
+        self._next_order = max(self._next_order, order + 1)
+        fields, values = self._key(sim_data)
+        bucket = self._groups.setdefault(fields, {}).setdefault(values, [])
+        bucket.append((order, name))
+        bucket.sort()
+        self._entries[name] = (fields, values, order)
+        self._data[name] = dict(sim_data)
+
+    def remove(self, name: str) -> None:
+        """Remove a recipe (no-op for unknown names)."""
+        entry = self._entries.pop(name, None)
+        self._data.pop(name, None)
+        if entry is None:
+            return
+        fields, values, order = entry
+        group = self._groups[fields]
+        group[values].remove((order, name))
+        if not group[values]:
+            del group[values]
+        if not group:
+            del self._groups[fields]
+
+    def sync(self, simulations: Dict[str, Dict[str, str]]) -> None:
+        """Bring the index in line with simulations, touching only changed recipes."""
+        for name in [n for n in self._entries if n not in simulations]:
+            self.remove(name)
+        for name, sim_data in simulations.items():
+            if self._data.get(name) != sim_data:
+                self.add(name, sim_data)
+
+    def snapshot(self) -> "RecipeIndex":
+        """Independent copy for a worker thread; later add/remove/sync do not affect it."""
+        copy = RecipeIndex(skip=self._skip)
+        copy._groups = {
+            fields: {values: list(bucket) for values, bucket in group.items()}
+            for fields, group in self._groups.items()
+        }
+        copy._entries = dict(self._entries)
+        copy._data = dict(self._data)    # field dicts are replaced on add, never modified
+        copy._next_order = self._next_order
+        return copy
+
+    def lookup(self, exif_data: Dict[str, str]) -> Optional[str]:
+        """Return the name of the first recipe whose compared fields all equal exif_data."""
+        best: Optional[Tuple[int, str]] = None
+        for fields, group in self._groups.items():
+            try:
+                values = tuple(exif_data[k] for k in fields)
+            except KeyError:   # a recipe field the photo lacks never matches
+                continue
+            hits = group.get(values)
+            if hits and (best is None or hits[0] < best):
+                best = hits[0]
+        return best[1] if best else None
@@ -0,0 +1,161 @@
+# ──────────────────────────────────────────────
+# RECIPE RANKER
+# ──────────────────────────────────────────────
+import copy
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from constants import Constants
+
+# Relative importance of a one-step difference per field
+FIELD_WEIGHTS = {
+    "WhiteBalance":         3.0,
+    "Saturation":           1.5,
+    "HighlightTone":        1.0,
+    "ShadowTone":           1.0,
+    "ColorChromeEffect":    1.0,
+    "ColorChromeFXBlue":    1.0,
+    "GrainEffectRoughness": 1.0,
+    "GrainEffectSize":      0.5,
+    "NoiseReduction":       0.5,
+    "WhiteBalanceFineTune": 1.0,   # per Red/Blue step
+    "ColorTemperature":     1.0,   # per KELVIN_STEP
+}
+DEFAULT_WEIGHT = 1.0
+
+# Distance (in steps) for values that cannot be compared numerically
+MISMATCH_STEPS = 2.0
+KELVIN_STEP = 500.0
+
+# Fields whose option lists are ordinal scales without numbers (Off < Weak < Strong)
+_OPTIONS = {f.name: f.options for f in Constants.RECIPE_FIELDS}
+ORDINAL_FIELDS = ("GrainEffectRoughness", "GrainEffectSize", "ColorChromeEffect", "ColorChromeFXBlue")
+
+_NUMBER = re.compile(r"\s*([+-]?\d+(?:\.\d+)?)")
+_WBFT = re.compile(r"(Red|Blue)\s*([+-]?\d+)")
+
+
+class RecipeMatch(NamedTuple):
+    name: str
+    distance: float
+    diff: Dict[str, Tuple[str, Optional[str]]]   # field -> (recipe value, photo value)
+
+
+def _ordinal(field: str, value: Optional[str]) -> float:
+    """Numeric position of a value on its field's scale, NaN if it has none."""
+    if value is None:
+        return np.nan
+    if field in ORDINAL_FIELDS and value in _OPTIONS[field]:
+        return float(_OPTIONS[field].index(value))
+    m = _NUMBER.match(value)
+    return float(m.group(1)) if m else np.nan
+
+
+def _columns(field: str, value: Optional[str]) -> List[float]:
+    """Numeric encoding of one field; WhiteBalanceFineTune spans two columns."""
+    if field == "WhiteBalanceFineTune":
+        parts = dict(_WBFT.findall(value or ""))
+        if "Red" not in parts or "Blue" not in parts:
+            return [np.nan, np.nan]
+        return [float(parts["Red"]), float(parts["Blue"])]
+    if field == "ColorTemperature":
+        v = _ordinal(field, value)
+        return [v / KELVIN_STEP]
+    return [_ordinal(field, value)]
+
+
+class RecipeRanker:
+    """
+    Scores every recipe against a photo's EXIF by weighted per-field distance.
+    Recipes are encoded once into NumPy matrices (numeric values and string
+    codes), so ranking is a handful of vectorised operations per photo.
+    """
+    def __init__(self, simulations: Dict[str, Dict[str, str]],
+                 skip: Iterable[str] = Constants.MATCH_SKIP_FIELDS):
+        self._skip = frozenset(skip)
+        self.rebuild(simulations)
+
+    def snapshot(self) -> "RecipeRanker":
+        """
+        Copy for a worker thread. rebuild() assigns new tables instead of
+        modifying the old ones, so a shallow copy is unaffected by it.
+        """
+        return copy.copy(self)
+
+    def rebuild(self, simulations: Dict[str, Dict[str, str]]) -> None:
+        """Re-encode the recipe table (cheap – one pass over the recipes)."""
+        self._names = list(simulations)
+        self._recipes = [simulations[n] for n in self._names]
+        fields = sorted({k for d in self._recipes for k in d if k not in self._skip})
+        self._fields = fields
+
+        # Column layout: field -> slice into the numeric matrix
+        self._slices: Dict[str, slice] = {}
+        width = 0
+        for field in fields:
+            n = 2 if field == "WhiteBalanceFineTune" else 1
+            self._slices[field] = slice(width, width + n)
+            width += n
+        self._starts = np.array([self._slices[f].start for f in fields], dtype=np.int64)
+
+        # Per-field string codes: -1 = recipe does not use the field
+        self._vocab: List[Dict[str, int]] = [{} for _ in fields]
+        codes = np.full((len(self._names), len(fields)), -1, dtype=np.int64)
+        values = np.full((len(self._names), width), np.nan)
+        for r, data in enumerate(self._recipes):
+            for i, field in enumerate(fields):
+                if field not in data:
+                    continue
+                codes[r, i] = self._vocab[i].setdefault(data[field], len(self._vocab[i]))
+                values[r, self._slices[field]] = _columns(field, data[field])
+        self._codes = codes
+        self._values = values
+        self._weights = np.array([FIELD_WEIGHTS.get(f, DEFAULT_WEIGHT) for f in fields])
+
+    def _encode(self, exif_data: Dict[str, str]) -> Tuple[np.ndarray, np.ndarray]:
+        codes = np.array([
+            self._vocab[i].get(exif_data[f], -2) if f in exif_data else -3
+            for i, f in enumerate(self._fields)
+        ], dtype=np.int64)
+        values = np.full(self._values.shape[1], np.nan)
+        for field in self._fields:
+            values[self._slices[field]] = _columns(field, exif_data.get(field))
+        return codes, values
+
+    def distances(self, exif_data: Dict[str, str]) -> np.ndarray:
+        """Weighted distance of every recipe to exif_data (0 = exact match)."""
+        if not self._fields:
+            return np.zeros(len(self._names))
+        codes, values = self._encode(exif_data)
+
+        # Numeric distance per column, summed per field (Red + Blue for WBFT)
+        col_diff = np.abs(self._values - values)
+        numeric = np.add.reduceat(np.nan_to_num(col_diff, nan=0.0), self._starts, axis=1)
+        comparable = np.logical_and.reduceat(~np.isnan(col_diff), self._starts, axis=1)
+
+        per_field = np.where(comparable, numeric, MISMATCH_STEPS)
+        per_field = np.where(self._codes == codes, 0.0, per_field)   # identical strings
+        per_field = np.where(self._codes == -1, 0.0, per_field)      # field not in recipe
+        distances: np.ndarray = per_field @ self._weights
+        return distances
+
+    def rank(self, exif_data: Dict[str, str], k: int = 3) -> List[RecipeMatch]:
+        """Return the k closest recipes with the fields in which each one differs."""
+        dist = self.distances(exif_data)
+        if dist.size == 0:
+            return []
+        k = min(k, dist.size)
+        top = np.argpartition(dist, k - 1)[:k]
+        top = top[np.lexsort((top, dist[top]))]
+        matches = []
+        for r in top:
+            recipe = self._recipes[r]
+            diff = {
+                f: (recipe[f], exif_data.get(f))
+                for f in self._fields
+                if f in recipe and exif_data.get(f) != recipe[f]
+            }
+            matches.append(RecipeMatch(self._names[r], float(dist[r]), diff))
+        return matches
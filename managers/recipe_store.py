@@ -0,0 +1,348 @@
+# ──────────────────────────────────────────────
+# RECIPE STORE
+# ──────────────────────────────────────────────
+import hashlib
+import io
+import marshal
+import os
+import threading
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+
+INDENT = "  "
+
+FileStat = Tuple[int, int, int]    # (mtime_ns, size, inode)
+# magic, format version, marshal version, XML stat, XML digest, profile fields in file order
+Snapshot = Tuple[bytes, int, int, FileStat, bytes, List[Dict[str, str]]]
+
+SNAPSHOT_MAGIC = b"FRF-RECIPES"
+SNAPSHOT_VERSION = 1
+
+
+class RecipeStore:
+    """
+    One recipe XML file, parsed once and kept in memory.
+    Mutations change the in-memory tree directly (the profile is found through
+    a name index) and only the touched profile is re-indented, so section
+    comments between profiles survive. Writes go to a temporary file that
+    replaces the original, so a crash never leaves a half-written database.
+    With flush_delay > 0 writes are debounced: a burst of edits is saved once,
+    flush_delay seconds after the last one; call flush() before exiting.
+    The file is re-read only if something else changed it on disk.
+    With create=True a missing file starts as an empty library.
+    With snapshot=True the parsed recipes are also kept in <path>.cache; while
+    the XML is unchanged (same mtime/size, or same content hash) they are
+    read from there and the XML itself is only parsed on the first edit.
+    """
+
+    def __init__(self, path: str, flush_delay: float = 0.0, create: bool = False,
+                 snapshot: bool = False):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.snapshot_path = f"{path}.cache" if snapshot else None
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self._snapshot: Optional[Dict[str, Dict[str, str]]] = None
+        self._stat: Optional[FileStat] = None
+        if create and not os.path.exists(path):
+            self._set_root(ET.Element('profiles'))
+            self._root.text = "\n"
+            self._index_all()
+            self._changed()
+        else:
+            self._load()
+
+    # ── reading ────────────────────────────────────────────────────────────
+
+    def recipes(self) -> Dict[str, Dict[str, str]]:
+        """
+        name -> fields, in file order; a later profile with the same name wins.
+        The field dicts are shared with the store (replaced, never modified, on
+        update) – copy before changing them.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            if self._snapshot is not None:
+                return dict(self._snapshot)
+            result: Dict[str, Dict[str, str]] = {}
+            for profile in self._root.findall('profile'):
+                data = self._data.get(profile)
+                if data is not None:
+                    result[data["Name"]] = data
+            return result
+
+    # ── mutations ──────────────────────────────────────────────────────────
+
+    def add(self, recipe_data: Dict[str, str]) -> None:
+        with self._lock:
+            self._reload_if_changed()
+            self._parse_if_needed()
+            self._append(recipe_data)
+            self._changed()
+
+    def update(self, recipe_data: Dict[str, str], original_name: Optional[str] = None) -> bool:
+        """Replace the first profile named original_name (default: recipe_data["Name"])."""
+        with self._lock:
+            self._reload_if_changed()
+            self._parse_if_needed()
+            profile = self._first(original_name or recipe_data["Name"])
+            if profile is None:
+                return False
+            self._replace(profile, recipe_data)
+            self._changed()
+            return True
+
+    def delete(self, recipe_name: str) -> bool:
+        """Remove the first profile named recipe_name."""
+        with self._lock:
+            self._reload_if_changed()
+            self._parse_if_needed()
+            profile = self._first(recipe_name)
+            if profile is None:
+                return False
+            self._unindex(profile)
+            self._detach(profile)
+            self._changed()
+            return True
+
+    def replace_all(self, recipes: Dict[str, Dict[str, str]]) -> None:
+        """
+        Make the file hold exactly recipes (used for import). Profiles that
+        are unchanged keep their place and surrounding comments; new recipes
+        are appended.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            self._parse_if_needed()
+            changed, kept = False, set()
+            for profile in reversed(self._root.findall('profile')):
+                data = self._data.get(profile)
+                if data is None:
+                    continue
+                name = data["Name"]
+                if name not in recipes or name in kept:   # gone, or shadowed by a later duplicate
+                    self._unindex(profile)
+                    self._detach(profile)
+                    changed = True
+                else:
+                    kept.add(name)
+                    if data != recipes[name]:
+                        self._replace(profile, recipes[name])
+                        changed = True
+            for name, recipe_data in recipes.items():
+                if name not in kept:
+                    self._append(recipe_data)
+                    changed = True
+            if changed:
+                self._changed()
+
+    # ── writing ────────────────────────────────────────────────────────────
+
+    def flush(self) -> None:
+        """Write pending changes now (temp file + atomic replace)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            buffer = io.BytesIO()
+            self._tree.write(buffer, encoding='utf-8', xml_declaration=True)
+            raw = buffer.getvalue()
+            tmp = f"{self.path}.tmp"
+            try:
+                with open(tmp, "wb") as f:
+                    f.write(raw)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except OSError:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            self._dirty = False
+            self._stat = self._file_stat()
+            self._write_snapshot(raw)
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    # ── internals ──────────────────────────────────────────────────────────
+
+    def _load(self) -> None:
+        self._stat = self._file_stat()
+        self._snapshot = self._read_snapshot()
+        if self._snapshot is None:
+            self._parse()
+
+    def _parse(self) -> None:
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        self._set_root(ET.fromstring(raw))
+        self._index_all()
+        self._snapshot = None
+        self._write_snapshot(raw)
+
+    def _set_root(self, root: ET.Element) -> None:
+        self._root: ET.Element = root
+        self._tree: ET.ElementTree = ET.ElementTree(root)
+
+    def _parse_if_needed(self) -> None:
+        """Mutations need the tree; a store loaded from the snapshot parses it now."""
+        if self._snapshot is not None:
+            self._parse()
+
+    def _index_all(self) -> None:
+        self._data: Dict[ET.Element, Dict[str, str]] = {}
+        self._by_name: Dict[str, List[ET.Element]] = {}
+        for profile in self._root.findall('profile'):
+            self._index(profile)
+
+    # ── snapshot ───────────────────────────────────────────────────────────
+
+    def _read_snapshot(self) -> Optional[Dict[str, Dict[str, str]]]:
+        """The cached recipes if they still describe the XML, else None."""
+        if self.snapshot_path is None or self._stat is None:
+            return None
+        try:
+            with open(self.snapshot_path, 'rb') as f:   # loads(read()) – load(f) reads in tiny chunks
+                snapshot: Snapshot = marshal.loads(f.read())
+            magic, version, marshal_version, stat, digest, profiles = snapshot
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if (magic, version, marshal_version) != (SNAPSHOT_MAGIC, SNAPSHOT_VERSION, marshal.version):
+            return None
+        if stat != self._stat:
+            # Touched (copied, checked out) but maybe not changed: compare contents
+            if stat[1] != self._stat[1]:
+                return None
+            with open(self.path, 'rb') as f:
+                if self._digest(f.read()) != digest:
+                    return None
+            self._write_snapshot_data(digest, profiles)
+        result: Dict[str, Dict[str, str]] = {}
+        for data in profiles:
+            result[data["Name"]] = data
+        return result
+
+    def _write_snapshot(self, raw: bytes) -> None:
+        if self.snapshot_path is None:
+            return
+        profiles = [self._data[p] for p in self._root.findall('profile') if p in self._data]
+        self._write_snapshot_data(self._digest(raw), profiles)
+
+    def _write_snapshot_data(self, digest: bytes, profiles: List[Dict[str, str]]) -> None:
+        """Best effort – without a snapshot the XML is simply parsed next time."""
+        path = self.snapshot_path
+        if path is None or self._stat is None:
+            return
+        snapshot: Snapshot = (SNAPSHOT_MAGIC, SNAPSHOT_VERSION, marshal.version, self._stat, digest, profiles)
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(marshal.dumps(snapshot))
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @staticmethod
+    def _digest(raw: bytes) -> bytes:
+        return hashlib.blake2b(raw, digest_size=16).digest()
+
+    def _file_stat(self) -> FileStat:
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _reload_if_changed(self) -> None:
+        if not self._dirty and self._file_stat() != self._stat:
+            self._load()
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if self.flush_delay <= 0:
+            self.flush()
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.flush_delay, self._flush_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_in_background(self) -> None:
+        try:
+            self.flush()
+        except OSError as e:
+            print(f"Error saving recipes: {e}")   # stays dirty; the next flush retries
+
+    def _append(self, recipe_data: Dict[str, str]) -> None:
+        last = self._root[-1] if len(self._root) else None
+        profile = ET.SubElement(self._root, 'profile')
+        self._fill(profile, recipe_data)
+        # The new profile goes after any comment text that ends the file
+        if last is not None:
+            last.tail = (last.tail or "").rstrip() + "\n" + INDENT
+        else:
+            self._root.text = (self._root.text or "").rstrip() + "\n" + INDENT
+        profile.tail = "\n"
+        self._index(profile)
+
+    def _replace(self, profile: ET.Element, recipe_data: Dict[str, str]) -> None:
+        self._unindex(profile)
+        tail = profile.tail
+        profile.clear()
+        self._fill(profile, recipe_data)
+        profile.tail = tail
+        self._index(profile)
+
+    @staticmethod
+    def _fill(profile: ET.Element, recipe_data: Dict[str, str]) -> None:
+        for key, value in recipe_data.items():
+            elem = ET.SubElement(profile, key)
+            elem.text = value
+        ET.indent(profile, space=INDENT, level=1)
+
+    def _index(self, profile: ET.Element) -> None:
+        name_el = profile.find('Name')
+        if name_el is None or name_el.text is None:
+            return
+        self._data[profile] = {
+            param.tag: param.text or "" for param in profile.iter() if param.tag != 'profile'
+        }
+        self._by_name.setdefault(name_el.text, []).append(profile)
+
+    def _unindex(self, profile: ET.Element) -> None:
+        data = self._data.pop(profile, None)
+        if data is None:
+            return
+        same_name = self._by_name.get(data["Name"], [])
+        same_name.remove(profile)
+        if not same_name:
+            del self._by_name[data["Name"]]
+
+    def _first(self, name: str) -> Optional[ET.Element]:
+        profiles = self._by_name.get(name)
+        if not profiles:
+            return None
+        if len(profiles) > 1:   # duplicates: the first in file order, as a full scan would find
+            order = {id(p): i for i, p in enumerate(self._root)}
+            return min(profiles, key=lambda p: order[id(p)])
+        return profiles[0]
+
+    def _detach(self, profile: ET.Element) -> None:
+        """Remove profile, keeping any comment text that followed it."""
+        children = list(self._root)
+        idx = children.index(profile)
+        tail = profile.tail or ""
+        is_last = idx == len(children) - 1
+        if tail.strip() or is_last:
+            if idx == 0:
+                kept = self._root.text or ""
+                self._root.text = (kept.rstrip() if kept.strip() else "") + tail
+            else:
+                prev = children[idx - 1]
+                kept = prev.tail or ""
+                prev.tail = (kept.rstrip() if kept.strip() else "") + tail
+        self._root.remove(profile)
@@ -17,6 +17,10 @@ class SettingsManager:
             "rgb_histogram": True,
             "histogram_type": "step",
             "active_sensors": Constants.ALL_SENSORS,
+            "exiftool_path": "",
+            "histogram_disk_cache": False,
+            "raw_previews": True,
+            "recipe_database": "xml",
         }
         if os.path.exists(Constants.SETTINGS_FILE):
             try:
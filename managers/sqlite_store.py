@@ -0,0 +1,148 @@
+# ──────────────────────────────────────────────
+# SQLITE RECIPE STORE
+# ──────────────────────────────────────────────
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from constants import Constants
+
+# Fields stored in their own indexed columns: browser filters and the match keys
+FILTER_FIELDS = ("FilmMode", "Sensor", "Favourite")
+MATCH_FIELDS = tuple(
+    f.name for f in Constants.RECIPE_FIELDS if f.name not in Constants.MATCH_SKIP_FIELDS
+)
+COLUMNS = ("Name",) + FILTER_FIELDS + MATCH_FIELDS
+
+SCHEMA_VERSION = 1
+
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+class SQLiteRecipeStore:
+    """
+    Recipes in an SQLite database, with the same interface as RecipeStore.
+    Each recipe is one row: the complete field dict (in its original order,
+    unknown fields included) as JSON plus indexed copies of the Name, filter
+    and match-key columns. Every change is its own transaction, so writes are
+    atomic and incremental; flush_delay is accepted for interface parity.
+    A missing database is an error unless create=True.
+    """
+
+    def __init__(self, path: str, flush_delay: float = 0.0, create: bool = False):
+        if not create and not os.path.exists(path):
+            raise FileNotFoundError(f"No such recipe database: {path}")
+        self.path = path
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._create_schema()
+
+    # ── reading ────────────────────────────────────────────────────────────
+
+    def recipes(self) -> Dict[str, Dict[str, str]]:
+        """name -> fields, in insertion order; a later recipe with the same name wins."""
+        with self._lock:
+            rows = self._db.execute("SELECT data FROM recipes ORDER BY id").fetchall()
+        result: Dict[str, Dict[str, str]] = {}
+        for (data,) in rows:
+            recipe = json.loads(data)
+            result[recipe["Name"]] = recipe
+        return result
+
+    def find(self, **criteria: str) -> List[str]:
+        """Names of recipes whose indexed columns equal criteria, e.g. find(Sensor="X-Trans V")."""
+        unknown = set(criteria) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Not an indexed recipe field: {', '.join(sorted(unknown))}")
+        where = " AND ".join(f"{_quote(k)} = ?" for k in criteria) or "1"
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT Name FROM recipes WHERE {where} ORDER BY id", tuple(criteria.values())
+            ).fetchall()
+        return [name for (name,) in rows]
+
+    # ── mutations ──────────────────────────────────────────────────────────
+
+    def add(self, recipe_data: Dict[str, str]) -> None:
+        with self._lock, self._db:
+            self._insert(recipe_data)
+
+    def update(self, recipe_data: Dict[str, str], original_name: Optional[str] = None) -> bool:
+        """Replace the first recipe named original_name (default: recipe_data["Name"])."""
+        with self._lock, self._db:
+            row_id = self._first(original_name or recipe_data["Name"])
+            if row_id is None:
+                return False
+            assignments = ", ".join(f"{_quote(c)} = ?" for c in COLUMNS + ("data",))
+            self._db.execute(f"UPDATE recipes SET {assignments} WHERE id = ?",
+                             self._values(recipe_data) + (row_id,))
+            return True
+
+    def delete(self, recipe_name: str) -> bool:
+        """Remove the first recipe named recipe_name."""
+        with self._lock, self._db:
+            row_id = self._first(recipe_name)
+            if row_id is None:
+                return False
+            self._db.execute("DELETE FROM recipes WHERE id = ?", (row_id,))
+            return True
+
+    def replace_all(self, recipes: Dict[str, Dict[str, str]]) -> None:
+        """Replace the whole library in one transaction (used for import)."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM recipes")
+            for recipe_data in recipes.values():
+                self._insert(recipe_data)
+
+    # ── writing ────────────────────────────────────────────────────────────
+
+    def flush(self) -> None:
+        """Nothing is pending – every change is committed immediately."""
+
+    @property
+    def dirty(self) -> bool:
+        return False
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ── internals ──────────────────────────────────────────────────────────
+
+    def _create_schema(self) -> None:
+        with self._lock, self._db:
+            version = self._db.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                raise RuntimeError(f"Unsupported recipe database version {version}: {self.path}")
+            columns = ", ".join(f"{_quote(c)} TEXT" for c in COLUMNS)
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS recipes ("
+                f"id INTEGER PRIMARY KEY AUTOINCREMENT, {columns}, data TEXT NOT NULL)"
+            )
+            for column in ("Name",) + FILTER_FIELDS:
+                self._db.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_quote('idx_' + column)} ON recipes ({_quote(column)})"
+                )
+            # One composite index serves exact lookups on the full match key
+            match_columns = ", ".join(_quote(c) for c in MATCH_FIELDS)
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS idx_match ON recipes ({match_columns})")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _values(self, recipe_data: Dict[str, str]) -> Tuple[Optional[str], ...]:
+        return tuple(recipe_data.get(c) for c in COLUMNS) + (json.dumps(recipe_data),)
+
+    def _insert(self, recipe_data: Dict[str, str]) -> None:
+        columns = ", ".join(_quote(c) for c in COLUMNS + ("data",))
+        marks = ", ".join("?" * (len(COLUMNS) + 1))
+        self._db.execute(f"INSERT INTO recipes ({columns}) VALUES ({marks})", self._values(recipe_data))
+
+    def _first(self, name: str) -> Optional[int]:
+        row = self._db.execute(
+            "SELECT id FROM recipes WHERE Name = ? ORDER BY id LIMIT 1", (name,)
+        ).fetchone()
+        return row[0] if row else None
@@ -2,101 +2,134 @@
 # XML MANAGER
 # ──────────────────────────────────────────────
 import os
-import xml.etree.ElementTree as ET
-from typing import Dict, Optional
+from typing import Dict, Optional, Set, Union
 
 from PyQt6.QtWidgets import QMessageBox
 
 from constants import Constants
+from managers.recipe_store import RecipeStore
+from managers.sqlite_store import SQLiteRecipeStore
 from utils import resource_path
 
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+Store = Union[RecipeStore, SQLiteRecipeStore]
+
 
 class XMLManager:
+    """
+    Recipe CRUD on top of a store per recipe file: a RecipeStore for XML, or
+    an SQLiteRecipeStore for .db / .sqlite files. The file is read once;
+    later loads and edits work on the in-memory tree (or the database).
+    Writes are immediate by default – set_flush_delay() debounces them and
+    flush() saves what is pending. enable_snapshot() caches the parsed
+    library next to it for a fast start. add/update/delete work on the file chosen
+    with use_database() (the XML by default).
+    """
+    _stores: Dict[str, Store] = {}
+    _flush_delay = 0.0
+    _snapshot_paths: Set[str] = set()
+    _database = Constants.XML_FILE
+
     @staticmethod
-    def load_simulations(filename: str) -> Dict[str, Dict[str, str]]:
-        """Load recipes from the XML; values are stored in ÷20 format."""
+    def is_sqlite(filename: str) -> bool:
+        return os.path.splitext(filename)[1].lower() in SQLITE_EXTENSIONS
+
+    @classmethod
+    def store(cls, filename: Optional[str] = None, create: bool = False) -> Store:
+        """The store of filename, read on first use (raises if it cannot be read)."""
+        full_path = resource_path(filename or cls._database)
+        store = cls._stores.get(full_path)
+        if store is None:
+            if cls.is_sqlite(full_path):
+                store = SQLiteRecipeStore(full_path, cls._flush_delay, create=create)
+            else:
+                store = RecipeStore(full_path, cls._flush_delay, create=create, snapshot=full_path in cls._snapshot_paths)
+            cls._stores[full_path] = store
+        return store
+
+    @classmethod
+    def use_database(cls, filename: str) -> None:
+        """Send add/update/delete to filename (an XML or SQLite recipe file)."""
+        cls._database = filename
+
+    @classmethod
+    def database(cls) -> str:
+        return cls._database
+
+    @classmethod
+    def copy_recipes(cls, source: str, target: str) -> None:
+        """
+        One-shot import/export: make target hold exactly the recipes of
+        source. Either file may be XML or SQLite; target is created if needed.
+        """
+        if not os.path.exists(resource_path(source)):
+            raise FileNotFoundError(f"No such recipe file: {source}")
+        cls.store(target, create=True).replace_all(cls.load_simulations(source))
+
+    @classmethod
+    def set_flush_delay(cls, seconds: float) -> None:
+        """Debounce writes by seconds (0 writes on every change)."""
+        cls._flush_delay = seconds
+        for store in cls._stores.values():
+            store.flush_delay = seconds
+
+    @classmethod
+    def enable_snapshot(cls, filename: str) -> None:
+        """
+        Keep a <file>.cache snapshot of filename (the app library, not the
+        user's import/export files); call before the file is first loaded.
+        """
+        cls._snapshot_paths.add(resource_path(filename))
+
+    @classmethod
+    def flush(cls) -> None:
+        """Write all pending changes, e.g. before the application exits."""
+        for store in cls._stores.values():
+            try:
+                store.flush()
+            except OSError as e:
+                print(f"Error saving recipes: {e}")
+
+    @classmethod
+    def load_simulations(cls, filename: str) -> Dict[str, Dict[str, str]]:
+        """Load recipes from the XML or database; values are stored in ÷20 format."""
         full_path = resource_path(filename)
         if not os.path.exists(full_path):
+            cls._stores.pop(full_path, None)
             return {}
-        with open(full_path, 'r') as f:
-            tree = ET.parse(f)
-            root = tree.getroot()
-        simulations: Dict[str, Dict[str, str]] = {}
-        for profile in root.findall('profile'):
-            name_el = profile.find('Name')
-            if name_el is None:
-                continue
-            sim_name = name_el.text
-            if sim_name is None:
-                continue
-            simulations[sim_name] = {}
-            for param in profile.iter():
-                if param.tag == 'profile':
-                    continue
-                simulations[sim_name][param.tag] = param.text or ""
-        return simulations
+        return cls.store(filename).recipes()
 
-    @staticmethod
-    def add_recipe(recipe_data: Dict[str, str]) -> bool:
+    @classmethod
+    def add_recipe(cls, recipe_data: Dict[str, str]) -> bool:
         """Add a recipe to the XML; WhiteBalanceFineTune is saved in ÷20 format."""
-        xml_file = resource_path(Constants.XML_FILE)
         try:
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
-            new_profile = ET.SubElement(root, 'profile')
-            for key, value in recipe_data.items():
-                elem = ET.SubElement(new_profile, key)
-                elem.text = value
-            ET.indent(tree, space="  ", level=0)
-            tree.write(xml_file, encoding='utf-8', xml_declaration=True)
+            cls.store().add(recipe_data)
             return True
         except Exception as e:
             QMessageBox.critical(None, "Error", f"Failed to add recipe: {e}")
             return False
 
-    @staticmethod
-    def update_recipe(recipe_data: Dict[str, str], original_name: Optional[str] = None) -> bool:
-        xml_file = resource_path(Constants.XML_FILE)
+    @classmethod
+    def update_recipe(cls, recipe_data: Dict[str, str], original_name: Optional[str] = None) -> bool:
+        search_name = original_name or recipe_data["Name"]  # hľadaj podľa pôvodného názvu
         try:
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
-            search_name = original_name or recipe_data["Name"]  # hľadaj podľa pôvodného názvu
-            profile_to_update = None
-            for profile in root.findall('profile'):
-                name_el = profile.find('Name')
-                if name_el is not None and name_el.text == search_name:
-                    profile_to_update = profile
-                    break
-            if profile_to_update is None:
-                QMessageBox.critical(None, "Error", f"Recipe '{search_name}' not found!")
-                return False
-            profile_to_update.clear()
-            for key, value in recipe_data.items():
-                elem = ET.SubElement(profile_to_update, key)
-                elem.text = value
-            ET.indent(tree, space="  ", level=0)
-            tree.write(xml_file, encoding='utf-8', xml_declaration=True)
-            return True
+            if cls.store().update(recipe_data, search_name):
+                return True
         except Exception as e:
             QMessageBox.critical(None, "Error", f"Failed to update recipe: {e}")
             return False
+        QMessageBox.critical(None, "Error", f"Recipe '{search_name}' not found!")
+        return False
 
-    @staticmethod
-    def delete_recipe(recipe_name: str) -> bool:
+    @classmethod
+    def delete_recipe(cls, recipe_name: str) -> bool:
         """Delete a recipe from the XML."""
-        xml_file = resource_path(Constants.XML_FILE)
         try:
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
-            for profile in root.findall('profile'):
-                name_el = profile.find('Name')
-                if name_el is not None and name_el.text == recipe_name:
-                    root.remove(profile)
-                    ET.indent(tree, space="  ", level=0)
-                    tree.write(xml_file, encoding='utf-8', xml_declaration=True)
-                    return True
-            QMessageBox.critical(None, "Error", f"Recipe '{recipe_name}' not found!")
-            return False
+            if cls.store().delete(recipe_name):
+                return True
         except Exception as e:
             QMessageBox.critical(None, "Error", f"Failed to delete recipe: {e}")
-            return False
\ No newline at end of file
+            return False
+        QMessageBox.critical(None, "Error", f"Recipe '{recipe_name}' not found!")
+        return False
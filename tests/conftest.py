@@ -0,0 +1,36 @@
+"""
+Shared pytest configuration: timing benchmarks are opt-in; widget tests
+share one offscreen QApplication.
+"""
+import os
+
+import pytest
+
+_app = None
+
+
+@pytest.fixture
+def qapp():
+    global _app    # kept for the whole run – a collected QApplication takes the pools with it
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    _app = QApplication.instance() or QApplication([])
+    return _app
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-benchmarks", action="store_true", default=False,
+                     help="also run the wall-clock benchmarks (skipped by default)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: wall-clock comparison, run with --run-benchmarks")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-benchmarks"):
+        return
+    skip = pytest.mark.skip(reason="timing benchmark – run with --run-benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
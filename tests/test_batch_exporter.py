@@ -0,0 +1,109 @@
+"""
+Tests for the batch recipe card exporter.
+"""
+import os
+import threading
+
+from PIL import Image
+
+from exporters import batch_exporter
+from exporters.batch_exporter import BatchItem, card_filename, export_batch, plan_batch
+from exporters.recipe_card_exporter import CardOutput
+
+RECIPE = {"Name": "Kodak Portra 400", "FilmMode": "Classic Chrome"}
+
+
+def make_photo(tmp_path, name="DSCF0001.jpg"):
+    path = tmp_path / name
+    Image.new("RGB", (300, 200), (120, 90, 60)).save(path, "JPEG")
+    return str(path)
+
+
+# ============================================================================
+# Tests for output naming
+# ============================================================================
+
+class TestPlanBatch:
+    """Tests for card file names in the output folder."""
+
+    def test_card_filename(self):
+        """Test photo and recipe name in the file name, without unsafe characters."""
+        assert card_filename("/a/DSCF0001.RAF", {"Name": "Fuji: Velvia / 50"}) == "DSCF0001_Fuji_Velvia_50_card.png"
+        assert card_filename("/a/DSCF0001.jpg", {}) == "DSCF0001_card.png"
+
+    def test_colliding_names_get_suffix(self, tmp_path):
+        """Test that same-named photos from different folders do not overwrite each other."""
+        items = plan_batch([("/a/IMG.jpg", RECIPE), ("/b/IMG.jpg", RECIPE), ("/c/img.jpg", RECIPE)], str(tmp_path))
+
+        names = [os.path.basename(item.outputs[0].path) for item in items]
+
+        assert names == ["IMG_Kodak_Portra_400_card.png", "IMG_Kodak_Portra_400_card_2.png",
+                         "img_Kodak_Portra_400_card_3.png"]
+        assert all(os.path.dirname(item.outputs[0].path) == str(tmp_path) for item in items)
+
+    def test_existing_files_not_overwritten(self, tmp_path):
+        """Test that names already taken in the output folder, for any size, are skipped."""
+        (tmp_path / "IMG_Kodak_Portra_400_card.png").write_bytes(b"earlier export")
+        (tmp_path / "img_kodak_portra_400_card_2_story.png").write_bytes(b"earlier export")
+
+        items = plan_batch([("/a/IMG.jpg", RECIPE)], str(tmp_path), ("card", "story"))
+
+        assert [os.path.basename(o.path) for o in items[0].outputs] == [
+            "IMG_Kodak_Portra_400_card_3.png", "IMG_Kodak_Portra_400_card_3_story.png",
+        ]
+
+    def test_sizes_and_format(self, tmp_path):
+        """Test one output per size, named by size, with format and quality."""
+        [item] = plan_batch([("/a/IMG.jpg", RECIPE)], str(tmp_path), ("card", "story", "square"), "JPEG", 80)
+
+        assert [os.path.basename(o.path) for o in item.outputs] == [
+            "IMG_Kodak_Portra_400_card.jpg", "IMG_Kodak_Portra_400_card_story.jpg",
+            "IMG_Kodak_Portra_400_card_square.jpg",
+        ]
+        assert [o.size for o in item.outputs] == [None, (1080, 1920), (1080, 1080)]
+        assert {(o.format, o.quality) for o in item.outputs} == {("JPEG", 80)}
+
+
+# ============================================================================
+# Tests for export_batch
+# ============================================================================
+
+class TestExportBatch:
+    """Tests for the process pool export."""
+
+    def test_exports_all_and_reports_failures(self, tmp_path):
+        """Test that every card is written and a bad file is reported, not fatal."""
+        photos = [(make_photo(tmp_path, f"{i}.jpg"), RECIPE) for i in range(3)]
+        photos.append((str(tmp_path / "missing.jpg"), RECIPE))
+        out = tmp_path / "out"
+        items = plan_batch(photos, str(out))
+        progress = []
+
+        failures = export_batch(items, max_workers=2, progress=lambda d, t: progress.append((d, t)))
+
+        assert [f.photo_path for f in failures] == [photos[3][0]]
+        assert failures[0].error
+        assert all(os.path.exists(item.outputs[0].path) for item in items[:3])
+        assert Image.open(items[0].outputs[0].path).size == (900, 1125)
+        assert progress == [(1, 4), (2, 4), (3, 4), (4, 4)]
+
+    def test_empty_batch(self):
+        """Test that no pool is started for an empty selection."""
+        assert export_batch([]) == []
+
+    def test_cancel_skips_remaining(self, tmp_path):
+        """Test that a set cancel event stops before the remaining files."""
+        photo = make_photo(tmp_path)
+        items = plan_batch([(photo, RECIPE)] * 6, str(tmp_path / "out"))
+        cancel = threading.Event()
+        cancel.set()
+
+        export_batch(items, max_workers=1, cancel=cancel)
+
+        assert sum(os.path.exists(item.outputs[0].path) for item in items) < len(items)
+
+    def test_export_one_returns_error_text(self, tmp_path):
+        """Test that the worker function turns exceptions into error strings."""
+        item = BatchItem(str(tmp_path / "missing.jpg"), RECIPE, (CardOutput(str(tmp_path / "card.png")),))
+        assert batch_exporter._export_one(item)
+        assert batch_exporter._export_one(item._replace(photo_path=make_photo(tmp_path))) is None
@@ -0,0 +1,129 @@
+"""
+Tests for CardVirtualizer - only cards near the viewport keep their widgets.
+"""
+import os
+import time
+
+import pytest
+from PIL import Image
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt6.QtWidgets import QLabel, QScrollArea, QVBoxLayout, QWidget
+
+from widgets.card_virtualizer import REFRESH_DELAY_MS, CardVirtualizer
+from widgets.image_card import ImageCard, load_card_image
+
+SETTINGS = {"show_histogram": False}
+CARDS = 30
+
+
+def wait_until(qapp, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    return condition()
+
+
+@pytest.fixture
+def card_list(qapp, tmp_path):
+    """A 900x800 scroll area holding CARDS cards, each with the pipeline's thumbnail."""
+    scroll = QScrollArea()
+    scroll.setWidgetResizable(True)
+    content = QWidget()
+    layout = QVBoxLayout(content)
+    scroll.setWidget(content)
+    scroll.resize(900, 800)
+    scroll.show()
+
+    virtualizer = CardVirtualizer(scroll)
+    cards = []
+    for i in range(CARDS):
+        path = str(tmp_path / f"img{i}.jpg")
+        Image.new("RGB", (60, 40), (i * 8, 100, 200)).save(path)
+        thumb, info = load_card_image(path)
+        card = ImageCard(path, {"Name": f"Recipe {i}"}, {}, SETTINGS, thumb=thumb, info=info)
+        layout.addWidget(card)
+        virtualizer.add(card)
+        cards.append(card)
+    layout.addStretch()
+    assert wait_until(qapp, lambda: scroll.verticalScrollBar().maximum() > 0)   # laid out
+    virtualizer.refresh()
+
+    yield scroll, virtualizer, cards
+    virtualizer.shutdown()
+    scroll.close()
+    scroll.deleteLater()
+    qapp.processEvents()
+
+
+def in_keep_range(scroll, card):
+    top = scroll.verticalScrollBar().value()
+    height = scroll.viewport().height()
+    geo = card.geometry()
+    return geo.bottom() >= top - height and geo.top() <= top + 2 * height
+
+
+# ============================================================================
+# Tests for materialise / evict
+# ============================================================================
+
+class TestCardVirtualizer:
+    """Tests for the cards kept around the viewport."""
+
+    def test_only_cards_near_viewport_materialised(self, card_list):
+        """Test that cards beyond the margin have no child widgets."""
+        scroll, _virtualizer, cards = card_list
+        near = [c for c in cards if in_keep_range(scroll, c)]
+        far = [c for c in cards if not in_keep_range(scroll, c)]
+
+        assert near and far
+        assert all(c.materialized for c in near)
+        assert not any(c.materialized for c in far)
+        assert all(c.findChildren(QLabel) == [] for c in far)
+        assert len({c.height() for c in cards}) == 1   # same size materialised or not
+
+    def test_scrolled_away_cards_evicted_and_restored(self, qapp, card_list):
+        """Test that cards are evicted when scrolled away and reloaded when scrolled back."""
+        scroll, virtualizer, cards = card_list
+        top_cards = [c for c in cards if c.materialized]
+        bar = scroll.verticalScrollBar()
+
+        bar.setValue(bar.maximum())
+        virtualizer.refresh()
+        assert not any(c.materialized or c.preloaded for c in top_cards)
+        assert all(c.img_label is None for c in top_cards)
+        assert wait_until(qapp, lambda: cards[-1].materialized)
+
+        bar.setValue(0)
+        virtualizer.refresh()    # evicted cards are decoded again in the background
+        assert wait_until(qapp, lambda: all(c.materialized for c in top_cards))
+        assert not cards[-1].materialized
+
+
+# ============================================================================
+# Tests for refresh scheduling
+# ============================================================================
+
+class TestRefreshScheduling:
+    """Tests for coalescing scroll events into refreshes."""
+
+    def test_burst_coalesced_into_one_refresh(self, qapp, card_list, monkeypatch):
+        """Test that a burst of scroll events triggers one refresh after REFRESH_DELAY_MS."""
+        scroll, virtualizer, _cards = card_list
+        calls = []
+        monkeypatch.setattr(virtualizer, "refresh", lambda: calls.append(time.monotonic()))
+        virtualizer._timer.stop()
+        virtualizer._timer.timeout.disconnect()
+        virtualizer._timer.timeout.connect(virtualizer.refresh)
+
+        start = time.monotonic()
+        for value in range(0, 500, 50):
+            scroll.verticalScrollBar().setValue(value)
+        virtualizer.schedule()
+        assert calls == []
+
+        assert wait_until(qapp, lambda: calls, timeout=1.0)
+        wait_until(qapp, lambda: len(calls) > 1, timeout=3 * REFRESH_DELAY_MS / 1000)
+        assert len(calls) == 1
+        assert calls[0] - start >= REFRESH_DELAY_MS / 1000 * 0.9
@@ -2,12 +2,26 @@
 Tests for ExifManager - management of EXIF data from image files.
 """
 import os
+import shutil
+import stat
 import subprocess
+import sys
 from unittest.mock import patch, MagicMock, Mock
 
 import pytest
 
-from managers.exif_manager import ExifManager, _find_exiftool, _parse_lines
+from managers import exif_manager
+from managers.exif_manager import (
+    ExifManager, ExifToolError, ExifToolSession, _find_exiftool, _parse_json, _parse_lines
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_exiftool_lookup(monkeypatch):
+    """Each test resolves exiftool afresh instead of using the per-process cache."""
+    monkeypatch.setattr('managers.exif_manager._lookup', None)
+    monkeypatch.setattr('managers.exif_manager._override_path', "")
+    monkeypatch.delenv('EXIFTOOL_PATH', raising=False)
 
 
 # ============================================================================
@@ -164,6 +178,68 @@ class TestFindExiftool:
         assert "ExifTool not found" in error_msg
         assert "Searched in" in error_msg
 
+    def test_find_exiftool_is_cached(self, monkeypatch):
+        """Test that the lookup runs only once per process."""
+        which = MagicMock(return_value='/usr/bin/exiftool')
+        monkeypatch.setattr('managers.exif_manager.shutil.which', which)
+
+        assert _find_exiftool() == '/usr/bin/exiftool'
+        assert _find_exiftool() == '/usr/bin/exiftool'
+        which.assert_called_once()
+
+    def test_find_exiftool_failure_is_cached(self, monkeypatch):
+        """Test that a failed lookup is not repeated on every call."""
+        listdir = MagicMock(return_value=[])
+        monkeypatch.setattr('managers.exif_manager.shutil.which', lambda x: None)
+        monkeypatch.setattr('os.path.exists', lambda x: False)
+        monkeypatch.setattr('os.listdir', listdir)
+
+        for _ in range(3):
+            with pytest.raises(FileNotFoundError):
+                _find_exiftool()
+        listdir.assert_called_once()
+
+    def test_find_exiftool_env_override(self, monkeypatch, tmp_path):
+        """Test that EXIFTOOL_PATH wins over PATH."""
+        binary = tmp_path / "exiftool"
+        binary.write_text("")
+        monkeypatch.setenv('EXIFTOOL_PATH', str(binary))
+        monkeypatch.setattr('managers.exif_manager.shutil.which', lambda x: '/usr/bin/exiftool')
+
+        assert _find_exiftool() == str(binary)
+
+    def test_find_exiftool_setting_override(self, monkeypatch, tmp_path):
+        """Test that the configured path wins and invalid paths are reported."""
+        binary = tmp_path / "exiftool"
+        binary.write_text("")
+        monkeypatch.setattr('managers.exif_manager.shutil.which', lambda x: '/usr/bin/exiftool')
+
+        ExifManager.set_exiftool_path(str(binary))
+        assert _find_exiftool() == str(binary)
+
+        ExifManager.set_exiftool_path(str(tmp_path / "missing"))
+        with pytest.raises(FileNotFoundError) as exc_info:
+            _find_exiftool()
+        assert "setting" in str(exc_info.value)
+
+    def test_exiftool_info(self, monkeypatch):
+        """Test the diagnostic summary."""
+        monkeypatch.setattr('managers.exif_manager.shutil.which', lambda x: '/usr/bin/exiftool')
+        monkeypatch.setattr('subprocess.run', MagicMock(return_value=MagicMock(stdout="12.76\n")))
+
+        info = ExifManager.exiftool_info()
+
+        assert info == {"Path": "/usr/bin/exiftool", "Source": "PATH",
+                        "Mode": "one-shot", "Version": "12.76"}
+
+    def test_exiftool_info_not_found(self, monkeypatch):
+        """Test the diagnostic summary when exiftool is missing."""
+        monkeypatch.setattr('managers.exif_manager.shutil.which', lambda x: None)
+        monkeypatch.setattr('os.path.exists', lambda x: False)
+        monkeypatch.setattr('os.listdir', lambda x: [])
+
+        assert "Error" in ExifManager.exiftool_info()
+
 
 # ============================================================================
 # Tests for ExifManager.get_exif_data
@@ -455,6 +531,70 @@ WhiteBalance : Kelvin"""
         assert result["WhiteBalance"] == "Kelvin"
 
 
+# ============================================================================
+# Tests for ExifManager.get_exif_batch
+# ============================================================================
+
+BATCH_OUTPUT = """[{
+  "SourceFile": "a.jpg",
+  "FilmMode": "Classic Chrome",
+  "WhiteBalanceFineTune": "Red +60, Blue -100",
+  "ColorTemperature": 6500
+},
+{
+  "SourceFile": "b.jpg",
+  "FilmMode": "Eterna",
+  "Keywords": ["one", "two"]
+}]"""
+
+
+class TestGetExifBatch:
+    """Tests for ExifManager.get_exif_batch and _parse_json."""
+
+    def test_parse_json_converts_values(self):
+        """Test that numbers, lists and WBFT are converted like -s output."""
+        result = _parse_json(BATCH_OUTPUT)
+
+        assert result["a.jpg"]["ColorTemperature"] == "6500"
+        assert result["a.jpg"]["WhiteBalanceFineTune"] == "Red +3, Blue -5"
+        assert result["b.jpg"]["Keywords"] == "one, two"
+
+    def test_parse_json_invalid_output(self):
+        """Test that garbage output yields an empty result."""
+        assert _parse_json("") == {}
+        assert _parse_json("Error: File not found") == {}
+
+    def test_batch_single_call(self, monkeypatch):
+        """Test that all files are read with one exiftool call."""
+        monkeypatch.setattr('managers.exif_manager._find_exiftool', lambda: "/usr/bin/exiftool")
+        mock_subprocess = MagicMock(return_value=MagicMock(stdout=BATCH_OUTPUT, returncode=0))
+        monkeypatch.setattr('subprocess.run', mock_subprocess)
+
+        result = ExifManager.get_exif_batch(["a.jpg", "b.jpg", "c.jpg"], ["Name", "FilmMode"])
+
+        mock_subprocess.assert_called_once()
+        cmd = mock_subprocess.call_args[0][0]
+        assert '-json' in cmd
+        assert '-FilmMode' in cmd
+        assert '-Name' not in cmd
+        assert cmd[-3:] == ["a.jpg", "b.jpg", "c.jpg"]
+        assert result["a.jpg"] == {"FilmMode": "Classic Chrome"}
+        assert result["b.jpg"] == {"FilmMode": "Eterna"}
+        assert result["c.jpg"] == {}
+
+    def test_batch_is_chunked(self, monkeypatch):
+        """Test that large file lists are split into several calls."""
+        monkeypatch.setattr('managers.exif_manager._find_exiftool', lambda: "/usr/bin/exiftool")
+        monkeypatch.setattr('managers.exif_manager.BATCH_SIZE', 2)
+        mock_subprocess = MagicMock(return_value=MagicMock(stdout="[]", returncode=0))
+        monkeypatch.setattr('subprocess.run', mock_subprocess)
+
+        result = ExifManager.get_exif_batch(["1.jpg", "2.jpg", "3.jpg"], ["FilmMode"])
+
+        assert mock_subprocess.call_count == 2
+        assert set(result) == {"1.jpg", "2.jpg", "3.jpg"}
+
+
 # ============================================================================
 # Integration Tests
 # ============================================================================
@@ -518,3 +658,156 @@ ISO : 400"""
         assert exif_data["FilmMode"] == "Classic Chrome"
         assert exif_data["Saturation"] == "0 (normal)"
         assert exif_data["Sharpness"] == "+2"
+
+
+# ============================================================================
+# Tests for the persistent -stay_open session
+# ============================================================================
+
+FAKE_EXIFTOOL = """\
+import sys, time
+args = []
+while True:
+    line = sys.stdin.readline()
+    if not line:
+        break
+    line = line.rstrip("\\n")
+    if line.startswith("-execute"):
+        files = [a for a in args if not a.startswith("-")]
+        if "crash.jpg" in files:
+            sys.exit(1)
+        if "hang.jpg" in files:
+            time.sleep(5)
+        for f in files:
+            print(f"FileName : {f}")
+        print(f"Pid : {__import__('os').getpid()}")
+        print("{ready" + line[len("-execute"):] + "}", flush=True)
+        args = []
+    elif line == "False" and args[-1:] == ["-stay_open"]:
+        sys.exit(0)
+    else:
+        args.append(line)
+"""
+
+
+@pytest.fixture
+def fake_exiftool(tmp_path):
+    """Executable script speaking the exiftool -stay_open protocol."""
+    script = tmp_path / "exiftool"
+    script.write_text(f"#!{sys.executable}\n" + FAKE_EXIFTOOL)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="uses a shebang script as fake exiftool")
+class TestExifToolSession:
+    """Tests for ExifToolSession and ExifManager session mode."""
+
+    def test_execute_returns_framed_output(self, fake_exiftool):
+        """Test that a reply is cut at the {readyN} marker."""
+        session = ExifToolSession(fake_exiftool)
+        try:
+            out = session.execute('-s', 'photo.jpg')
+            assert "FileName : photo.jpg" in out
+            assert "{ready" not in out
+        finally:
+            session.close()
+
+    def test_process_is_reused(self, fake_exiftool):
+        """Test that consecutive requests hit the same process."""
+        session = ExifToolSession(fake_exiftool)
+        try:
+            first = _parse_lines(session.execute('a.jpg').splitlines())
+            second = _parse_lines(session.execute('b.jpg').splitlines())
+            assert first["Pid"] == second["Pid"]
+            assert second["FileName"] == "b.jpg"
+        finally:
+            session.close()
+
+    def test_restart_after_crash(self, fake_exiftool):
+        """Test that a crashed process is restarted on the next request."""
+        session = ExifToolSession(fake_exiftool)
+        try:
+            with pytest.raises(ExifToolError):
+                session.execute('crash.jpg')
+            assert "FileName : ok.jpg" in session.execute('ok.jpg')
+        finally:
+            session.close()
+
+    def test_timeout_raises(self, fake_exiftool):
+        """Test that a hanging request raises instead of blocking forever."""
+        session = ExifToolSession(fake_exiftool, timeout=0.3)
+        try:
+            with pytest.raises(ExifToolError):
+                session.execute('hang.jpg')
+        finally:
+            session.close()
+
+    def test_close_stops_process(self, fake_exiftool):
+        """Test graceful shutdown."""
+        session = ExifToolSession(fake_exiftool)
+        session.execute('a.jpg')
+        proc = session._proc
+        session.close()
+        assert proc.poll() == 0
+        assert not session.running
+
+    def test_manager_uses_session(self, fake_exiftool, monkeypatch):
+        """Test that ExifManager routes reads through the session when started."""
+        monkeypatch.setattr('managers.exif_manager._find_exiftool', lambda: fake_exiftool)
+        mock_subprocess = MagicMock()
+        monkeypatch.setattr('subprocess.run', mock_subprocess)
+        assert ExifManager.start_session()
+        try:
+            result = ExifManager.get_exif_data("photo.jpg", ["FileName"])
+            assert result == {"FileName": "photo.jpg"}
+            mock_subprocess.assert_not_called()
+        finally:
+            ExifManager.stop_session()
+        assert ExifManager._session is None
+
+    def test_session_started_when_path_set_later(self, fake_exiftool, monkeypatch):
+        """Test that a session requested while exiftool was missing starts once a path is set."""
+        def locate():
+            if not exif_manager._override_path:
+                raise FileNotFoundError("ExifTool not found!")
+            return exif_manager._override_path, "setting"
+
+        monkeypatch.setattr('managers.exif_manager._locate_exiftool', locate)
+        try:
+            assert not ExifManager.start_session()
+            ExifManager.set_exiftool_path(fake_exiftool)
+            assert ExifManager._session is not None
+            assert "FileName : a.jpg" in ExifManager._run(['a.jpg'])
+        finally:
+            ExifManager.stop_session()
+
+    def test_atexit_registered_once(self, fake_exiftool, monkeypatch, tmp_path):
+        """Test that restarting the session does not register another exit handler."""
+        register = MagicMock()
+        monkeypatch.setattr('managers.exif_manager.atexit.register', register)
+        monkeypatch.setattr(ExifManager, '_atexit_registered', False)
+        other = tmp_path / "other-exiftool"
+        shutil.copy(fake_exiftool, other)
+        try:
+            ExifManager.set_exiftool_path(fake_exiftool)
+            ExifManager.start_session()
+            ExifManager.set_exiftool_path(str(other))
+            ExifManager.stop_session()
+            ExifManager.start_session()
+            assert ExifManager._session.executable == str(other)
+            register.assert_called_once_with(ExifManager.stop_session)
+        finally:
+            ExifManager.stop_session()
+
+    def test_manager_falls_back_to_one_shot(self, monkeypatch):
+        """Test fallback to subprocess.run when the session cannot run."""
+        monkeypatch.setattr('managers.exif_manager._find_exiftool', lambda: "/nonexistent/exiftool")
+        mock_subprocess = MagicMock(return_value=MagicMock(stdout="Model : X-T5", returncode=0))
+        monkeypatch.setattr('subprocess.run', mock_subprocess)
+        ExifManager.start_session()
+        try:
+            assert ExifManager.get_exif_data("photo.jpg", None) == {"Model": "X-T5"}
+            mock_subprocess.assert_called_once()
+        finally:
+            ExifManager.stop_session()
@@ -0,0 +1,265 @@
+"""
+Tests for the native Fujifilm MakerNote reader.
+"""
+import struct
+from unittest.mock import MagicMock
+
+import pytest
+
+from managers.exif_manager import ExifManager
+from utils.fuji_makernote import (FUJI_MAKERNOTE_TAGS, read_fuji_makernote, read_raf_preview,
+                                  read_raf_raw_size)
+
+
+# ============================================================================
+# Synthetic file builders
+# ============================================================================
+
+def _ifd(entries, endian, data_offset):
+    """Build an IFD; entries are (tag, type, values). Returns (ifd_bytes, extra_data)."""
+    fmt = {3: "H", 4: "I", 7: "B", 8: "h", 9: "i"}
+    size = {3: 2, 4: 4, 7: 1, 8: 2, 9: 4}
+    body = struct.pack(endian + "H", len(entries))
+    extra = b""
+    for tag, typ, values in sorted(entries):
+        raw = struct.pack(f"{endian}{len(values)}{fmt[typ]}", *values)
+        if len(raw) <= 4:
+            field = raw.ljust(4, b"\x00")
+        else:
+            field = struct.pack(endian + "I", data_offset + len(extra))
+            extra += raw
+        body += struct.pack(endian + "HHI", tag, typ, len(values)) + field
+    return body + b"\x00\x00\x00\x00", extra
+
+
+def build_makernote(entries):
+    header = b"FUJIFILM" + struct.pack("<I", 12)
+    ifd_len = 2 + 12 * len(entries) + 4
+    ifd, extra = _ifd(entries, "<", 12 + ifd_len)
+    return header + ifd + extra
+
+
+def build_jpeg(makernote_entries, endian="<"):
+    note = build_makernote(makernote_entries)
+    # TIFF header (8) + IFD0 with one entry (18) + Exif IFD with one entry (18) + makernote
+    ifd0, _ = _ifd([(0x8769, 4, [26])], endian, 0)
+    exif_ifd, _ = _ifd([(0x927C, 7, [0] * len(note))], endian, 0)
+    exif_ifd = exif_ifd[:10] + struct.pack(endian + "I", 44) + exif_ifd[14:]
+    tiff = (b"II" if endian == "<" else b"MM") + struct.pack(endian + "HI", 42, 8)
+    tiff += ifd0 + exif_ifd + note
+    app1 = b"Exif\x00\x00" + tiff
+    return (b"\xff\xd8"
+            + b"\xff\xe0" + struct.pack(">H", 6) + b"JFIF"
+            + b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1
+            + b"\xff\xd9")
+
+
+def build_raf(jpeg, cfa_records=()):
+    """RAF with jpeg at offset 100 followed by a CFA header of (tag, data) records."""
+    header = b"FUJIFILMCCD-RAW ".ljust(84, b"\x00")
+    offset = 100
+    cfa = struct.pack(">I", len(cfa_records))
+    for tag, data in cfa_records:
+        cfa += struct.pack(">HH", tag, len(data)) + data
+    header += struct.pack(">IIII", offset, len(jpeg), offset + len(jpeg), len(cfa))
+    return header.ljust(offset, b"\x00") + jpeg + cfa
+
+
+RECIPE_ENTRIES = [
+    (0x1401, 3, [0x600]),          # FilmMode: Classic Chrome
+    (0x1002, 3, [0xFF0]),          # WhiteBalance: Kelvin
+    (0x1005, 3, [5200]),           # ColorTemperature
+    (0x100A, 9, [40, -80]),        # WhiteBalanceFineTune
+    (0x1003, 3, [0x100]),          # Saturation: +2 (high)
+    (0x100B, 3, [0x100]),          # old NoiseReduction: n/a
+    (0x100E, 3, [0x2E0]),          # NoiseReduction: -4 (weakest)
+    (0x1040, 9, [-16]),            # ShadowTone: +1 (medium hard)
+    (0x1041, 9, [24]),             # HighlightTone: -1.5
+    (0x1047, 4, [32]),             # GrainEffectRoughness: Weak
+    (0x104C, 3, [16]),             # GrainEffectSize: Small
+    (0x1048, 4, [64]),             # ColorChromeEffect: Strong
+    (0x104E, 4, [0]),              # ColorChromeFXBlue: Off
+    (0x1403, 3, [400]),            # DevelopmentDynamicRange
+]
+
+EXPECTED = {
+    "FilmMode": "Classic Chrome",
+    "WhiteBalance": "Kelvin",
+    "ColorTemperature": "5200",
+    "WhiteBalanceFineTune": "Red +2, Blue -4",
+    "Saturation": "+2 (high)",
+    "NoiseReduction": "-4 (weakest)",
+    "ShadowTone": "+1 (medium hard)",
+    "HighlightTone": "-1.5",
+    "GrainEffectRoughness": "Weak",
+    "GrainEffectSize": "Small",
+    "ColorChromeEffect": "Strong",
+    "ColorChromeFXBlue": "Off",
+    "DevelopmentDynamicRange": "400",
+}
+
+
+@pytest.fixture
+def fuji_jpeg(tmp_path):
+    path = tmp_path / "DSCF0001.JPG"
+    path.write_bytes(build_jpeg(RECIPE_ENTRIES))
+    return str(path)
+
+
+# ============================================================================
+# Tests for read_fuji_makernote
+# ============================================================================
+
+class TestReadFujiMakernote:
+    """Tests for the in-process MakerNote decoder."""
+
+    def test_decodes_all_recipe_tags(self, fuji_jpeg):
+        """Test that every tag is converted to the exiftool -s string."""
+        assert read_fuji_makernote(fuji_jpeg) == EXPECTED
+
+    def test_all_decoded_tags_are_advertised(self):
+        """Test that FUJI_MAKERNOTE_TAGS lists the produced names."""
+        assert set(EXPECTED) == FUJI_MAKERNOTE_TAGS
+
+    def test_filter_keys(self, fuji_jpeg):
+        """Test that only requested tags are returned."""
+        result = read_fuji_makernote(fuji_jpeg, ["Saturation", "WhiteBalanceFineTune"])
+        assert result == {"Saturation": "+2 (high)", "WhiteBalanceFineTune": "Red +2, Blue -4"}
+
+    def test_big_endian_tiff(self, tmp_path):
+        """Test Motorola byte order in the outer TIFF block."""
+        path = tmp_path / "be.jpg"
+        path.write_bytes(build_jpeg(RECIPE_ENTRIES, endian=">"))
+        assert read_fuji_makernote(str(path)) == EXPECTED
+
+    def test_raf_embedded_jpeg(self, tmp_path):
+        """Test reading the MakerNote through the RAF header."""
+        path = tmp_path / "DSCF0001.RAF"
+        path.write_bytes(build_raf(build_jpeg(RECIPE_ENTRIES)))
+        assert read_fuji_makernote(str(path)) == EXPECTED
+
+    def test_old_noise_reduction_tag(self, tmp_path):
+        """Test the pre-X-Trans NoiseReduction tag when the new one is absent."""
+        path = tmp_path / "old.jpg"
+        path.write_bytes(build_jpeg([(0x100B, 3, [0x80])]))
+        assert read_fuji_makernote(str(path)) == {"NoiseReduction": "Normal"}
+
+    def test_unknown_value_returns_none(self, tmp_path):
+        """Test that unmapped values force the exiftool fallback."""
+        path = tmp_path / "unknown.jpg"
+        path.write_bytes(build_jpeg([(0x1401, 3, [0xF00])]))
+        assert read_fuji_makernote(str(path)) is None
+
+    def test_non_fuji_file_returns_none(self, tmp_path):
+        """Test files without a Fujifilm MakerNote."""
+        path = tmp_path / "plain.jpg"
+        path.write_bytes(b"\xff\xd8\xff\xd9")
+        assert read_fuji_makernote(str(path)) is None
+        assert read_fuji_makernote(str(tmp_path / "missing.jpg")) is None
+
+    def test_truncated_file_returns_none(self, tmp_path, fuji_jpeg):
+        """Test that corrupt data does not raise."""
+        data = open(fuji_jpeg, "rb").read()
+        path = tmp_path / "truncated.jpg"
+        path.write_bytes(data[:60])
+        assert read_fuji_makernote(str(path)) is None
+
+
+# ============================================================================
+# Tests for read_raf_preview
+# ============================================================================
+
+class TestReadRafPreview:
+    """Tests for extracting the embedded RAF JPEG."""
+
+    def test_returns_embedded_jpeg(self, tmp_path):
+        """Test that the JPEG stored behind the RAF header is returned intact."""
+        jpeg = build_jpeg(RECIPE_ENTRIES)
+        path = tmp_path / "DSCF0001.RAF"
+        path.write_bytes(build_raf(jpeg))
+        assert read_raf_preview(str(path)) == jpeg
+
+    def test_non_raf_returns_none(self, fuji_jpeg, tmp_path):
+        """Test plain JPEGs, truncated RAFs and missing files."""
+        assert read_raf_preview(fuji_jpeg) is None
+        path = tmp_path / "cut.RAF"
+        path.write_bytes(build_raf(build_jpeg(RECIPE_ENTRIES))[:120])
+        assert read_raf_preview(str(path)) is None
+        assert read_raf_preview(str(tmp_path / "missing.RAF")) is None
+
+
+# ============================================================================
+# Tests for read_raf_raw_size
+# ============================================================================
+
+class TestReadRafRawSize:
+    """Tests for the sensor size in the RAF CFA header."""
+
+    def test_prefers_cropped_size(self, tmp_path):
+        """Test that RawImageCroppedSize wins over RawImageFullSize, as (width, height)."""
+        path = tmp_path / "DSCF0001.RAF"
+        path.write_bytes(build_raf(build_jpeg(RECIPE_ENTRIES), [
+            (0x100, struct.pack(">HH", 4182, 6384)),
+            (0x130, b"\x00" * 8),
+            (0x111, struct.pack(">HH", 4160, 6240)),
+        ]))
+        assert read_raf_raw_size(str(path)) == (6240, 4160)
+
+    def test_falls_back_to_full_size(self, tmp_path):
+        """Test RAFs without a cropped size record."""
+        path = tmp_path / "DSCF0001.RAF"
+        full_size = (0x100, struct.pack(">HH", 4182, 6384))
+        path.write_bytes(build_raf(build_jpeg(RECIPE_ENTRIES), [full_size]))
+        assert read_raf_raw_size(str(path)) == (6384, 4182)
+
+    def test_missing_records_return_none(self, fuji_jpeg, tmp_path):
+        """Test plain JPEGs, empty CFA headers and truncated records."""
+        assert read_raf_raw_size(fuji_jpeg) is None
+        path = tmp_path / "DSCF0001.RAF"
+        path.write_bytes(build_raf(build_jpeg(RECIPE_ENTRIES)))
+        assert read_raf_raw_size(str(path)) is None
+        path.write_bytes(build_raf(build_jpeg(RECIPE_ENTRIES), [(0x111, b"\x10")]))
+        assert read_raf_raw_size(str(path)) is None
+
+
+# ============================================================================
+# Tests for the ExifManager fast path
+# ============================================================================
+
+class TestExifManagerFastPath:
+    """Tests that ExifManager skips exiftool for decodable files."""
+
+    def test_batch_skips_exiftool(self, fuji_jpeg, monkeypatch):
+        """Test that Fujifilm files never reach exiftool."""
+        mock_subprocess = MagicMock()
+        monkeypatch.setattr('subprocess.run', mock_subprocess)
+
+        result = ExifManager.get_exif_batch([fuji_jpeg], ["Name", "Saturation", "ShadowTone"])
+
+        mock_subprocess.assert_not_called()
+        assert result[fuji_jpeg] == {"Saturation": "+2 (high)", "ShadowTone": "+1 (medium hard)"}
+
+    def test_batch_falls_back_for_other_files(self, fuji_jpeg, monkeypatch, tmp_path):
+        """Test that only undecodable files are sent to exiftool."""
+        other = str(tmp_path / "other.jpg")
+        open(other, "wb").write(b"\xff\xd8\xff\xd9")
+        monkeypatch.setattr('managers.exif_manager._find_exiftool', lambda: "/usr/bin/exiftool")
+        mock_subprocess = MagicMock(return_value=MagicMock(
+            stdout=f'[{{"SourceFile": "{other}", "Saturation": "0 (normal)"}}]'))
+        monkeypatch.setattr('subprocess.run', mock_subprocess)
+
+        result = ExifManager.get_exif_batch([fuji_jpeg, other], ["Saturation"])
+
+        cmd = mock_subprocess.call_args[0][0]
+        assert other in cmd and fuji_jpeg not in cmd
+        assert result[fuji_jpeg] == {"Saturation": "+2 (high)"}
+        assert result[other] == {"Saturation": "0 (normal)"}
+
+    def test_unknown_tags_use_exiftool(self, fuji_jpeg, monkeypatch):
+        """Test that tags outside the MakerNote still go through exiftool."""
+        monkeypatch.setattr('managers.exif_manager._find_exiftool', lambda: "/usr/bin/exiftool")
+        mock_subprocess = MagicMock(return_value=MagicMock(stdout="Model : X-T5"))
+        monkeypatch.setattr('subprocess.run', mock_subprocess)
+
+        assert ExifManager.get_exif_data(fuji_jpeg, ["Model"]) == {"Model": "X-T5"}
+        mock_subprocess.assert_called_once()
@@ -0,0 +1,198 @@
+"""
+Tests for the histogram bucket computation, the pooled HistogramJob and the widget.
+"""
+import os
+import random
+import time
+
+import pytest
+from PIL import Image
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt6.QtCore import QEvent, QPointF, Qt
+from PyQt6.QtGui import QMouseEvent
+
+from managers import HistogramCache
+from widgets.histogram_widget import (
+    HistogramJob, HistogramWidget, clipping_ratios, histogram_buckets, histogram_pool
+)
+
+
+def reference_buckets(img, rgb):
+    """The original per-pixel Python loop, kept as the parity reference."""
+    if rgb:
+        arr = img.convert("RGB").tobytes()
+        total = len(arr) // 3
+        r, g, b = [0] * 256, [0] * 256, [0] * 256
+        for i in range(0, len(arr), 3):
+            r[arr[i]]     += 1
+            g[arr[i + 1]] += 1
+            b[arr[i + 2]] += 1
+        clipping = ((r[0] + g[0] + b[0]) / (total * 3),
+                    (r[255] + g[255] + b[255]) / (total * 3))
+        return [r, g, b], clipping
+    arr = img.convert("L").tobytes()
+    luma = [0] * 256
+    for v in arr:
+        luma[v] += 1
+    return [luma], (luma[0] / len(arr), luma[255] / len(arr))
+
+
+def noise_image(mode, size=(256, 192), seed=1):
+    rnd = random.Random(seed)
+    bands = len(Image.new(mode, (1, 1)).getbands())
+    data = bytes(rnd.choice((0, 255, rnd.randrange(256))) for _ in range(size[0] * size[1] * bands))
+    return Image.frombytes(mode, size, data)
+
+
+# ============================================================================
+# Tests for histogram_buckets / clipping_ratios
+# ============================================================================
+
+class TestHistogramBuckets:
+    """Parity of the Pillow-based buckets with the per-pixel loop."""
+
+    @pytest.mark.parametrize("mode", ["RGB", "L", "RGBA", "CMYK"])
+    @pytest.mark.parametrize("rgb", [True, False])
+    def test_parity_with_reference(self, mode, rgb):
+        """Test identical buckets and clipping ratios for every image mode."""
+        img = noise_image(mode)
+        expected, expected_clip = reference_buckets(img, rgb)
+
+        buckets = histogram_buckets(img, rgb)
+
+        assert buckets == expected
+        assert clipping_ratios(buckets) == pytest.approx(expected_clip, abs=0)
+
+    def test_palette_image(self):
+        """Test that palette images are converted before counting."""
+        img = noise_image("RGB").quantize(64)
+        assert histogram_buckets(img, True) == reference_buckets(img, True)[0]
+
+    def test_empty_image_has_no_clipping(self):
+        """Test that a zero-pixel image does not divide by zero."""
+        assert clipping_ratios(histogram_buckets(Image.new("RGB", (0, 0)), True)) == (0.0, 0.0)
+
+    @pytest.mark.benchmark
+    def test_faster_than_reference(self):
+        """Benchmark: the C-level histogram beats the Python loop by an order of magnitude."""
+        img = noise_image("RGB", size=(256, 256))
+
+        start = time.perf_counter()
+        reference_buckets(img, True)
+        loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(10):
+            histogram_buckets(img, True)
+        vectorised = (time.perf_counter() - start) / 10
+
+        assert vectorised * 10 < loop
+
+
+# ============================================================================
+# Tests for HistogramJob
+# ============================================================================
+
+class TestHistogramJob:
+    """Tests for the pooled histogram job."""
+
+    def test_run_emits_buckets_of_thumbnail(self):
+        """Test that the job thumbnails to 256 px and emits buckets + ratios."""
+        img = noise_image("RGB", size=(512, 384))
+        job = HistogramJob(img, True)
+        results = []
+        job.signals.finished.connect(lambda b, r, rgb: results.append((b, r, rgb)))
+
+        job.run()
+
+        thumb = img.copy()
+        thumb.thumbnail((256, 256), Image.LANCZOS)
+        expected = histogram_buckets(thumb, True)
+        assert results == [(expected, clipping_ratios(expected), True)]
+
+    def test_cancelled_job_does_not_emit(self):
+        """Test that a cancelled job skips the work and stays silent."""
+        job = HistogramJob(noise_image("L"), False)
+        results = []
+        job.signals.finished.connect(lambda b, r, rgb: results.append(b))
+
+        job.cancel()
+        job.run()
+
+        assert results == []
+
+    def test_pool_is_shared_and_bounded(self):
+        """Test that every widget uses the same small pool."""
+        assert histogram_pool() is histogram_pool()
+        assert 1 <= histogram_pool().maxThreadCount() <= 4
+
+
+# ============================================================================
+# Tests for HistogramWidget
+# ============================================================================
+
+class TestHistogramWidget:
+    """Tests for results of replaced jobs and the cached plot."""
+
+    def test_stale_result_after_toggle_ignored(self, qapp):
+        """Test that a result emitted before an L -> RGB toggle is dropped."""
+        histogram_pool().waitForDone()
+        widget = HistogramWidget(noise_image("RGB"), rgb=False)
+        old_job = widget._job
+        histogram_pool().waitForDone()   # the L result is queued, not yet delivered
+
+        widget._rgb = True
+        widget._start_worker()
+        histogram_pool().waitForDone()
+        qapp.processEvents()
+
+        assert not widget._loading
+        assert len(widget._channels) == 3
+        assert old_job is not widget._job
+
+    def test_results_cached_under_their_own_mode(self, qapp, monkeypatch):
+        """Test that a luma result is never stored under the RGB key."""
+        stored = {}
+        monkeypatch.setattr("widgets.histogram_widget.HistogramCache.put",
+                            lambda key, buckets, ratios: stored.__setitem__(key, buckets))
+        monkeypatch.setattr("widgets.histogram_widget.HistogramCache.get", lambda key: None)
+        widget = HistogramWidget(noise_image("RGB"), rgb=False, cache_key=("a.jpg", 1, 2, ""))
+
+        widget._rgb = True     # toggled while the luma job was running
+        widget._on_ready([[0] * 256], (0.0, 0.0), False)
+
+        assert list(stored) == [HistogramCache.key("a.jpg", 1, 2, False)]
+
+    def test_hover_reuses_cached_plot(self, qapp, monkeypatch):
+        """Test that hovering repaints only the overlay; scale and size changes re-render the plot."""
+        img = noise_image("RGB")
+        buckets = histogram_buckets(img, True)
+        monkeypatch.setattr("widgets.histogram_widget.HistogramCache.get",
+                            lambda key: (buckets, clipping_ratios(buckets)))
+        widget = HistogramWidget(img, rgb=True, cache_key=("a.jpg", 1, 2, ""))
+        render = widget._render_plot
+        renders = []
+        monkeypatch.setattr(widget, "_render_plot", lambda dpr: renders.append(dpr) or render(dpr))
+
+        widget.grab()
+        for x in range(10, 200, 20):
+            widget.mouseMoveEvent(QMouseEvent(
+                QEvent.Type.MouseMove, QPointF(x, 40), QPointF(x, 40),
+                Qt.MouseButton.NoButton, Qt.MouseButton.NoButton, Qt.KeyboardModifier.NoModifier))
+            widget.grab()
+        assert len(renders) == 1
+
+        widget._log_scale = True
+        widget._invalidate_plot()
+        widget.grab()
+        widget.setFixedSize(widget.width() + 40, widget.height())
+        widget.grab()
+        assert len(renders) == 3
+
+    def test_cancel_after_pool_is_gone(self, monkeypatch):
+        """Test that cancelling at exit does not touch a deleted pool."""
+        job = HistogramJob(noise_image("L"), False)
+        monkeypatch.setattr("widgets.histogram_widget._pool", None)
+        job.cancel()
+        job.cancel()
@@ -0,0 +1,82 @@
+"""
+Tests for HistogramCache - LRU and on-disk histogram bucket cache.
+"""
+import pytest
+
+from managers.histogram_cache import HistogramCache
+
+
+BUCKETS = [[1] * 256, [2] * 256, [3] * 256]
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    """Give every test an empty cache without a disk layer."""
+    HistogramCache.clear()
+    monkeypatch.setattr(HistogramCache, "_disk_dir", None)
+    yield
+    HistogramCache.clear()
+
+
+# ============================================================================
+# Tests for HistogramCache
+# ============================================================================
+
+class TestHistogramCache:
+    """Tests for keys, LRU eviction and the disk layer."""
+
+    def test_key_includes_identity_and_mode(self):
+        """Test that mtime, size and mode all change the key."""
+        base = HistogramCache.key("a.jpg", 1.0, 10, True)
+        assert base != HistogramCache.key("a.jpg", 2.0, 10, True)
+        assert base != HistogramCache.key("a.jpg", 1.0, 11, True)
+        assert base != HistogramCache.key("a.jpg", 1.0, 10, False)
+        assert base == HistogramCache.key("a.jpg", 1.0, 10, True)
+
+    def test_key_includes_decode_source(self):
+        """Test that a RAW preview and a demosaic of the same file have separate entries."""
+        preview = HistogramCache.key("a.raf", 1.0, 10, True, "raw preview")
+        HistogramCache.put(preview, BUCKETS, (0.1, 0.2))
+        assert HistogramCache.get(HistogramCache.key("a.raf", 1.0, 10, True)) is None
+        assert HistogramCache.get(preview) == (BUCKETS, (0.1, 0.2))
+
+    def test_put_and_get(self):
+        """Test round trip through the memory layer."""
+        key = HistogramCache.key("a.jpg", 1.0, 10, True)
+        HistogramCache.put(key, BUCKETS, (0.1, 0.2))
+        assert HistogramCache.get(key) == (BUCKETS, (0.1, 0.2))
+        assert HistogramCache.get(HistogramCache.key("b.jpg", 1.0, 10, True)) is None
+
+    def test_lru_eviction(self, monkeypatch):
+        """Test that the least recently used entry is dropped first."""
+        monkeypatch.setattr(HistogramCache, "MAX_ENTRIES", 2)
+        a, b, c = (HistogramCache.key(n, 1.0, 1, True) for n in "abc")
+        HistogramCache.put(a, BUCKETS, (0, 0))
+        HistogramCache.put(b, BUCKETS, (0, 0))
+        HistogramCache.get(a)
+        HistogramCache.put(c, BUCKETS, (0, 0))
+
+        assert HistogramCache.get(a) is not None
+        assert HistogramCache.get(b) is None
+        assert HistogramCache.get(c) is not None
+
+    def test_disk_layer_survives_memory_clear(self, tmp_path):
+        """Test that entries are reloaded from disk after the memory cache is cleared."""
+        HistogramCache.set_disk_dir(str(tmp_path / "cache"))
+        key = HistogramCache.key("a.jpg", 1.0, 10, False)
+        HistogramCache.put(key, [[5] * 256], (0.5, 0.0))
+        HistogramCache.clear()
+
+        assert HistogramCache.get(key) == ([[5] * 256], (0.5, 0.0))
+        assert len(list((tmp_path / "cache").iterdir())) == 1
+
+    def test_corrupt_disk_entry_is_ignored(self, tmp_path):
+        """Test that unreadable files count as a miss."""
+        HistogramCache.set_disk_dir(str(tmp_path))
+        key = HistogramCache.key("a.jpg", 1.0, 10, True)
+        HistogramCache.put(key, BUCKETS, (0, 0))
+        HistogramCache.clear()
+        for f in tmp_path.iterdir():
+            f.write_text("{not json")
+
+        assert HistogramCache.get(key) is None
@@ -0,0 +1,171 @@
+"""
+Tests for IdentifyPipeline - background identification of dropped files.
+"""
+import os
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from managers import ExifManager
+from widgets.identify_pipeline import CHUNK_SIZE, IdentifyPipeline
+from widgets.image_card import ImageInfo
+
+SIMULATIONS = {"Match": {"Name": "Match", "FilmMode": "Classic Chrome"}}
+
+
+def wait_until(qapp, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    return condition()
+
+
+class Stubs:
+    """Records the order of metadata reads and matches; decoding can be held back."""
+
+    def __init__(self, monkeypatch):
+        self.log = []
+        self.gate = {}    # filename prefix -> Event the decode waits for
+        self._lock = threading.Lock()
+        monkeypatch.setattr(ExifManager, "get_exif_batch", self.get_exif_batch)
+        monkeypatch.setattr(ExifManager, "get_exif", lambda filename, mode: {})
+        monkeypatch.setattr("widgets.identify_pipeline.load_card_image", self.load_card_image)
+
+    def get_exif_batch(self, filenames, keys):
+        with self._lock:
+            self.log.append(("meta", filenames[0]))
+        return {f: {"FilmMode": "Classic Chrome"} for f in filenames}
+
+    def load_card_image(self, filename):
+        gate = self.gate.get(filename[0])
+        if gate is not None:
+            gate.wait(5)
+        return Image.new("RGB", (4, 4)), ImageInfo(filename, 4, 4, 0.0, 0)
+
+    def match(self, exif_data):
+        return "Match"
+
+
+@pytest.fixture
+def pipeline(qapp):
+    pipeline = IdentifyPipeline(max_workers=2)
+    results, state = [], {"finished": 0}
+    pipeline.result_ready.connect(lambda index, result: results.append((index, result.filename)))
+    pipeline.finished.connect(lambda: state.__setitem__("finished", state["finished"] + 1))
+    yield pipeline, results, state
+    pipeline.cancel()
+
+
+def files(prefix, count):
+    return [f"{prefix}{i:03d}.jpg" for i in range(count)]
+
+
+# ============================================================================
+# Tests for ordering
+# ============================================================================
+
+class TestOrdering:
+    """Tests for the chunked metadata / decode overlap."""
+
+    def test_metadata_read_one_chunk_ahead(self, qapp, pipeline, monkeypatch):
+        """Test that chunk n+1's metadata is read before chunk n is matched."""
+        pipe, results, state = pipeline
+        stubs = Stubs(monkeypatch)
+        names = files("a", 2 * CHUNK_SIZE + 3)
+
+        def match(exif_data):
+            stubs.log.append(("match",))
+            return "Match"
+
+        pipe.start(names, {"FilmMode"}, match, SIMULATIONS, lambda exif_data: [])
+        assert wait_until(qapp, lambda: state["finished"])
+
+        metas = [i for i, entry in enumerate(stubs.log) if entry[0] == "meta"]
+        matches = [i for i, entry in enumerate(stubs.log) if entry[0] == "match"]
+        assert [stubs.log[i][1] for i in metas] == names[::CHUNK_SIZE]
+        assert metas[1] < matches[0]                    # chunk 1 read before chunk 0 matched
+        assert metas[2] < matches[CHUNK_SIZE]           # chunk 2 read before chunk 1 matched
+        assert metas[2] > matches[CHUNK_SIZE - 1]       # ... but not before chunk 0 was done
+
+    def test_results_in_file_order(self, qapp, pipeline, monkeypatch):
+        """Test that every file is reported once, in input order."""
+        pipe, results, state = pipeline
+        stubs = Stubs(monkeypatch)
+        names = files("a", CHUNK_SIZE + 5)
+
+        pipe.start(names, {"FilmMode"}, stubs.match, SIMULATIONS, lambda exif_data: [])
+        assert wait_until(qapp, lambda: state["finished"])
+
+        assert results == list(enumerate(names))
+
+
+# ============================================================================
+# Tests for cancel and superseded runs
+# ============================================================================
+
+class TestCancel:
+    """Tests for cancelling and replacing a run."""
+
+    def test_cancel_stops_remaining_files(self, qapp, pipeline, monkeypatch):
+        """Test that no file is matched after cancel()."""
+        pipe, results, state = pipeline
+        Stubs(monkeypatch)
+        matched = []
+
+        def match(exif_data):
+            matched.append(1)
+            if len(matched) == 3:
+                pipe.cancel()
+            return "Match"
+
+        pipe.start(files("a", 2 * CHUNK_SIZE), {"FilmMode"}, match, SIMULATIONS,
+                   lambda exif_data: [])
+        assert wait_until(qapp, lambda: state["finished"])
+
+        assert len(matched) == 3
+        assert [index for index, _ in results] == [0, 1, 2]
+
+    def test_second_run_drops_results_of_first(self, qapp, pipeline, monkeypatch):
+        """Test that only the second run's results reach result_ready, in order."""
+        pipe, results, state = pipeline
+        stubs = Stubs(monkeypatch)
+        matching, release = threading.Event(), threading.Event()
+
+        def first_match(exif_data):
+            matching.set()
+            release.wait(5)
+            return "Match"
+
+        pipe.start(files("a", CHUNK_SIZE), {"FilmMode"}, first_match, SIMULATIONS,
+                   lambda exif_data: [])
+        assert matching.wait(5)     # the first run is past its cancel check
+
+        second = files("b", CHUNK_SIZE + 2)
+        pipe.start(second, {"FilmMode"}, stubs.match, SIMULATIONS, lambda exif_data: [])
+        release.set()               # ... so it still emits one result, for the old run
+        assert wait_until(qapp, lambda: state["finished"])
+        wait_until(qapp, lambda: False, timeout=0.2)   # let late signals of the first run arrive
+
+        assert results == list(enumerate(second))
+        assert state["finished"] == 1
+
+    def test_simulations_copied_per_run(self, qapp, pipeline, monkeypatch):
+        """Test that editing recipes during a run does not change its results."""
+        pipe, results, state = pipeline
+        stubs = Stubs(monkeypatch)
+        gate = stubs.gate["a"] = threading.Event()
+        simulations = {"Match": dict(SIMULATIONS["Match"])}
+        sim_data = []
+        pipe.result_ready.connect(lambda index, result: sim_data.append(result.sim_data))
+
+        pipe.start(files("a", 2), {"FilmMode"}, stubs.match, simulations, lambda exif_data: [])
+        simulations.clear()        # recipe deleted while the run is decoding
+        gate.set()
+        assert wait_until(qapp, lambda: state["finished"])
+
+        assert sim_data == [SIMULATIONS["Match"]] * 2
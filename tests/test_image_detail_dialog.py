@@ -0,0 +1,153 @@
+"""
+Tests for ImageDetailDialog - progressive loading, 1:1 zoom and resize handling.
+"""
+import os
+import time
+
+import pytest
+from PIL import Image
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt6.QtCore import QPointF
+
+from managers import ImageManager
+from widgets.image_card import load_card_image
+from widgets.image_detail_dialog import RESIZE_SETTLE_MS, SCALED_CACHE_SIZE, ImageDetailDialog
+
+
+def wait_until(qapp, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    return condition()
+
+
+@pytest.fixture
+def photo(tmp_path):
+    path = str(tmp_path / "photo.jpg")
+    Image.linear_gradient("L").resize((3200, 2400)).convert("RGB").save(path, "JPEG")
+    ImageManager.clear_cache()
+    yield path
+    ImageManager.clear_cache()
+
+
+@pytest.fixture
+def open_dialog(qapp):
+    dialogs = []
+
+    def open_dialog(path, thumb=None):
+        dialog = ImageDetailDialog(None, path, {"Name": "Test"}, {}, {}, thumb=thumb)
+        dialogs.append(dialog)
+        return dialog
+
+    yield open_dialog
+    for dialog in dialogs:
+        dialog.close()
+    qapp.processEvents()
+
+
+# ============================================================================
+# Tests for progressive loading
+# ============================================================================
+
+class TestProgressiveLoad:
+    """Tests for the thumbnail -> screen-sized -> full-resolution sources."""
+
+    def test_opens_with_thumbnail_then_screen_image(self, qapp, photo, open_dialog):
+        """Test that the card thumbnail is shown at once and replaced by a screen-sized decode."""
+        thumb, _info = load_card_image(photo)
+        dialog = open_dialog(photo, thumb)
+
+        assert (dialog._pixmap.width(), dialog._pixmap.height()) == thumb.size
+        assert not dialog._img_label.pixmap().isNull()
+
+        assert wait_until(qapp, lambda: dialog._pixmap.width() > thumb.width)
+        box_w, box_h = dialog._screen_box
+        assert dialog._pixmap.width() <= box_w and dialog._pixmap.height() <= box_h
+        assert dialog._pixmap.width() < 3200
+        assert dialog._full_img is None
+
+    def test_zoom_decodes_full_image_and_shows_viewport_region(self, qapp, photo, open_dialog):
+        """Test that 1:1 zoom loads full resolution and converts only the visible part."""
+        dialog = open_dialog(photo)
+        dialog.show()
+        assert wait_until(qapp, lambda: not dialog._pixmap.isNull())
+
+        dialog._toggle_zoom(QPointF(dialog._img_label.width() / 2, dialog._img_label.height() / 2))
+
+        assert wait_until(qapp, lambda: dialog._full_img is not None)
+        assert dialog._full_img.size == (3200, 2400)
+        shown = dialog._img_label.pixmap()
+        dpr = dialog.devicePixelRatioF()
+        assert shown.width() <= dialog._img_label.width() * dpr
+        assert shown.height() <= dialog._img_label.height() * dpr
+
+    def test_stale_load_ignored(self, qapp, photo, open_dialog):
+        """Test that a load started before a source change does not replace the new source."""
+        dialog = open_dialog(photo)
+        assert wait_until(qapp, lambda: not dialog._pixmap.isNull())
+        screen = dialog._pixmap
+
+        dialog._generation += 1
+        dialog._on_loaded(dialog._generation - 1, "screen", Image.new("RGB", (10, 10)))
+
+        assert dialog._pixmap is screen
+
+
+# ============================================================================
+# Tests for resize handling
+# ============================================================================
+
+class TestResize:
+    """Tests for the fitted-pixmap cache and the resize debounce."""
+
+    @pytest.fixture
+    def dialog(self, qapp, photo, open_dialog):
+        dialog = open_dialog(photo)
+        assert wait_until(qapp, lambda: not dialog._pixmap.isNull())
+        return dialog
+
+    def test_fitted_sizes_kept_in_lru(self, dialog):
+        """Test that smooth scales are cached per size, bounded to SCALED_CACHE_SIZE."""
+        dialog._scaled.clear()
+        sizes = [(400 + 10 * i, 300 + 10 * i) for i in range(SCALED_CACHE_SIZE + 2)]
+        first = dialog._fitted(*sizes[0], smooth=True)
+        for size in sizes[1:]:
+            dialog._fitted(*size, smooth=True)
+
+        assert list(dialog._scaled) == sizes[2:]
+        assert dialog._fitted(*sizes[-1], smooth=True) is dialog._scaled[sizes[-1]]
+        assert dialog._fitted(*sizes[0], smooth=True) is not first     # evicted, scaled again
+        assert list(dialog._scaled)[-1] == sizes[0]
+
+    def test_fast_preview_not_cached(self, dialog):
+        """Test that drag-time fast scales neither enter the cache nor scale the full pixmap."""
+        cached = list(dialog._scaled)
+
+        dialog._fitted(300, 200, smooth=False)
+
+        assert list(dialog._scaled) == cached
+        assert dialog._mip_for(300, 200).width() < dialog._pixmap.width()
+
+    def test_resize_burst_smoothed_once(self, qapp, dialog, monkeypatch):
+        """Test that resizes show fast previews and one smooth scale after RESIZE_SETTLE_MS."""
+        dialog.show()
+        qapp.processEvents()
+        calls = []
+        monkeypatch.setattr(dialog, "_update_image",
+                            lambda smooth=True: calls.append((smooth, time.monotonic())))
+        dialog._resize_timer.stop()
+        dialog._resize_timer.timeout.disconnect()
+        dialog._resize_timer.timeout.connect(dialog._update_image)
+
+        start = time.monotonic()
+        for step in range(10):
+            dialog.resize(1200 + 20 * step, 900 + 10 * step)
+        assert [smooth for smooth, _t in calls] == [False] * 10
+
+        assert wait_until(qapp, lambda: len(calls) > 10, timeout=1.0)
+        wait_until(qapp, lambda: len(calls) > 11, timeout=3 * RESIZE_SETTLE_MS / 1000)
+        smooth_calls = [t for smooth, t in calls if smooth]
+        assert len(smooth_calls) == 1
+        assert smooth_calls[0] - start >= RESIZE_SETTLE_MS / 1000 * 0.9
@@ -0,0 +1,301 @@
+"""
+Tests for ImageManager - shared, size-targeted and cached image loading.
+"""
+import io
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from managers import image_manager
+from managers.image_manager import ImageManager, apply_orientation
+from widgets.image_card import RAW_PREVIEW, TooltipImageLabel, load_card_image
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    ImageManager.clear_cache()
+    yield
+    ImageManager.clear_cache()
+
+
+def marked_image(size=(60, 40)):
+    """Landscape image, red in the top-left corner and blue elsewhere."""
+    img = Image.new("RGB", size, (0, 0, 255))
+    img.paste((255, 0, 0), (0, 0, 10, 10))
+    return img
+
+
+def save_jpeg(tmp_path, img, orientation=None, name="photo.jpg"):
+    path = tmp_path / name
+    exif = Image.Exif()
+    if orientation is not None:
+        exif[0x0112] = orientation
+    img.save(path, "JPEG", quality=95, exif=exif.tobytes())
+    return str(path)
+
+
+def is_red(pixel):
+    r, g, b = pixel
+    return r > 200 and b < 80
+
+
+# ============================================================================
+# Tests for apply_orientation
+# ============================================================================
+
+class TestApplyOrientation:
+    """Tests for all eight EXIF orientations."""
+
+    # Where the red top-left marker ends up once the image is upright
+    EXPECTED = {
+        1: ("top-left", (60, 40)),
+        2: ("top-right", (60, 40)),
+        3: ("bottom-right", (60, 40)),
+        4: ("bottom-left", (60, 40)),
+        5: ("top-left", (40, 60)),
+        6: ("top-right", (40, 60)),
+        7: ("bottom-right", (40, 60)),
+        8: ("bottom-left", (40, 60)),
+    }
+
+    @pytest.mark.parametrize("orientation", range(1, 9))
+    def test_orientation(self, tmp_path, orientation):
+        """Test that every orientation value produces the upright image."""
+        path = save_jpeg(tmp_path, marked_image(), orientation)
+        corner, size = self.EXPECTED[orientation]
+
+        img = apply_orientation(Image.open(path)).convert("RGB")
+
+        assert img.size == size
+        w, h = img.size
+        points = {
+            "top-left": (2, 2), "top-right": (w - 3, 2),
+            "bottom-left": (2, h - 3), "bottom-right": (w - 3, h - 3),
+        }
+        assert is_red(img.getpixel(points[corner]))
+        assert all(not is_red(img.getpixel(p)) for c, p in points.items() if c != corner)
+
+    def test_missing_tag_is_noop(self):
+        """Test images without EXIF."""
+        img = marked_image()
+        assert apply_orientation(img) is img
+
+
+# ============================================================================
+# Tests for ImageManager.load
+# ============================================================================
+
+class TestImageManagerLoad:
+    """Tests for sizing, the original size and the cache."""
+
+    def test_full_resolution_and_original_size(self, tmp_path):
+        """Test loading without a box keeps every pixel."""
+        path = save_jpeg(tmp_path, marked_image((600, 400)), orientation=6)
+        img, size = ImageManager.load(path)
+        assert img.size == (400, 600)
+        assert size == (400, 600)
+        assert img.mode == "RGB"
+
+    def test_box_fits_and_reports_original_size(self, tmp_path):
+        """Test size-targeted decoding."""
+        path = save_jpeg(tmp_path, marked_image((1600, 1200)))
+        img, size = ImageManager.load(path, (200, 200))
+        assert img.size == (200, 150)
+        assert size == (1600, 1200)
+
+    def test_repeated_load_is_cached(self, tmp_path, monkeypatch):
+        """Test that the second call for the same box does not decode."""
+        path = save_jpeg(tmp_path, marked_image((800, 600)))
+        calls = []
+        decode = ImageManager._decode
+        monkeypatch.setattr(ImageManager, "_decode",
+                            staticmethod(lambda f, b, d: calls.append(b) or decode(f, b, d)))
+
+        first = ImageManager.load(path, (100, 100))
+        second = ImageManager.load(path, (100, 100))
+
+        assert calls == [(100, 100)]
+        assert first[0] is second[0]
+
+    def test_smaller_box_derived_from_larger_entry(self, tmp_path, monkeypatch):
+        """Test that a smaller request is served from a cached larger decode."""
+        path = save_jpeg(tmp_path, marked_image((1600, 1200)))
+        ImageManager.load(path, (800, 800))
+        calls = []
+        monkeypatch.setattr(ImageManager, "_decode",
+                            staticmethod(lambda f, b, d: calls.append(b)))
+
+        img, size = ImageManager.load(path, (200, 200))
+
+        assert calls == []
+        assert img.size == (200, 150)
+        assert size == (1600, 1200)
+
+    def test_larger_box_is_decoded(self, tmp_path, monkeypatch):
+        """Test that a small entry is never upscaled for a larger request."""
+        path = save_jpeg(tmp_path, marked_image((1600, 1200)))
+        ImageManager.load(path, (100, 100))
+
+        img, _size = ImageManager.load(path, (800, 800))
+
+        assert img.size == (800, 600)
+
+    def test_full_resolution_served_from_unreduced_entry(self, tmp_path, monkeypatch):
+        """Test that box=None reuses a sized entry only if it was not reduced."""
+        small = save_jpeg(tmp_path, marked_image((400, 300)), name="small.jpg")
+        large = save_jpeg(tmp_path, marked_image((1600, 1200)), name="large.jpg")
+        screen, _ = ImageManager.load(small, (800, 800))
+        ImageManager.load(large, (800, 800))
+        decode = ImageManager._decode
+        calls = []
+        monkeypatch.setattr(ImageManager, "_decode",
+                            staticmethod(lambda f, b, d: calls.append(f) or decode(f, b, d)))
+
+        full_small, _ = ImageManager.load(small)
+        full_large, _ = ImageManager.load(large)
+
+        assert full_small is screen
+        assert full_large.size == (1600, 1200)
+        assert calls == [large]
+
+    def test_modified_file_is_reloaded(self, tmp_path):
+        """Test that the cache key follows mtime and size."""
+        path = save_jpeg(tmp_path, marked_image((80, 60)))
+        first, _ = ImageManager.load(path)
+        save_jpeg(tmp_path, marked_image((120, 60)))
+        os.utime(path, (1, 1))
+
+        second, _ = ImageManager.load(path)
+
+        assert first.size == (80, 60)
+        assert second.size == (120, 60)
+
+    def test_cache_bounded_by_bytes(self, tmp_path, monkeypatch):
+        """Test least recently used eviction once the byte budget is exceeded."""
+        monkeypatch.setattr(ImageManager, "CACHE_BYTES", 100 * 100 * 3 * 2)
+        paths = [save_jpeg(tmp_path, marked_image((100, 100)), name=f"{i}.jpg") for i in range(3)]
+        for path in paths:
+            ImageManager.load(path)
+
+        assert ImageManager._cache_bytes <= ImageManager.CACHE_BYTES
+        cached = {key[0] for key in ImageManager._cache}
+        assert os.path.abspath(paths[0]) not in cached
+        assert os.path.abspath(paths[2]) in cached
+
+    def test_raf_box_uses_embedded_preview(self, tmp_path, monkeypatch):
+        """Test that RAF thumbnails never reach rawpy."""
+        jpeg_path = save_jpeg(tmp_path, marked_image((400, 300)))
+        jpeg = open(jpeg_path, "rb").read()
+        raf = tmp_path / "DSCF0001.RAF"
+        header = b"FUJIFILMCCD-RAW ".ljust(84, b"\x00") + (100).to_bytes(4, "big") + len(jpeg).to_bytes(4, "big")
+        raf.write_bytes(header.ljust(100, b"\x00") + jpeg)
+        monkeypatch.setattr(image_manager, "_open_raw", lambda f: pytest.fail("rawpy used"))
+
+        img, size = ImageManager.load(str(raf), (100, 100))
+
+        assert img.size == (100, 75)
+        assert size == (400, 300)
+
+
+# ============================================================================
+# Tests for the RAW preview path
+# ============================================================================
+
+def fake_rawpy(thumb_image, flip=0, size=(6000, 4000)):
+    """Stand-in rawpy module whose extract_thumb() returns thumb_image as JPEG."""
+    buf = io.BytesIO()
+    thumb_image.save(buf, "JPEG", quality=95)
+    raw = SimpleNamespace(
+        extract_thumb=lambda: SimpleNamespace(format="jpeg", data=buf.getvalue()),
+        sizes=SimpleNamespace(flip=flip, width=size[0], height=size[1]),
+    )
+
+    class Reader:
+        def __enter__(self):
+            return raw
+
+        def __exit__(self, *exc):
+            return False
+
+    return SimpleNamespace(imread=lambda f: Reader(), ThumbFormat=SimpleNamespace(JPEG="jpeg"))
+
+
+class TestRawPreviews:
+    """Tests for embedded previews versus full demosaicing."""
+
+    @pytest.fixture(autouse=True)
+    def restore_setting(self):
+        yield
+        ImageManager.set_raw_previews(True)
+
+    @pytest.fixture
+    def nef(self, tmp_path, monkeypatch):
+        path = tmp_path / "DSC_0001.NEF"
+        path.write_bytes(b"not really a nef")
+        monkeypatch.setitem(sys.modules, "rawpy", fake_rawpy(marked_image((400, 300)), flip=6))
+        return str(path)
+
+    def test_nef_uses_extract_thumb_and_flip(self, nef, monkeypatch):
+        """Test that other RAW formats use the rawpy thumbnail rotated by sizes.flip."""
+        monkeypatch.setattr(image_manager, "_open_raw", lambda f: pytest.fail("demosaiced"))
+
+        img, size = ImageManager.load(nef, (100, 100))
+
+        assert size == (300, 400)
+        assert img.size == (75, 100)
+        full, _ = ImageManager.load(nef)
+        assert is_red(full.getpixel((full.width - 3, 2)))
+        assert not is_red(full.getpixel((2, 2)))
+
+    def test_demosaic_bypasses_preview(self, nef, monkeypatch):
+        """Test that demosaic=True decodes the RAW data and is cached separately."""
+        monkeypatch.setattr(image_manager, "_open_raw", lambda f: Image.new("RGB", (600, 400)))
+
+        preview, _ = ImageManager.load(nef, (100, 100))
+        full, size = ImageManager.load(nef, (100, 100), demosaic=True)
+
+        assert size == (600, 400)
+        assert full.size == (100, 67)
+        assert preview.size == (75, 100)
+
+    def test_setting_disables_previews(self, nef, monkeypatch):
+        """Test that set_raw_previews(False) makes every RAW load demosaic."""
+        calls = []
+        monkeypatch.setattr(image_manager, "_open_raw",
+                            lambda f: calls.append(f) or Image.new("RGB", (600, 400)))
+        ImageManager.set_raw_previews(False)
+
+        ImageManager.load(nef, (100, 100))
+
+        assert calls == [nef]
+        assert not ImageManager.uses_raw_preview(nef)
+
+    def test_uses_raw_preview(self):
+        """Test that only RAW extensions report the preview path."""
+        assert ImageManager.uses_raw_preview("a/DSCF0001.RAF")
+        assert not ImageManager.uses_raw_preview("a/photo.jpg")
+
+    def test_card_info_reports_sensor_size(self, nef):
+        """Test that card info holds the RAW size, turned like the preview."""
+        thumb, info = load_card_image(nef)
+
+        assert ImageManager.raw_size(nef) == (6000, 4000)
+        assert thumb.height > thumb.width      # portrait preview (flip=6)
+        assert (info.width, info.height) == (4000, 6000)
+        assert info.source == RAW_PREVIEW and not info.preview_size
+
+    def test_card_info_flags_preview_size(self, qapp, nef, monkeypatch):
+        """Test that the tooltip labels the preview size when the RAW size cannot be read."""
+        monkeypatch.setattr(ImageManager, "raw_size", staticmethod(lambda f: None))
+
+        _thumb, info = load_card_image(nef)
+        tooltip = TooltipImageLabel(nef, info)._format_exif_tooltip({"Model": "Z 6"}, info)
+
+        assert (info.width, info.height) == (300, 400)
+        assert info.preview_size
+        assert "Preview resolution: 300x400" in tooltip
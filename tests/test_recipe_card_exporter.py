@@ -0,0 +1,235 @@
+"""
+Tests for the recipe card exporter - background construction and rendering.
+"""
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageFont, ImageStat
+
+from exporters import recipe_card_exporter
+from exporters.recipe_card_exporter import (
+    BG_BLUR_RADIUS, CARD_H, CARD_W, CardOutput, _blurred_background, _dominant_color,
+    export_recipe_card, export_recipe_card_outputs, render_recipe_card, save_card, with_card_extension
+)
+
+
+def reference_background(img):
+    """The original full-size LANCZOS resize + radius 40 blur."""
+    return img.resize((CARD_W, CARD_H), Image.LANCZOS).filter(ImageFilter.GaussianBlur(radius=BG_BLUR_RADIUS))
+
+
+def reference_dominant_color(img):
+    """The original per-pixel Python average."""
+    small = img.copy().convert("RGB")
+    small.thumbnail((50, 50))
+    data = small.tobytes()
+    count = len(data) // 3
+    return tuple(sum(data[i::3]) // count for i in range(3))
+
+
+def best_of(fn, n=3):
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+@pytest.fixture(scope="module")
+def photo():
+    """Detailed test image at the exporter's decode size: gradient, shapes and noise."""
+    rnd = random.Random(3)
+    size = (2 * CARD_W, 2 * CARD_H)
+    img = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for _ in range(200):
+        x, y, r = rnd.randrange(size[0]), rnd.randrange(size[1]), rnd.randrange(10, 200)
+        draw.ellipse((x, y, x + r, y + r), fill=tuple(rnd.randrange(256) for _ in range(3)))
+    return Image.blend(img, Image.effect_noise(size, 60).convert("RGB"), 0.3)
+
+
+# ============================================================================
+# Tests for _dominant_color / _blurred_background
+# ============================================================================
+
+class TestBackground:
+    """Parity of the background with the original construction."""
+
+    def test_dominant_color_parity(self, photo):
+        """Test that ImageStat gives the same average as the per-pixel loop."""
+        assert _dominant_color(photo) == reference_dominant_color(photo)
+        gray = photo.convert("L")
+        assert _dominant_color(gray) == reference_dominant_color(gray)
+
+    def test_background_visually_equivalent(self, photo):
+        """Test that the downscaled blur differs from the full-size one by under 1 level on average."""
+        expected = reference_background(photo)
+
+        result = _blurred_background(photo, (CARD_W, CARD_H), BG_BLUR_RADIUS)
+
+        assert result.size == (CARD_W, CARD_H)
+        diff = ImageChops.difference(expected, result)
+        assert max(ImageStat.Stat(diff).mean) < 1.0
+        assert max(high for _low, high in diff.getextrema()) <= 16
+
+
+# ============================================================================
+# Tests for export_recipe_card
+# ============================================================================
+
+class TestExportRecipeCard:
+    """Tests for the rendered card."""
+
+    def test_writes_card(self, tmp_path, photo):
+        """Test that a 4:5 card is written to the output path."""
+        src = tmp_path / "photo.jpg"
+        photo.save(src, "JPEG")
+        out = tmp_path / "cards" / "card.png"
+
+        result = export_recipe_card(str(src), {"Name": "Test", "FilmMode": "Classic Chrome"}, str(out))
+
+        assert result == str(out)
+        assert Image.open(out).size == (CARD_W, CARD_H)
+
+    @pytest.fixture
+    def source(self, tmp_path, photo):
+        path = tmp_path / "photo.jpg"
+        photo.save(path, "JPEG")
+        return str(path)
+
+    @pytest.mark.parametrize("ext, fmt", [(".png", "PNG"), (".jpg", "JPEG"), (".jpeg", "JPEG"), (".webp", "WEBP")])
+    def test_format_from_extension(self, tmp_path, source, ext, fmt):
+        """Test that the output format follows the file extension."""
+        out = export_recipe_card(source, {"Name": "Test"}, str(tmp_path / f"card{ext}"))
+        assert Image.open(out).format == fmt
+
+    def test_unknown_extension_rejected(self, tmp_path, source):
+        """Test that an unsupported extension raises instead of guessing."""
+        with pytest.raises(ValueError):
+            export_recipe_card(source, {"Name": "Test"}, str(tmp_path / "card.tiff"))
+
+    def test_outputs_share_one_render(self, tmp_path, source, monkeypatch):
+        """Test that several formats and sizes are encoded from a single layout render."""
+        renders = []
+        render = recipe_card_exporter.render_recipe_card
+        monkeypatch.setattr(recipe_card_exporter, "render_recipe_card",
+                            lambda *a, **k: renders.append(a) or render(*a, **k))
+        outputs = [
+            CardOutput(str(tmp_path / "card.png")),
+            CardOutput(str(tmp_path / "story.jpg"), (1080, 1920), quality=80),
+            CardOutput(str(tmp_path / "square.webp"), (1080, 1080), "WEBP", 80),
+        ]
+
+        paths = export_recipe_card_outputs(source, {"Name": "Test"}, outputs)
+
+        assert len(renders) == 1
+        assert [Image.open(p).size for p in paths] == [(CARD_W, CARD_H), (1080, 1920), (1080, 1080)]
+        assert [Image.open(p).format for p in paths] == ["PNG", "JPEG", "WEBP"]
+
+    def test_fitted_card_is_not_upscaled(self, source):
+        """Test that the story keeps the card at native size and the square shrinks it."""
+        card = render_recipe_card(source, {"Name": "Test"})
+
+        story = recipe_card_exporter._fit_card(card, (1080, 1920))
+        square = recipe_card_exporter._fit_card(card, (1080, 1080))
+
+        # The card's own pixels sit unscaled in the centre of the story
+        x, y = (1080 - CARD_W) // 2, (1920 - CARD_H) // 2
+        assert story.crop((x + 40, y + 40, x + 200, y + 200)).tobytes() == card.image.crop((40, 40, 200, 200)).tobytes()
+        assert square.size == (1080, 1080)
+
+    @pytest.mark.benchmark
+    def test_render_faster_than_reference(self, source, monkeypatch):
+        """Benchmark: a whole card renders over twice as fast as with the original background."""
+        after = best_of(lambda: render_recipe_card(source, {"Name": "Test"}))
+        monkeypatch.setattr(recipe_card_exporter, "_blurred_background",
+                            lambda img, size, radius: reference_background(img))
+        monkeypatch.setattr(recipe_card_exporter, "_dominant_color", reference_dominant_color)
+        before = best_of(lambda: render_recipe_card(source, {"Name": "Test"}))
+
+        assert after * 2 < before
+
+    def test_with_card_extension(self):
+        """Test that a missing extension comes from the chosen save filter."""
+        assert with_card_extension("/a/card", "WebP Image (*.webp)") == "/a/card.webp"
+        assert with_card_extension("/a/card", "JPEG Image (*.jpg *.jpeg)") == "/a/card.jpg"
+        assert with_card_extension("/a/card.PNG", "JPEG Image (*.jpg *.jpeg)") == "/a/card.PNG"
+
+    def test_jpeg_smaller_than_png(self, tmp_path, source):
+        """Test that JPEG output is several times smaller than PNG."""
+        card = render_recipe_card(source, {"Name": "Test"})
+        sizes = {}
+        for name in ("card.png", "card.jpg"):
+            path = save_card(card, CardOutput(str(tmp_path / name)))
+            sizes[name] = os.path.getsize(path)
+
+        assert sizes["card.jpg"] * 3 < sizes["card.png"]
+
+
+# ============================================================================
+# Tests for the cached fonts, masks and layout
+# ============================================================================
+
+@pytest.fixture
+def fresh_caches():
+    caches = (recipe_card_exporter._font_name, recipe_card_exporter._try_font,
+              recipe_card_exporter._text_width, recipe_card_exporter._layout,
+              recipe_card_exporter._rounded_rect_mask)
+    for cache in caches:
+        cache.cache_clear()
+    yield
+    for cache in caches:
+        cache.cache_clear()
+
+
+class TestResourceCache:
+    """Tests that per-process resources are resolved once and shared."""
+
+    def test_fonts_probed_once_across_exports(self, tmp_path, photo, monkeypatch, fresh_caches):
+        """Test that TrueType lookups do not repeat for the second card."""
+        src = tmp_path / "photo.jpg"
+        photo.save(src, "JPEG")
+        calls = []
+        truetype = ImageFont.truetype
+        monkeypatch.setattr(ImageFont, "truetype", lambda *a, **k: calls.append(a) or truetype(*a, **k))
+
+        render_recipe_card(str(src), {"Name": "One"})
+        first = len(calls)
+        render_recipe_card(str(src), {"Name": "Two"})
+
+        assert len(calls) == first
+
+    def test_fallback_without_truetype_fonts(self, monkeypatch, fresh_caches):
+        """Test that the built-in font is used, at the requested size, when no candidate loads."""
+        def missing(font, *args, **kwargs):
+            if isinstance(font, str):
+                raise OSError("cannot open resource")
+            return truetype(font, *args, **kwargs)
+        truetype = ImageFont.truetype
+        monkeypatch.setattr(ImageFont, "truetype", missing)
+
+        font = recipe_card_exporter._try_font(26, bold=True)
+
+        assert recipe_card_exporter._font_name(True) is None
+        assert getattr(font, "size", 26) == 26
+
+    def test_mask_shared(self, fresh_caches):
+        """Test that the rounded mask is built once per size and radius."""
+        mask = recipe_card_exporter._rounded_rect_mask((100, 80), 12)
+        assert recipe_card_exporter._rounded_rect_mask((100, 80), 12) is mask
+        assert recipe_card_exporter._rounded_rect_mask((100, 80), 16) is not mask
+
+    def test_concurrent_renders_identical(self, tmp_path, photo, fresh_caches):
+        """Test that threads sharing the caches render the same card."""
+        src = tmp_path / "photo.jpg"
+        photo.save(src, "JPEG")
+        recipe = {"Name": "Test", "FilmMode": "Classic Chrome", "HighlightTone": "-1 (medium soft)"}
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            cards = list(pool.map(lambda _: render_recipe_card(str(src), recipe).image.tobytes(), range(8)))
+
+        assert all(card == cards[0] for card in cards)
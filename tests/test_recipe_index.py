@@ -0,0 +1,114 @@
+"""
+Tests for RecipeIndex - hash-indexed exact recipe matching.
+"""
+import random
+
+import pytest
+
+from constants import Constants
+from managers.recipe_index import RecipeIndex
+from managers.xml_manager import XMLManager
+
+
+def linear_compare(simulations, exif_data):
+    """Reference implementation: the original linear scan from MainWindow._compare."""
+    skip = Constants.MATCH_SKIP_FIELDS
+    for sim_name, sim_data in simulations.items():
+        if all(exif_data.get(k) == v for k, v in sim_data.items() if k not in skip):
+            return sim_name
+    return None
+
+
+@pytest.fixture
+def simulations():
+    return {
+        "Chrome": {"Name": "Chrome", "FilmMode": "Classic Chrome", "Saturation": "+2 (high)",
+                   "WhiteBalance": "Auto", "Sharpness": "-1"},
+        "Kelvin": {"Name": "Kelvin", "Saturation": "0 (normal)",
+                   "WhiteBalance": "Kelvin", "ColorTemperature": "5200"},
+        "Chrome Twin": {"Name": "Chrome Twin", "FilmMode": "Eterna", "Saturation": "+2 (high)",
+                        "WhiteBalance": "Auto", "Sharpness": "+2"},
+    }
+
+
+class TestRecipeIndex:
+    """Tests for RecipeIndex lookup and maintenance."""
+
+    def test_exact_lookup(self, simulations):
+        """Test matching on the compared fields only."""
+        index = RecipeIndex(simulations)
+        exif = {"Saturation": "0 (normal)", "WhiteBalance": "Kelvin",
+                "ColorTemperature": "5200", "Model": "X-T5"}
+        assert index.lookup(exif) == "Kelvin"
+
+    def test_no_match(self, simulations):
+        """Test that a differing field yields None."""
+        index = RecipeIndex(simulations)
+        assert index.lookup({"Saturation": "-1 (medium low)", "WhiteBalance": "Auto"}) is None
+        assert index.lookup({}) is None
+
+    def test_skipped_fields_ignored(self, simulations):
+        """Test that FilmMode/Sharpness differences do not prevent a match."""
+        index = RecipeIndex(simulations)
+        exif = {"Saturation": "+2 (high)", "WhiteBalance": "Auto", "FilmMode": "Astia"}
+        assert index.lookup(exif) == "Chrome"
+
+    def test_first_recipe_wins(self, simulations):
+        """Test that duplicates resolve to the earliest recipe like the linear scan."""
+        index = RecipeIndex(simulations)
+        index.remove("Chrome")
+        assert index.lookup({"Saturation": "+2 (high)", "WhiteBalance": "Auto"}) == "Chrome Twin"
+
+    def test_sync_add_update_delete(self, simulations):
+        """Test incremental maintenance after CRUD operations."""
+        index = RecipeIndex(simulations)
+
+        updated = dict(simulations)
+        updated["Kelvin"] = dict(simulations["Kelvin"], ColorTemperature="6000")
+        updated["New"] = {"Name": "New", "Saturation": "-2 (low)", "WhiteBalance": "Cloudy"}
+        del updated["Chrome"]
+        index.sync(updated)
+
+        assert len(index) == 3
+        assert index.lookup({"Saturation": "0 (normal)", "WhiteBalance": "Kelvin",
+                             "ColorTemperature": "5200"}) is None
+        assert index.lookup({"Saturation": "0 (normal)", "WhiteBalance": "Kelvin",
+                             "ColorTemperature": "6000"}) == "Kelvin"
+        assert index.lookup({"Saturation": "-2 (low)", "WhiteBalance": "Cloudy"}) == "New"
+        assert index.lookup({"Saturation": "+2 (high)", "WhiteBalance": "Auto"}) == "Chrome Twin"
+
+    def test_update_keeps_position(self, simulations):
+        """Test that editing a recipe keeps its precedence."""
+        index = RecipeIndex(simulations)
+        index.add("Chrome", dict(simulations["Chrome"], Sharpness="0"))
+        assert index.lookup({"Saturation": "+2 (high)", "WhiteBalance": "Auto"}) == "Chrome"
+
+    def test_snapshot_unaffected_by_sync(self, simulations):
+        """Test that a snapshot keeps the recipes it was taken with."""
+        index = RecipeIndex(simulations)
+        snapshot = index.snapshot()
+        chrome = {"Saturation": "+2 (high)", "WhiteBalance": "Auto", "FilmMode": "Classic Chrome",
+                  "Sharpness": "-1"}
+
+        updated = dict(simulations, New={"Name": "New", "WhiteBalance": "Cloudy"})
+        del updated["Chrome"]
+        index.sync(updated)
+
+        assert snapshot.lookup(chrome) == "Chrome"
+        assert snapshot.lookup({"WhiteBalance": "Cloudy"}) is None
+        assert index.lookup(chrome) == "Chrome Twin"
+        assert len(snapshot) == 3
+
+    def test_parity_with_linear_scan(self, simulations):
+        """Test identical results to the linear scan on the shipped recipe database."""
+        shipped = XMLManager.load_simulations(Constants.XML_FILE)
+        index = RecipeIndex(shipped)
+        rng = random.Random(0)
+        samples = [dict(data) for data in shipped.values()]
+        for data in list(samples):
+            mutated = dict(data)
+            key = rng.choice(sorted(mutated))
+            mutated[key] = "something else"
+            samples.append(mutated)
+        for exif in samples:
+            assert index.lookup(exif) == linear_compare(shipped, exif)
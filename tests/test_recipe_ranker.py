@@ -0,0 +1,125 @@
+"""
+Tests for RecipeRanker - nearest-recipe ranking by weighted field distance.
+"""
+import time
+
+import pytest
+
+from constants import Constants
+from managers.recipe_ranker import RecipeRanker
+from managers.xml_manager import XMLManager
+
+
+@pytest.fixture
+def simulations():
+    return {
+        "Chrome": {"Name": "Chrome", "FilmMode": "Classic Chrome", "WhiteBalance": "Auto",
+                   "WhiteBalanceFineTune": "Red +2, Blue -4", "HighlightTone": "-1 (medium soft)",
+                   "Saturation": "+2 (high)", "GrainEffectRoughness": "Weak"},
+        "Warm": {"Name": "Warm", "WhiteBalance": "Kelvin", "ColorTemperature": "5200",
+                 "WhiteBalanceFineTune": "Red +4, Blue -6", "HighlightTone": "0 (normal)",
+                 "Saturation": "+4 (highest)", "GrainEffectRoughness": "Strong"},
+        "Mono": {"Name": "Mono", "WhiteBalance": "Auto", "WhiteBalanceFineTune": "Red +0, Blue +0",
+                 "HighlightTone": "+1 (medium hard)", "Saturation": "Acros Red Filter",
+                 "GrainEffectRoughness": "Strong"},
+    }
+
+
+class TestRecipeRanker:
+    """Tests for RecipeRanker.distances and rank."""
+
+    def test_exact_match_has_zero_distance(self, simulations):
+        """Test that a recipe's own values score zero and rank first."""
+        ranker = RecipeRanker(simulations)
+        top = ranker.rank(dict(simulations["Warm"]), k=3)
+
+        assert top[0].name == "Warm"
+        assert top[0].distance == 0.0
+        assert top[0].diff == {}
+        assert [m.distance for m in top] == sorted(m.distance for m in top)
+
+    def test_ordinal_distance(self, simulations):
+        """Test that distance grows with steps on the tone scale."""
+        ranker = RecipeRanker({"Chrome": simulations["Chrome"]})
+        exif = dict(simulations["Chrome"])
+        base = ranker.distances(exif)[0]
+        exif["HighlightTone"] = "-2 (soft)"
+        one_step = ranker.distances(exif)[0]
+        exif["HighlightTone"] = "+1 (medium hard)"
+        two_steps = ranker.distances(exif)[0]
+
+        assert base == 0.0
+        assert one_step == pytest.approx(1.0)
+        assert two_steps == pytest.approx(2.0)
+
+    def test_white_balance_fine_tune_and_kelvin(self, simulations):
+        """Test numeric distance on WB shift and colour temperature."""
+        ranker = RecipeRanker({"Warm": simulations["Warm"]})
+        exif = dict(simulations["Warm"], WhiteBalanceFineTune="Red +3, Blue -4", ColorTemperature="5700")
+
+        assert ranker.distances(exif)[0] == pytest.approx(3.0 + 1.0)
+
+    def test_non_numeric_mismatch(self, simulations):
+        """Test the fixed penalty for B&W filters vs colour saturation."""
+        ranker = RecipeRanker({"Mono": simulations["Mono"]})
+        exif = dict(simulations["Mono"], Saturation="+2 (high)")
+        assert ranker.distances(exif)[0] > 0
+
+    def test_diff_lists_differing_fields(self, simulations):
+        """Test that the diff shows recipe and photo values."""
+        ranker = RecipeRanker(simulations)
+        exif = dict(simulations["Chrome"], GrainEffectRoughness="Strong")
+        top = ranker.rank(exif, k=1)
+
+        assert top[0].name == "Chrome"
+        assert top[0].diff == {"GrainEffectRoughness": ("Weak", "Strong")}
+
+    def test_missing_exif_field(self, simulations):
+        """Test that a field absent from the photo counts as a difference."""
+        ranker = RecipeRanker(simulations)
+        exif = dict(simulations["Chrome"])
+        del exif["Saturation"]
+        top = ranker.rank(exif, k=1)
+
+        assert top[0].name == "Chrome"
+        assert top[0].diff == {"Saturation": ("+2 (high)", None)}
+
+    def test_empty_table(self):
+        """Test ranking without recipes."""
+        assert RecipeRanker({}).rank({"Saturation": "0 (normal)"}) == []
+
+    def test_rebuild(self, simulations):
+        """Test that rebuild picks up changed recipes."""
+        ranker = RecipeRanker(simulations)
+        del simulations["Warm"]
+        ranker.rebuild(simulations)
+        assert {m.name for m in ranker.rank({}, k=5)} == {"Chrome", "Mono"}
+
+    def test_snapshot_unaffected_by_rebuild(self, simulations):
+        """Test that a snapshot keeps ranking the recipes it was taken with."""
+        ranker = RecipeRanker(simulations)
+        snapshot = ranker.snapshot()
+        ranker.rebuild({"Mono": simulations["Mono"]})
+        assert {m.name for m in snapshot.rank({}, k=5)} == {"Chrome", "Mono", "Warm"}
+        assert [m.name for m in ranker.rank({}, k=5)] == ["Mono"]
+
+    def test_shipped_database_exact_first(self):
+        """Test that every shipped recipe ranks itself first at distance 0."""
+        shipped = XMLManager.load_simulations(Constants.XML_FILE)
+        ranker = RecipeRanker(shipped)
+        for exif in list(shipped.values())[:50]:
+            assert ranker.rank(exif, k=3)[0].distance == 0.0
+
+    @pytest.mark.benchmark
+    def test_shipped_database_speed(self):
+        """Benchmark: ranking against the shipped recipes takes under 1 ms per photo."""
+        shipped = XMLManager.load_simulations(Constants.XML_FILE)
+        ranker = RecipeRanker(shipped)
+        samples = list(shipped.values())[:50]
+
+        start = time.perf_counter()
+        for exif in samples:
+            ranker.rank(exif, k=3)
+        per_call = (time.perf_counter() - start) / len(samples)
+
+        assert per_call < 0.001
@@ -0,0 +1,307 @@
+"""
+Tests for RecipeStore - in-memory recipe XML with atomic, debounced writes.
+"""
+import os
+import time
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from managers import recipe_store
+from managers.recipe_store import RecipeStore
+
+XML = """<?xml version='1.0' encoding='utf-8'?>
+<profiles>
+
+  ///
+  ///   (X-TRANS V)
+  ///
+
+  <profile>
+    <Name>First</Name>
+    <FilmMode>Classic Chrome</FilmMode>
+  </profile>
+  <profile>
+    <Name>Second</Name>
+    <FilmMode>Eterna</FilmMode>
+  </profile>
+
+  ///
+  ///   (X-TRANS IV)
+  ///
+
+  <profile>
+    <Name>Third</Name>
+    <FilmMode>Astia</FilmMode>
+  </profile>
+</profiles>"""
+
+
+@pytest.fixture
+def xml_path(tmp_path):
+    path = tmp_path / "recipes.xml"
+    path.write_text(XML, encoding="utf-8")
+    return str(path)
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+# ============================================================================
+# Tests for CRUD
+# ============================================================================
+
+class TestRecipeStoreCrud:
+    """Tests for in-memory mutations written straight through."""
+
+    def test_recipes(self, xml_path):
+        """Test that recipes are listed in file order with all fields."""
+        recipes = RecipeStore(xml_path).recipes()
+        assert list(recipes) == ["First", "Second", "Third"]
+        assert recipes["Second"] == {"Name": "Second", "FilmMode": "Eterna"}
+
+    def test_add_update_delete_persist(self, xml_path):
+        """Test that every mutation reaches the file and reloads identically."""
+        store = RecipeStore(xml_path)
+        store.add({"Name": "Fourth", "FilmMode": "Velvia"})
+        assert store.update({"Name": "Renamed", "FilmMode": "Acros"}, "First")
+        assert store.delete("Second")
+
+        expected = {
+            "Renamed": {"Name": "Renamed", "FilmMode": "Acros"},
+            "Third": {"Name": "Third", "FilmMode": "Astia"},
+            "Fourth": {"Name": "Fourth", "FilmMode": "Velvia"},
+        }
+        assert store.recipes() == expected
+        assert RecipeStore(xml_path).recipes() == expected
+
+    def test_missing_recipe(self, xml_path):
+        """Test that update and delete report unknown names."""
+        store = RecipeStore(xml_path)
+        assert store.update({"Name": "Nope"}) is False
+        assert store.delete("Nope") is False
+        assert read(xml_path) == XML
+
+    def test_duplicates_first_updated_last_listed(self, xml_path):
+        """Test the same duplicate-name rules as a full scan of the file."""
+        store = RecipeStore(xml_path)
+        store.add({"Name": "First", "FilmMode": "Duplicate"})
+
+        assert store.recipes()["First"]["FilmMode"] == "Duplicate"
+        store.update({"Name": "First", "FilmMode": "Changed"})
+        modes = [p.find("FilmMode").text for p in ET.parse(xml_path).getroot() if p.find("Name").text == "First"]
+        assert modes == ["Changed", "Duplicate"]
+
+    def test_comment_text_and_layout_preserved(self, xml_path):
+        """Test that only touched profiles change; section banners survive."""
+        store = RecipeStore(xml_path)
+        store.update({"Name": "Second", "FilmMode": "Pro Neg. Hi"})
+        assert read(xml_path) == XML.replace("<FilmMode>Eterna</FilmMode>", "<FilmMode>Pro Neg. Hi</FilmMode>")
+
+        store.delete("Third")
+        store.add({"Name": "Third", "FilmMode": "Astia"})
+        text = read(xml_path)
+        assert text.count("///") == XML.count("///")
+        assert text.endswith("  <profile>\n    <Name>Third</Name>\n    <FilmMode>Astia</FilmMode>\n  </profile>\n</profiles>")
+
+    def test_add_to_empty_root(self, tmp_path):
+        """Test the first profile of an empty file."""
+        path = tmp_path / "empty.xml"
+        path.write_text("<?xml version='1.0' encoding='utf-8'?>\n<profiles />", encoding="utf-8")
+        store = RecipeStore(str(path))
+
+        store.add({"Name": "Only"})
+
+        assert "<profiles>\n  <profile>\n    <Name>Only</Name>\n  </profile>\n</profiles>" in read(path)
+
+    def test_create_missing_file(self, tmp_path):
+        """Test that create=True starts an empty library and writes it."""
+        path = str(tmp_path / "new.xml")
+        with pytest.raises(FileNotFoundError):
+            RecipeStore(path)
+
+        store = RecipeStore(path, create=True)
+        store.add({"Name": "Only"})
+
+        assert RecipeStore(path).recipes() == {"Only": {"Name": "Only"}}
+
+
+# ============================================================================
+# Tests for replace_all
+# ============================================================================
+
+class TestRecipeStoreReplaceAll:
+    """Tests for replacing the whole library (import)."""
+
+    def test_replace_all(self, xml_path):
+        """Test that the file ends up holding exactly the given recipes, in place."""
+        store = RecipeStore(xml_path)
+        recipes = {
+            "First":  {"Name": "First", "FilmMode": "Classic Chrome"},
+            "Third":  {"Name": "Third", "FilmMode": "Acros"},
+            "Fourth": {"Name": "Fourth", "FilmMode": "Velvia"},
+        }
+
+        store.replace_all(recipes)
+
+        assert RecipeStore(xml_path).recipes() == recipes
+        assert list(store.recipes()) == ["First", "Third", "Fourth"]
+        assert read(xml_path).count("///") == XML.count("///")
+
+    def test_unchanged_library_not_written(self, xml_path, monkeypatch):
+        """Test that replacing with the same recipes does not touch the file."""
+        store = RecipeStore(xml_path)
+        monkeypatch.setattr(store, "flush", lambda: pytest.fail("flushed"))
+
+        store.replace_all(dict(store.recipes()))
+
+    def test_duplicates_collapsed(self, tmp_path):
+        """Test that only the listed (last) profile of a duplicated name is kept."""
+        path = tmp_path / "dup.xml"
+        path.write_text(
+            "<profiles><profile><Name>A</Name><Sensor>old</Sensor></profile>"
+            "<profile><Name>A</Name><Sensor>new</Sensor></profile></profiles>",
+            encoding="utf-8",
+        )
+        store = RecipeStore(str(path))
+
+        store.replace_all(store.recipes())
+
+        assert read(str(path)).count("<profile>") == 1
+        assert store.recipes()["A"]["Sensor"] == "new"
+
+
+# ============================================================================
+# Tests for writing and reloading
+# ============================================================================
+
+class TestRecipeStoreWrites:
+    """Tests for atomic, debounced writes and reload rules."""
+
+    def test_no_reparse_after_own_write(self, xml_path, monkeypatch):
+        """Test that the store never re-reads the file it just wrote."""
+        store = RecipeStore(xml_path)
+        parses = []
+        parse = ET.parse
+        monkeypatch.setattr(recipe_store.ET, "parse", lambda f: parses.append(f) or parse(f))
+
+        store.add({"Name": "Fourth"})
+        store.delete("First")
+        store.recipes()
+
+        assert parses == []
+
+    def test_external_change_reloaded(self, xml_path):
+        """Test that an edit by another program is picked up."""
+        store = RecipeStore(xml_path)
+        with open(xml_path, "w", encoding="utf-8") as f:
+            f.write(XML.replace("Eterna", "Nostalgic Neg."))
+        os.utime(xml_path, ns=(1, 1))
+
+        assert store.recipes()["Second"]["FilmMode"] == "Nostalgic Neg."
+
+    def test_failed_write_keeps_original(self, xml_path, monkeypatch):
+        """Test that an error during the replace leaves the file and no temp file behind."""
+        store = RecipeStore(xml_path)
+
+        def fail(src, dst):
+            raise OSError("disk full")
+        monkeypatch.setattr(recipe_store.os, "replace", fail)
+
+        with pytest.raises(OSError):
+            store.add({"Name": "Fourth"})
+
+        assert read(xml_path) == XML
+        assert not os.path.exists(xml_path + ".tmp")
+        assert store.dirty
+
+    def test_debounced_flush(self, xml_path, monkeypatch):
+        """Test that a burst of edits is written once, after the delay."""
+        store = RecipeStore(xml_path, flush_delay=0.1)
+        writes = []
+        replace = os.replace
+        monkeypatch.setattr(recipe_store.os, "replace", lambda a, b: writes.append(b) or replace(a, b))
+
+        for i in range(5):
+            store.add({"Name": f"New {i}"})
+        assert read(xml_path) == XML
+        assert "New 4" in store.recipes()
+
+        deadline = time.time() + 5
+        while store.dirty and time.time() < deadline:
+            time.sleep(0.02)
+
+        assert writes == [xml_path]
+        assert len(RecipeStore(xml_path).recipes()) == 8
+
+    def test_flush_writes_pending_now(self, xml_path):
+        """Test that flush() saves pending edits without waiting for the timer."""
+        store = RecipeStore(xml_path, flush_delay=60)
+        store.delete("Third")
+
+        store.flush()
+
+        assert not store.dirty
+        assert "Third" not in RecipeStore(xml_path).recipes()
+
+
+# ============================================================================
+# Tests for the parsed-recipe snapshot
+# ============================================================================
+
+class TestRecipeStoreSnapshot:
+    """Tests for loading recipes from <file>.cache instead of parsing the XML."""
+
+    @staticmethod
+    def no_parse(monkeypatch):
+        monkeypatch.setattr(RecipeStore, "_parse", lambda self: pytest.fail("XML parsed"))
+
+    def test_unchanged_file_not_parsed(self, xml_path, monkeypatch):
+        """Test that a second load reads the snapshot only."""
+        expected = RecipeStore(xml_path, snapshot=True).recipes()
+        assert os.path.exists(xml_path + ".cache")
+
+        self.no_parse(monkeypatch)
+        assert RecipeStore(xml_path, snapshot=True).recipes() == expected
+
+    def test_disabled_by_default(self, xml_path):
+        """Test that no snapshot is written unless asked for."""
+        RecipeStore(xml_path).recipes()
+        assert not os.path.exists(xml_path + ".cache")
+
+    def test_touched_file_validated_by_hash(self, xml_path, monkeypatch):
+        """Test that a newer mtime with the same content keeps the snapshot."""
+        RecipeStore(xml_path, snapshot=True)
+        os.utime(xml_path, ns=(1, 1))
+
+        self.no_parse(monkeypatch)
+        assert list(RecipeStore(xml_path, snapshot=True).recipes()) == ["First", "Second", "Third"]
+
+    def test_changed_file_reparsed(self, xml_path):
+        """Test that other content of the same size invalidates the snapshot."""
+        RecipeStore(xml_path, snapshot=True)
+        with open(xml_path, "w", encoding="utf-8") as f:
+            f.write(XML.replace("Eterna", "Acros_"))
+        os.utime(xml_path, ns=(1, 1))
+
+        assert RecipeStore(xml_path, snapshot=True).recipes()["Second"]["FilmMode"] == "Acros_"
+
+    def test_corrupt_snapshot_ignored(self, xml_path):
+        """Test that an unreadable snapshot falls back to parsing."""
+        with open(xml_path + ".cache", "wb") as f:
+            f.write(b"\x00garbage")
+
+        assert len(RecipeStore(xml_path, snapshot=True).recipes()) == 3
+
+    def test_edit_after_snapshot_load(self, xml_path, monkeypatch):
+        """Test that edits parse the XML, keep its layout and refresh the snapshot."""
+        RecipeStore(xml_path, snapshot=True)
+        store = RecipeStore(xml_path, snapshot=True)
+
+        store.update({"Name": "Second", "FilmMode": "Pro Neg. Hi"})
+
+        assert read(xml_path) == XML.replace("<FilmMode>Eterna</FilmMode>", "<FilmMode>Pro Neg. Hi</FilmMode>")
+        self.no_parse(monkeypatch)
+        assert RecipeStore(xml_path, snapshot=True).recipes()["Second"]["FilmMode"] == "Pro Neg. Hi"
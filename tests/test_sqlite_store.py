@@ -0,0 +1,162 @@
+"""
+Tests for SQLiteRecipeStore - the optional SQLite recipe backend.
+"""
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from managers.recipe_store import RecipeStore
+from managers.sqlite_store import COLUMNS, MATCH_FIELDS, SQLiteRecipeStore
+from managers.xml_manager import XMLManager
+from utils import resource_path
+from constants import Constants
+
+FIRST = {"Name": "First", "FilmMode": "Classic Chrome", "Sensor": "X-Trans V", "Custom": "kept"}
+SECOND = {"Name": "Second", "FilmMode": "Eterna", "Sensor": "X-Trans IV", "Favourite": "true"}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "recipes.db")
+    store = SQLiteRecipeStore(path, create=True)
+    store.add(FIRST)
+    store.add(SECOND)
+    store.close()
+    return path
+
+
+# ============================================================================
+# Tests for CRUD
+# ============================================================================
+
+class TestSQLiteRecipeStoreCrud:
+    """Tests for the RecipeStore interface on SQLite."""
+
+    def test_recipes_keep_order_and_fields(self, db_path):
+        """Test that recipes come back in insertion order with field order and unknown fields."""
+        recipes = SQLiteRecipeStore(db_path).recipes()
+        assert list(recipes) == ["First", "Second"]
+        assert list(recipes["First"].items()) == list(FIRST.items())
+
+    def test_add_update_delete_persist(self, db_path):
+        """Test that every change is committed immediately."""
+        store = SQLiteRecipeStore(db_path)
+        store.add({"Name": "Third", "FilmMode": "Astia"})
+        assert store.update({"Name": "Renamed", "FilmMode": "Acros"}, original_name="Second")
+        assert store.delete("First")
+
+        assert not store.dirty
+        assert list(SQLiteRecipeStore(db_path).recipes()) == ["Renamed", "Third"]
+
+    def test_missing_recipe(self, db_path):
+        """Test that update/delete report a missing recipe."""
+        store = SQLiteRecipeStore(db_path)
+        assert not store.update({"Name": "Nope"})
+        assert not store.delete("Nope")
+
+    def test_duplicates_first_updated_last_listed(self, db_path):
+        """Test duplicate names behave like the XML store."""
+        store = SQLiteRecipeStore(db_path)
+        store.add({"Name": "First", "FilmMode": "Velvia"})
+        assert store.recipes()["First"]["FilmMode"] == "Velvia"
+
+        store.update({"Name": "First", "FilmMode": "Astia"})
+        assert store.recipes()["First"]["FilmMode"] == "Velvia"
+        store.delete("First")
+        assert store.recipes()["First"]["FilmMode"] == "Velvia"
+
+    def test_missing_database(self, tmp_path):
+        """Test that a missing database is only created on request."""
+        with pytest.raises(FileNotFoundError):
+            SQLiteRecipeStore(str(tmp_path / "none.db"))
+
+
+# ============================================================================
+# Tests for indexes and queries
+# ============================================================================
+
+class TestSQLiteRecipeStoreIndexes:
+    """Tests for the indexed columns."""
+
+    def test_indexes_created(self, db_path):
+        """Test the Name, FilmMode, Sensor, Favourite and match-key indexes."""
+        db = sqlite3.connect(db_path)
+        indexed = {
+            row[2]
+            for (name,) in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            for row in db.execute(f'PRAGMA index_info("{name}")')
+        }
+        assert {"Name", "FilmMode", "Sensor", "Favourite"} | set(MATCH_FIELDS) <= indexed
+
+    def test_find_uses_index(self, db_path):
+        """Test that find() filters on indexed columns."""
+        store = SQLiteRecipeStore(db_path)
+        assert store.find(Sensor="X-Trans IV") == ["Second"]
+        assert store.find(FilmMode="Classic Chrome", Sensor="X-Trans V") == ["First"]
+        assert store.find() == ["First", "Second"]
+
+        plan = store._db.execute(
+            "EXPLAIN QUERY PLAN SELECT Name FROM recipes WHERE Sensor = ?", ("X",)
+        ).fetchall()
+        assert "idx_Sensor" in str(plan)
+
+    def test_find_unknown_field(self, db_path):
+        """Test that only indexed columns can be queried."""
+        with pytest.raises(ValueError):
+            SQLiteRecipeStore(db_path).find(Custom="kept")
+
+    def test_columns_follow_updates(self, db_path):
+        """Test that indexed columns are rewritten with the recipe."""
+        store = SQLiteRecipeStore(db_path)
+        store.update({"Name": "First", "Sensor": "X-Trans IV"})
+        assert store.find(Sensor="X-Trans IV") == ["First", "Second"]
+        assert "Custom" not in COLUMNS
+
+
+# ============================================================================
+# Tests for import / export
+# ============================================================================
+
+class TestImportExport:
+    """Tests for copying recipes between XML and SQLite."""
+
+    def test_replace_all(self, db_path):
+        """Test that replace_all swaps the whole library."""
+        store = SQLiteRecipeStore(db_path)
+        store.replace_all({"Only": {"Name": "Only"}})
+        assert SQLiteRecipeStore(db_path).recipes() == {"Only": {"Name": "Only"}}
+
+    def test_backend_chosen_by_extension(self, tmp_path):
+        """Test that .db files get the SQLite store and others the XML store."""
+        assert isinstance(XMLManager.store(str(tmp_path / "a.db"), create=True), SQLiteRecipeStore)
+        assert isinstance(XMLManager.store(str(tmp_path / "a.xml"), create=True), RecipeStore)
+
+    def test_round_trip_real_library(self, tmp_path):
+        """Test that the shipped XML survives XML -> SQLite -> XML unchanged."""
+        db = str(tmp_path / "library.db")
+        xml = str(tmp_path / "library.xml")
+        original = RecipeStore(resource_path(Constants.XML_FILE)).recipes()
+
+        XMLManager.copy_recipes(Constants.XML_FILE, db)
+        XMLManager.copy_recipes(db, xml)
+        XMLManager.flush()
+
+        assert SQLiteRecipeStore(db).recipes() == original
+        assert list(RecipeStore(xml).recipes().items()) == list(original.items())
+
+    def test_import_export_write_no_snapshot(self, tmp_path, monkeypatch):
+        """Test that only the app library gets a .cache snapshot."""
+        library = str(tmp_path / "library.xml")
+        monkeypatch.setattr(XMLManager, "_snapshot_paths", set())
+        shutil.copy(resource_path(Constants.XML_FILE), library)
+        XMLManager.enable_snapshot(library)
+        XMLManager.copy_recipes(library, str(tmp_path / "out.xml"))
+
+        assert sorted(os.listdir(tmp_path)) == ["library.xml", "library.xml.cache", "out.xml"]
+
+    def test_copy_from_missing_file(self, tmp_path):
+        """Test that a missing source never empties the target."""
+        with pytest.raises(FileNotFoundError):
+            XMLManager.copy_recipes(str(tmp_path / "none.xml"), str(tmp_path / "t.db"))
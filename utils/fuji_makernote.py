@@ -0,0 +1,258 @@
+# ──────────────────────────────────────────────
+# FUJIFILM MAKERNOTE READER
+# ──────────────────────────────────────────────
+# Native decoder for the recipe-relevant tags of the Fujifilm MakerNote IFD
+# in JPEG and RAF files. Values are converted to the same strings exiftool
+# prints with -s, so the result can be used in place of an exiftool call.
+import struct
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+from utils import parse_wbft
+
+RAF_MAGIC = b"FUJIFILMCCD-RAW "
+MAKERNOTE_MAGIC = b"FUJIFILM"
+
+TAG_EXIF_IFD = 0x8769
+TAG_MAKERNOTE = 0x927C
+
+# RAF CFA header records, both (height, width)
+TAG_RAW_FULL_SIZE = 0x100
+TAG_RAW_CROPPED_SIZE = 0x111
+
+# TIFF type id -> (struct format, size)
+_TYPES = {
+    1: ("B", 1), 2: ("B", 1), 3: ("H", 2), 4: ("I", 4), 6: ("b", 1),
+    7: ("B", 1), 8: ("h", 2), 9: ("i", 4),
+}
+
+IFDEntry = Tuple[int, int, int]   # (type, count, value_field_offset)
+
+_OFF_WEAK_STRONG = {0: "Off", 32: "Weak", 64: "Strong"}
+
+_TONE = {
+    -64: "+4 (hardest)", -56: "+3.5", -48: "+3 (very hard)", -40: "+2.5",
+    -32: "+2 (hard)", -24: "+1.5", -16: "+1 (medium hard)", -8: "+0.5",
+    0: "0 (normal)", 8: "-0.5", 16: "-1 (medium soft)", 24: "-1.5", 32: "-2 (soft)",
+}
+
+# tag id -> (name, signed, value table or None for plain numbers)
+_TAGS = {
+    0x1002: ("WhiteBalance", False, {
+        0x0: "Auto", 0x1: "Auto (white priority)", 0x2: "Auto (ambiance priority)",
+        0x100: "Daylight", 0x200: "Cloudy", 0x300: "Daylight Fluorescent",
+        0x301: "Day White Fluorescent", 0x302: "White Fluorescent",
+        0x303: "Warm White Fluorescent", 0x304: "Living Room Warm White Fluorescent",
+        0x400: "Incandescent", 0x500: "Flash", 0x600: "Underwater",
+        0xF00: "Custom", 0xF01: "Custom2", 0xF02: "Custom3", 0xF03: "Custom4",
+        0xF04: "Custom5", 0xFF0: "Kelvin",
+    }),
+    0x1003: ("Saturation", False, {
+        0x0: "0 (normal)", 0x80: "+1 (medium high)", 0xC0: "+3 (very high)",
+        0xE0: "+4 (highest)", 0x100: "+2 (high)", 0x180: "-1 (medium low)",
+        0x200: "Low", 0x300: "None (B&W)", 0x301: "B&W Red Filter",
+        0x302: "B&W Yellow Filter", 0x303: "B&W Green Filter", 0x310: "B&W Sepia",
+        0x400: "-2 (low)", 0x4C0: "-3 (very low)", 0x4E0: "-4 (lowest)",
+        0x500: "Acros", 0x501: "Acros Red Filter", 0x502: "Acros Yellow Filter",
+        0x503: "Acros Green Filter", 0x8000: "Film Simulation",
+    }),
+    0x1005: ("ColorTemperature", False, None),
+    0x100E: ("NoiseReduction", False, {
+        0x0: "0 (normal)", 0x100: "+2 (strong)", 0x180: "+1 (medium strong)",
+        0x1C0: "+3 (very strong)", 0x1E0: "+4 (strongest)", 0x200: "-2 (weak)",
+        0x280: "-1 (medium weak)", 0x2C0: "-3 (very weak)", 0x2E0: "-4 (weakest)",
+    }),
+    0x1040: ("ShadowTone", True, _TONE),
+    0x1041: ("HighlightTone", True, _TONE),
+    0x1047: ("GrainEffectRoughness", False, _OFF_WEAK_STRONG),
+    0x1048: ("ColorChromeEffect", False, _OFF_WEAK_STRONG),
+    0x104C: ("GrainEffectSize", False, {0: "Off", 16: "Small", 32: "Large"}),
+    0x104E: ("ColorChromeFXBlue", False, _OFF_WEAK_STRONG),
+    0x1401: ("FilmMode", False, {
+        0x0: "F0/Standard (Provia)", 0x100: "F1/Studio Portrait",
+        0x110: "F1a/Studio Portrait Enhanced Saturation",
+        0x120: "F1b/Studio Portrait Smooth Skin Tone (Astia)",
+        0x130: "F1c/Studio Portrait Increased Sharpness",
+        0x200: "F2/Fujichrome (Velvia)", 0x300: "F3/Studio Portrait Ex",
+        0x400: "F4/Velvia", 0x500: "Pro Neg. Std", 0x501: "Pro Neg. Hi",
+        0x600: "Classic Chrome", 0x700: "Eterna", 0x800: "Classic Negative",
+        0x900: "Bleach Bypass", 0xA00: "Nostalgic Neg", 0xB00: "Reala ACE",
+    }),
+    0x1403: ("DevelopmentDynamicRange", False, None),
+}
+TAG_WB_FINE_TUNE = 0x100A
+TAG_NOISE_REDUCTION_OLD = 0x100B   # Low / Normal; "n/a" on X-series bodies
+_NOISE_REDUCTION_OLD = {0x40: "Low", 0x80: "Normal", 0x100: "n/a"}
+
+# Tag names this reader can produce
+FUJI_MAKERNOTE_TAGS = frozenset(
+    [name for name, _s, _t in _TAGS.values()] + ["WhiteBalanceFineTune"]
+)
+
+
+class UnknownValue(ValueError):
+    """A tag holds a value missing from the conversion tables."""
+
+
+# ── container parsing ──────────────────────────────────────────────────────
+
+def _read_exif_segment(f: BinaryIO) -> Optional[bytes]:
+    """Return the TIFF block of the Exif APP1 segment of a JPEG stream at the current position."""
+    if f.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        head = f.read(4)
+        if len(head) < 4 or head[0] != 0xFF:
+            return None
+        marker, length = head[1], struct.unpack(">H", head[2:])[0]
+        if marker in (0xDA, 0xD9):  # start of scan / end of image
+            return None
+        if marker == 0xE1:
+            data = f.read(length - 2)
+            if data.startswith(b"Exif\x00\x00"):
+                return data[6:]
+        else:
+            f.seek(length - 2, 1)
+
+
+def read_raf_preview(filename: str) -> Optional[bytes]:
+    """Return the embedded full-frame JPEG of a RAF file, or None."""
+    try:
+        with open(filename, "rb") as f:
+            if f.read(16) != RAF_MAGIC:
+                return None
+            f.seek(84)
+            offset, length = struct.unpack(">II", f.read(8))
+            f.seek(offset)
+            data = f.read(length)
+    except (OSError, struct.error):
+        return None
+    return data if len(data) == length and data.startswith(b"\xff\xd8") else None
+
+
+def read_raf_raw_size(filename: str) -> Optional[Tuple[int, int]]:
+    """
+    Return the (width, height) of the sensor data of a RAF file as stored,
+    from the CFA header records: RawImageCroppedSize, else RawImageFullSize.
+    """
+    try:
+        with open(filename, "rb") as f:
+            if f.read(16) != RAF_MAGIC:
+                return None
+            f.seek(92)
+            offset, length = struct.unpack(">II", f.read(8))
+            f.seek(offset)
+            data = f.read(length)
+    except (OSError, struct.error):
+        return None
+    sizes: Dict[int, Tuple[int, int]] = {}
+    try:
+        count = struct.unpack_from(">I", data)[0]
+        pos = 4
+        for _ in range(count):
+            tag, size = struct.unpack_from(">HH", data, pos)
+            if tag in (TAG_RAW_FULL_SIZE, TAG_RAW_CROPPED_SIZE) and size == 4:
+                height, width = struct.unpack_from(">HH", data, pos + 4)
+                sizes[tag] = (width, height)
+            pos += 4 + size
+    except struct.error:
+        pass
+    return sizes.get(TAG_RAW_CROPPED_SIZE) or sizes.get(TAG_RAW_FULL_SIZE)
+
+
+def _open_tiff(filename: str) -> Optional[bytes]:
+    with open(filename, "rb") as f:
+        magic = f.read(16)
+        if magic == RAF_MAGIC:
+            f.seek(84)
+            jpeg_offset = struct.unpack(">I", f.read(4))[0]
+            f.seek(jpeg_offset)
+        else:
+            f.seek(0)
+        return _read_exif_segment(f)
+
+
+def _ifd_entries(data: bytes, offset: int, endian: str) -> Dict[int, IFDEntry]:
+    """Return {tag: (type, count, value_field_offset)} for one IFD."""
+    count = struct.unpack_from(endian + "H", data, offset)[0]
+    entries: Dict[int, IFDEntry] = {}
+    for i in range(count):
+        pos = offset + 2 + i * 12
+        tag, typ, n = struct.unpack_from(endian + "HHI", data, pos)
+        entries[tag] = (typ, n, pos + 8)
+    return entries
+
+
+def _values(data: bytes, entry: IFDEntry, endian: str, base: int) -> List[int]:
+    typ, n, field = entry
+    if typ not in _TYPES:
+        raise UnknownValue(f"unsupported TIFF type {typ}")
+    fmt, size = _TYPES[typ]
+    if n * size > 4:
+        field = base + struct.unpack_from(endian + "I", data, field)[0]
+    return list(struct.unpack_from(f"{endian}{n}{fmt}", data, field))
+
+
+def _makernote(tiff: bytes) -> Optional[bytes]:
+    endian = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if endian is None:
+        return None
+    ifd0 = _ifd_entries(tiff, struct.unpack_from(endian + "I", tiff, 4)[0], endian)
+    if TAG_EXIF_IFD not in ifd0:
+        return None
+    exif_ifd = _ifd_entries(tiff, _values(tiff, ifd0[TAG_EXIF_IFD], endian, 0)[0], endian)
+    if TAG_MAKERNOTE not in exif_ifd:
+        return None
+    _typ, n, field = exif_ifd[TAG_MAKERNOTE]
+    start = struct.unpack_from(endian + "I", tiff, field)[0]
+    note = tiff[start:start + n]
+    return note if note.startswith(MAKERNOTE_MAGIC) else None
+
+
+# ── public API ─────────────────────────────────────────────────────────────
+
+def _signed32(v: int) -> int:
+    return v - (1 << 32) if v >= (1 << 31) else v
+
+
+def read_fuji_makernote(filename: str, keys: Optional[Iterable[str]] = None) -> Optional[Dict[str, str]]:
+    """
+    Decode recipe tags from the Fujifilm MakerNote of a JPEG or RAF file.
+    Returns None when the file has no Fujifilm MakerNote or holds a value
+    this reader cannot convert – the caller should then fall back to exiftool.
+    """
+    wanted = set(keys) if keys else None
+    try:
+        tiff = _open_tiff(filename)
+        note = _makernote(tiff) if tiff else None
+        if note is None:
+            return None
+        # Fujifilm MakerNote: always little-endian, offsets relative to its start
+        entries = _ifd_entries(note, struct.unpack_from("<I", note, 8)[0], "<")
+
+        exif_data: Dict[str, str] = {}
+        for tag, (name, signed, table) in _TAGS.items():
+            if tag not in entries or (wanted is not None and name not in wanted):
+                continue
+            value = _values(note, entries[tag], "<", 0)[0]
+            if signed:
+                value = _signed32(value)
+            if table is None:
+                exif_data[name] = str(value)
+            elif value in table:
+                exif_data[name] = table[value]
+            else:
+                raise UnknownValue(f"{name}={value}")
+
+        if "NoiseReduction" not in exif_data and TAG_NOISE_REDUCTION_OLD in entries \
+                and (wanted is None or "NoiseReduction" in wanted):
+            value = _values(note, entries[TAG_NOISE_REDUCTION_OLD], "<", 0)[0]
+            if value not in _NOISE_REDUCTION_OLD:
+                raise UnknownValue(f"NoiseReduction={value}")
+            exif_data["NoiseReduction"] = _NOISE_REDUCTION_OLD[value]
+
+        if TAG_WB_FINE_TUNE in entries and (wanted is None or "WhiteBalanceFineTune" in wanted):
+            red, blue = (_signed32(v) for v in _values(note, entries[TAG_WB_FINE_TUNE], "<", 0)[:2])
+            exif_data["WhiteBalanceFineTune"] = parse_wbft(f"Red {red:+d}, Blue {blue:+d}")
+        return exif_data
+    except (OSError, struct.error, ValueError):
+        return None
@@ -1,3 +1,5 @@
 from .histogram_widget import HistogramWidget
 from .image_card import ImageCard
 from .image_detail_dialog import ImageDetailDialog
+from .identify_pipeline import IdentifyPipeline
+from .card_virtualizer import CardVirtualizer
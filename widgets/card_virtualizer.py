@@ -0,0 +1,102 @@
+# ──────────────────────────────────────────────
+# CARD VIRTUALIZER
+# ──────────────────────────────────────────────
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from widgets.image_card import load_card_image
+
+# Extra area (in viewport heights) above and below the visible region kept materialised
+MARGIN_SCREENS = 1.0
+REFRESH_DELAY_MS = 50
+
+
+class CardVirtualizer(QObject):
+    """
+    Keeps only the cards near the scroll viewport materialised.
+    Cards are added unmaterialised; the ones in range are filled in on the
+    next refresh, from the thumbnail the identify pipeline decoded.
+    Cards that scroll far out of view delete their child widgets (thumbnail,
+    info text, histogram) but keep their size, so the list geometry never
+    changes and the widget count stays bounded by the viewport.
+    When an evicted card comes back into range it is re-decoded in the
+    background and filled in once ready.
+    """
+    _loaded = pyqtSignal(int, object, object, object)   # generation, card, thumb, ImageInfo
+
+    def __init__(self, scroll_area, max_workers: int = 2, parent=None):
+        super().__init__(parent)
+        self._scroll = scroll_area
+        self._cards = []
+        self._pending = set()
+        self._generation = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(REFRESH_DELAY_MS)
+        self._timer.timeout.connect(self.refresh)
+
+        scroll_area.verticalScrollBar().valueChanged.connect(self.schedule)
+        scroll_area.verticalScrollBar().rangeChanged.connect(self.schedule)
+        self._loaded.connect(self._on_loaded)
+
+    def add(self, card) -> None:
+        self._cards.append(card)
+        self.schedule()
+
+    def clear(self) -> None:
+        """Forget all cards; loads still in flight are discarded."""
+        self._generation += 1
+        self._cards = []
+        self._pending = set()
+
+    def shutdown(self) -> None:
+        self.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def schedule(self, *_args) -> None:
+        """Coalesce scroll/resize events and added cards into one refresh per interval."""
+        # Not restarted: cards streaming in must not postpone the refresh indefinitely
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def refresh(self) -> None:
+        """Evict cards outside the keep range and reload the ones inside it."""
+        content = self._scroll.widget()
+        if content is not None and content.layout() is not None:
+            content.layout().activate()   # cards added since the last pass have no geometry yet
+        viewport = self._scroll.viewport()
+        top = self._scroll.verticalScrollBar().value()
+        height = viewport.height()
+        lo = top - height * MARGIN_SCREENS
+        hi = top + height * (1 + MARGIN_SCREENS)
+
+        for card in self._cards:
+            if not card.isVisible():
+                continue    # just added: shown and placed on the next layout pass, which reschedules
+            geo = card.geometry()
+            card.set_in_view(geo.bottom() >= top and geo.top() <= top + height)
+            if geo.bottom() >= lo and geo.top() <= hi:
+                if not card.materialized and card not in self._pending and not card.materialize():
+                    self._pending.add(card)
+                    self._pool.submit(self._load, self._generation, card, card.filename)
+            elif card.materialized or card.preloaded:
+                card.evict()
+
+    def _load(self, generation, card, filename):
+        try:
+            thumb, info = load_card_image(filename)
+        except Exception:
+            thumb = info = None
+        self._loaded.emit(generation, card, thumb, info)
+
+    def _on_loaded(self, generation, card, thumb, info):
+        if generation != self._generation:
+            return
+        if thumb is None:
+            return   # unreadable now – leave it pending rather than retrying on every scroll
+        self._pending.discard(card)
+        card.set_image(thumb, info)
+        self.schedule()   # the view may have moved while decoding
@@ -1,74 +1,129 @@
 # ──────────────────────────────────────────────
 # HISTOGRAM WIDGET  (pure Qt – no matplotlib)
 # ──────────────────────────────────────────────
+import math
+import os
+import threading
+
 from PIL import Image
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QBrush, QColor, QFont, QLinearGradient, QPainter, QPainterPath, QPen
+from PyQt6.QtCore import QObject, QRunnable, Qt, QThreadPool, pyqtSignal
+from PyQt6.QtGui import (
+    QBrush, QColor, QFont, QLinearGradient, QPainter, QPainterPath, QPen, QPixmap
+)
 from PyQt6.QtWidgets import QWidget
 
+from managers import HistogramCache
+
 PAD_L, PAD_R, PAD_T, PAD_B = 6, 6, 6, 0
 
 # Clipping threshold – % of total pixels to trigger indicator
 CLIP_THRESHOLD = 0.001
 
+# Pool priority of histograms on cards inside the viewport
+VISIBLE_PRIORITY = 1
+
+
+# ── Bucket computation ─────────────────────────────────────────────────────
+
+def histogram_buckets(img: Image.Image, rgb: bool) -> list:
+    """
+    256-bucket counts per channel – [r, g, b] for RGB, [luma] otherwise.
+    Uses Pillow's C-level Image.histogram(), which returns the bands back to back.
+    """
+    if rgb:
+        hist = img.convert("RGB").histogram()
+        return [hist[0:256], hist[256:512], hist[512:768]]
+    return [img.convert("L").histogram()]
+
+
+def clipping_ratios(buckets: list) -> tuple:
+    """(shadows, highlights) – share of samples at 0 and 255 across all channels."""
+    samples = sum(buckets[0]) * len(buckets) or 1
+    shadows    = sum(b[0]   for b in buckets) / samples
+    highlights = sum(b[255] for b in buckets) / samples
+    return shadows, highlights
+
 
-# ── Background worker ──────────────────────────────────────────────────────
+# ── Shared worker pool ─────────────────────────────────────────────────────
 
-class HistogramWorker(QThread):
-    """Computes histogram buckets + clipping info in a background thread."""
-    finished = pyqtSignal(list, dict)  # channels, clipping
+_pool = None
+_jobs = set()            # queued/running jobs, kept alive until they finish
+_jobs_lock = threading.Lock()
 
-    def __init__(self, img: Image.Image, rgb: bool, r_col, g_col, b_col, fg_col):
+
+def histogram_pool() -> QThreadPool:
+    """App-wide bounded pool for histogram jobs."""
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(max(1, min(4, (os.cpu_count() or 2) - 1)))
+    return _pool
+
+
+class _JobSignals(QObject):
+    finished = pyqtSignal(list, tuple, bool)  # buckets, (shadows, highlights), rgb
+
+
+class HistogramJob(QRunnable):
+    """Computes histogram buckets + clipping ratios on the shared pool."""
+    def __init__(self, img: Image.Image, rgb: bool):
         super().__init__()
-        self._img    = img
-        self._rgb    = rgb
-        self._r_col  = r_col
-        self._g_col  = g_col
-        self._b_col  = b_col
-        self._fg_col = fg_col
+        self.setAutoDelete(False)
+        self.signals    = _JobSignals()
+        self._img       = img
+        self._rgb       = rgb
+        self._cancelled = False
+
+    def submit(self, priority: int = 0) -> None:
+        with _jobs_lock:
+            _jobs.add(self)
+        histogram_pool().start(self, priority)
+
+    def reprioritize(self, priority: int) -> None:
+        """Move a job that has not started yet to another priority."""
+        if histogram_pool().tryTake(self):
+            histogram_pool().start(self, priority)
+
+    def cancel(self) -> None:
+        """
+        Drop the job if still queued; a running job finishes without emitting
+        and a result that was already emitted is not delivered.
+        """
+        self._cancelled = True
+        try:
+            self.signals.finished.disconnect()
+        except (TypeError, RuntimeError):   # nothing connected / signals already deleted
+            pass
+        # At exit the widget can be destroyed after the pool is gone
+        try:
+            if _pool is not None and _pool.tryTake(self):
+                self._release()
+        except RuntimeError:
+            pass
 
     def run(self):
-        if self._rgb:
-            arr = self._img.convert("RGB").tobytes()
-            total = len(arr) // 3
-            r, g, b = [0] * 256, [0] * 256, [0] * 256
-            for i in range(0, len(arr), 3):
-                r[arr[i]]     += 1
-                g[arr[i + 1]] += 1
-                b[arr[i + 2]] += 1
-            channels = [
-                (b, self._b_col, "B"),
-                (g, self._g_col, "G"),
-                (r, self._r_col, "R"),
-            ]
-            shadows_r    = (r[0]   + g[0]   + b[0])   / (total * 3)
-            highlights_r = (r[255] + g[255] + b[255]) / (total * 3)
-            clipping = {
-                "shadows":    shadows_r,
-                "highlights": highlights_r,
-                "shadow_col":    self._r_col,
-                "highlight_col": self._b_col,
-            }
-        else:
-            arr = self._img.convert("L").tobytes()
-            total = len(arr)
-            luma = [0] * 256
-            for v in arr:
-                luma[v] += 1
-            channels = [(luma, self._fg_col, "L")]
-            clipping = {
-                "shadows":    luma[0]   / total,
-                "highlights": luma[255] / total,
-            }
-
-        self.finished.emit(channels, clipping)
+        try:
+            if self._cancelled:
+                return
+            thumb = self._img.copy()
+            thumb.thumbnail((256, 256), Image.LANCZOS)
+            buckets = histogram_buckets(thumb, self._rgb)
+            if not self._cancelled:
+                self.signals.finished.emit(buckets, clipping_ratios(buckets), self._rgb)
+        finally:
+            self._release()
+
+    def _release(self):
+        with _jobs_lock:
+            _jobs.discard(self)
 
 
 # ── Widget ─────────────────────────────────────────────────────────────────
 
 class HistogramWidget(QWidget):
     def __init__(self, img: Image.Image, rgb=True, hist_type="step",
-                 dark=True, size=(390, 350), bg=None, fg=None, show_grid=True):
+                 dark=True, size=(390, 350), bg=None, fg=None, show_grid=True,
+                 cache_key=None, priority=0):
         super().__init__()
         self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
         self.setMouseTracking(True)
@@ -101,37 +156,88 @@ class HistogramWidget(QWidget):
             self._g_col = QColor(30,  160, 50)
             self._b_col = QColor(30,  90,  210)
 
-        self._thumb = img.copy()
-        self._thumb.thumbnail((256, 256), Image.LANCZOS)
+        self._img       = img
+        self._cache_key = cache_key   # (path, mtime, size, source) of the source file, or None
 
         self._log_scale = False
-        self._worker = None
+        self._plot      = None   # cached static plot (QPixmap)
+        self._plot_key  = None   # (width, height, device pixel ratio) it was rendered for
+        self._global_max = 1
+        self._log_max    = 0.0
+        self._job       = None
+        self._priority  = priority
         self._start_worker()
         self.setFixedSize(*size)
 
     # ── worker ─────────────────────────────────────────────────────────────
 
+    def _key(self, rgb):
+        if self._cache_key is None:
+            return None
+        path, mtime, size, source = self._cache_key
+        return HistogramCache.key(path, mtime, size, rgb, source)
+
+    def set_priority(self, priority: int) -> None:
+        """Raise or lower a still-queued job, e.g. when the card scrolls into view."""
+        if priority != self._priority:
+            self._priority = priority
+            if self._job is not None:
+                self._job.reprioritize(priority)
+
     def _start_worker(self):
+        if self._job is not None:
+            self._job.cancel()
+            self._job = None
+
+        key = self._key(self._rgb)
+        cached = HistogramCache.get(key) if key else None
+        if cached is not None:
+            self._set_buckets(*cached, self._rgb)
+            return
+
         self._loading  = True
         self._channels = []
         self._clipping = {}
-        self.update()
-        if self._worker and self._worker.isRunning():
-            self._worker.finished.disconnect()
-            self._worker.quit()
-            self._worker.wait()
-        self._worker = HistogramWorker(
-            self._thumb, self._rgb,
-            self._r_col, self._g_col, self._b_col, self._fg
-        )
-        self._worker.finished.connect(self._on_ready)
-        self._worker.start()
-
-    def _on_ready(self, channels, clipping):
-        self._channels = channels
-        self._clipping = clipping
-        self._loading  = False
-        self.update()
+        self._invalidate_plot()
+        self._job = HistogramJob(self._img, self._rgb)
+        self._job.signals.finished.connect(self._on_ready)
+        self.destroyed.connect(self._job.cancel)
+        self._job.submit(self._priority)
+
+    def _on_ready(self, buckets, ratios, rgb):
+        # Cached under the mode the job computed, even if it was replaced meanwhile
+        key = self._key(rgb)
+        if key:
+            HistogramCache.put(key, buckets, ratios)
+        if self._job is None or self.sender() is not self._job.signals:
+            return    # a result of a job replaced by a mode toggle
+        self._job = None
+        self._set_buckets(buckets, ratios, rgb)
+
+    def _set_buckets(self, buckets, ratios, rgb):
+        """Attach the current colours to the buckets of mode rgb and repaint."""
+        shadows, highlights = ratios
+        if rgb:
+            r, g, b = buckets
+            self._channels = [
+                (b, self._b_col, "B"),
+                (g, self._g_col, "G"),
+                (r, self._r_col, "R"),
+            ]
+            self._clipping = {
+                "shadows":    shadows,
+                "highlights": highlights,
+                "shadow_col":    self._r_col,
+                "highlight_col": self._b_col,
+            }
+        else:
+            self._channels = [(buckets[0], self._fg, "L")]
+            self._clipping = {
+                "shadows":    shadows,
+                "highlights": highlights,
+            }
+        self._loading = False
+        self._invalidate_plot()
 
     # ── mouse ──────────────────────────────────────────────────────────────
 
@@ -141,7 +247,7 @@ class HistogramWidget(QWidget):
             self._start_worker()
         elif event.button() == Qt.MouseButton.RightButton:
             self._log_scale = not self._log_scale
-            self.update()
+            self._invalidate_plot()
 
     def mouseMoveEvent(self, event):
         self._hover_x = event.position().x()
@@ -154,23 +260,48 @@ class HistogramWidget(QWidget):
     # ── painting ───────────────────────────────────────────────────────────
 
     def paintEvent(self, _event):
+        # Static plot is rendered once per data/size/scale; hover only adds the overlay
+        dpr = self.devicePixelRatioF()
+        if self._plot is None or self._plot_key != (self.width(), self.height(), dpr):
+            self._plot = self._render_plot(dpr)
+            self._plot_key = (self.width(), self.height(), dpr)
+
         p = QPainter(self)
-        p.setRenderHint(QPainter.RenderHint.Antialiasing)
+        p.drawPixmap(0, 0, self._plot)
+
+        if self._hover_x is not None and not self._loading:
+            p.setRenderHint(QPainter.RenderHint.Antialiasing)
+            w, h = self.width(), self.height()
+            self._draw_clipping_tooltips(p, w, h)
+            self._draw_crosshair(p, w - PAD_L - PAD_R, h - PAD_T - PAD_B,
+                                 self._global_max, self._log_max)
 
+        p.end()
+
+    def _invalidate_plot(self):
+        self._plot = None
+        self.update()
+
+    def _render_plot(self, dpr):
         w, h = self.width(), self.height()
         plot_w = w - PAD_L - PAD_R
         plot_h = h - PAD_T - PAD_B
 
+        pixmap = QPixmap(max(1, round(w * dpr)), max(1, round(h * dpr)))
+        pixmap.setDevicePixelRatio(dpr)
+        p = QPainter(pixmap)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing)
+
         p.fillRect(0, 0, w, h, self._bg)
 
         if self._loading:
             self._draw_loading(p, w, h)
             p.end()
-            return
+            return pixmap
 
         global_max = max(max(buckets) for buckets, _, _l in self._channels) or 1
-        import math
         log_max = math.log1p(global_max)
+        self._global_max, self._log_max = global_max, log_max
 
         if self._show_grid:
             self._draw_grid(p, plot_w, plot_h)
@@ -188,10 +319,8 @@ class HistogramWidget(QWidget):
         self._draw_clipping_indicators(p, w, h)
         self._draw_mode_label(p, w, h)
 
-        if self._hover_x is not None:
-            self._draw_crosshair(p, plot_w, plot_h, global_max, log_max)
-
         p.end()
+        return pixmap
 
     # ── overlap line ───────────────────────────────────────────────────────
 
@@ -242,6 +371,12 @@ class HistogramWidget(QWidget):
             active_color=QColor(240, 80, 80),
         )
 
+    def _draw_clipping_tooltips(self, p, w, h):
+        SIZE = 14
+
+        shadows_pct    = self._clipping.get("shadows",    0.0)
+        highlights_pct = self._clipping.get("highlights", 0.0)
+
         if self._hover_x is not None:
             mx = self._hover_x
             if mx < PAD_L + SIZE + 6:
@@ -439,7 +574,6 @@ class HistogramWidget(QWidget):
 
     def _scale_val(self, val, max_val, log_max):
         """Normalise val to [0,1] using linear or log scale."""
-        import math
         if self._log_scale:
             return math.log1p(val) / log_max if log_max else 0.0
         return val / max_val if max_val else 0.0
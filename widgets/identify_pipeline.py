@@ -0,0 +1,144 @@
+# ──────────────────────────────────────────────
+# IDENTIFY PIPELINE
+# ──────────────────────────────────────────────
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from PIL import Image
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from managers import ExifManager
+from widgets.image_card import ImageInfo, load_card_image
+
+# Files per metadata batch – small enough for the first cards to appear quickly
+CHUNK_SIZE = 16
+
+
+class IdentifyResult(NamedTuple):
+    filename: str
+    sim_data: Optional[Dict[str, str]]
+    exif_fallback: Dict[str, str]
+    nearest: list
+    thumb: Image.Image
+    info: ImageInfo
+
+
+class IdentifyPipeline(QObject):
+    """
+    Identifies dropped files off the UI thread and streams results back.
+    Stages: metadata (batched exiftool / MakerNote reads, one chunk ahead),
+    decode + thumbnail (thread pool) and recipe matching. Starting a new run
+    cancels the previous one; its late results are dropped.
+    """
+    result_ready = pyqtSignal(int, object)       # index, IdentifyResult
+    failed       = pyqtSignal(int, str, str)     # index, filename, error
+    progress     = pyqtSignal(int, int)          # done, total
+    finished     = pyqtSignal()
+
+    # Internal signals carry the run id so stale runs can be filtered on the UI thread
+    _result   = pyqtSignal(int, int, object)
+    _failed   = pyqtSignal(int, int, str, str)
+    _progress = pyqtSignal(int, int, int)
+    _finished = pyqtSignal(int)
+
+    def __init__(self, parent=None, max_workers: Optional[int] = None):
+        super().__init__(parent)
+        self._max_workers = max_workers or min(8, os.cpu_count() or 2)
+        self._run_id = 0
+        self._cancel = threading.Event()
+        self._result.connect(self._on_result)
+        self._failed.connect(self._on_failed)
+        self._progress.connect(self._on_progress)
+        self._finished.connect(self._on_finished)
+
+    # ── control ────────────────────────────────────────────────────────────
+
+    def start(self, filenames: List[str], relevant_keys,
+              match: Callable[[Dict[str, str]], Optional[str]],
+              simulations: Dict[str, Dict[str, str]],
+              rank: Callable[[Dict[str, str]], list]) -> None:
+        """Cancel any running identification and start a new one."""
+        self.cancel()
+        self._run_id += 1
+        self._cancel = threading.Event()
+        threading.Thread(
+            target=self._coordinate,
+            args=(self._run_id, self._cancel, list(filenames), set(relevant_keys),
+                  match, dict(simulations), rank),
+            daemon=True,
+        ).start()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    # ── worker side ────────────────────────────────────────────────────────
+
+    def _coordinate(self, run_id, cancel, filenames, keys, match, simulations, rank):
+        total = len(filenames)
+        done = 0
+        previous = []   # (index, filename, future, exif_data) of the chunk being decoded
+        with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
+            for start in range(0, total + CHUNK_SIZE, CHUNK_SIZE):
+                if cancel.is_set():
+                    break
+                chunk = filenames[start:start + CHUNK_SIZE]
+                current = []
+                if chunk:
+                    # Metadata for this chunk is read while the previous chunk decodes
+                    try:
+                        batch = ExifManager.get_exif_batch(chunk, keys)
+                    except Exception as e:
+                        for i, filename in enumerate(chunk):
+                            self._failed.emit(run_id, start + i, filename, str(e))
+                        done += len(chunk)
+                        self._progress.emit(run_id, done, total)
+                        batch = None
+                    if batch is not None:
+                        current = [
+                            (start + i, f, pool.submit(load_card_image, f), batch.get(f, {}))
+                            for i, f in enumerate(chunk)
+                        ]
+                for index, filename, future, exif_data in previous:
+                    if cancel.is_set():
+                        break
+                    self._finish_one(run_id, index, filename, future, exif_data,
+                                     match, simulations, rank)
+                    done += 1
+                    self._progress.emit(run_id, done, total)
+                previous = current
+            if cancel.is_set():
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._finished.emit(run_id)
+
+    def _finish_one(self, run_id, index, filename, future, exif_data, match, simulations, rank):
+        try:
+            thumb, info = future.result()
+            sim_name = match(exif_data)
+            sim_data = simulations.get(sim_name) if sim_name else None
+            exif_fallback = {} if sim_data else ExifManager.get_exif(filename, 'short')
+            nearest = [] if sim_data else rank(exif_data)
+            self._result.emit(run_id, index, IdentifyResult(
+                filename, sim_data, exif_fallback, nearest, thumb, info
+            ))
+        except Exception as e:
+            self._failed.emit(run_id, index, filename, str(e))
+
+    # ── UI side ────────────────────────────────────────────────────────────
+
+    def _on_result(self, run_id, index, result):
+        if run_id == self._run_id:
+            self.result_ready.emit(index, result)
+
+    def _on_failed(self, run_id, index, filename, error):
+        if run_id == self._run_id:
+            self.failed.emit(index, filename, error)
+
+    def _on_progress(self, run_id, done, total):
+        if run_id == self._run_id:
+            self.progress.emit(done, total)
+
+    def _on_finished(self, run_id):
+        if run_id == self._run_id:
+            self.finished.emit()
@@ -3,36 +3,48 @@
 # ──────────────────────────────────────────────
 import os
 import sys
+from typing import NamedTuple
 
-from PIL import Image, ExifTags
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QCursor, QFont, QImage, QPixmap
 from PyQt6.QtWidgets import (
-    QFileDialog, QFrame, QHBoxLayout, QLabel, QMenu, QMessageBox, QSizePolicy
+    QFileDialog, QFrame, QHBoxLayout, QLabel, QMenu, QMessageBox, QSizePolicy, QSpacerItem
 )
 
-from managers import ExifManager
-from widgets.histogram_widget import HistogramWidget
+from managers import ExifManager, ImageManager
+from widgets.histogram_widget import VISIBLE_PRIORITY, HistogramWidget
 from widgets.image_detail_dialog import ImageDetailDialog
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from exporters.recipe_card_exporter import export_recipe_card
+from exporters.recipe_card_exporter import CARD_FILE_FILTER, export_recipe_card, with_card_extension
 from themes import THEME_HISTOGRAM_COLORS, DEFAULT_THEME
 
 CARD_HEIGHT  = 350
 THUMB_WIDTH  = 390
 INFO_MIN_W   = 280
 INFO_MAX_W   = 390
+CARD_SPACING = 8
 
-RAW_EXTENSIONS = ('.raf', '.nef', '.cr2', '.arw', '.dng')
+RAW_PREVIEW = "raw preview"
+
+
+class ImageInfo(NamedTuple):
+    """What a card remembers about its source file instead of the decoded image."""
+    path: str
+    width: int
+    height: int
+    mtime: float
+    size: int       # file size in bytes
+    source: str = ""    # RAW_PREVIEW when a RAW file was shown from its embedded preview
+    preview_size: bool = False  # width/height are the preview's; the RAW size was unreadable
 
 
 class TooltipImageLabel(QLabel):
     """Custom QLabel that loads EXIF tooltip lazily on first hover."""
-    def __init__(self, filename, img_pil):
+    def __init__(self, filename, info=None):
         super().__init__()
         self.filename = filename
-        self.img_pil = img_pil
+        self.info = info
         self._exif_loaded = False
 
     def enterEvent(self, event):
@@ -43,14 +55,14 @@ class TooltipImageLabel(QLabel):
                     self.filename,
                     ['Model', 'ISO', 'FNumber', 'ExposureTime', 'FocalLength']
                 )
-                tooltip = self._format_exif_tooltip(exif_data, self.img_pil)
+                tooltip = self._format_exif_tooltip(exif_data, self.info)
                 self.setToolTip(tooltip)
             except Exception:
                 self.setToolTip("No EXIF data")
             self._exif_loaded = True
         super().enterEvent(event)
 
-    def _format_exif_tooltip(self, exif_data, img_pil):
+    def _format_exif_tooltip(self, exif_data, info):
         """Format camera parameters for tooltip display."""
         if not exif_data:
             return "No EXIF data"
@@ -62,8 +74,9 @@ class TooltipImageLabel(QLabel):
             lines.append(f"Camera: {exif_data['Model']}")
 
         # Image dimensions (original)
-        width, height = img_pil.size
-        lines.append(f"Resolution: {width}x{height}")
+        if info:
+            label = "Preview resolution" if info.preview_size else "Resolution"
+            lines.append(f"{label}: {info.width}x{info.height}")
 
         # Camera parameters
         if 'ISO' in exif_data:
@@ -78,42 +91,36 @@ class TooltipImageLabel(QLabel):
         return "\n".join(lines) if lines else "No data"
 
 
-def _open_image(filename):
-    ext = os.path.splitext(filename)[1].lower()
-    if ext not in RAW_EXTENSIONS:
-        return Image.open(filename)
-    try:
-        import rawpy
-        import numpy as np
-        with rawpy.imread(filename) as raw:
-            rgb = raw.postprocess(use_camera_wb=True, no_auto_bright=False, output_bps=8)
-        return Image.fromarray(rgb)
-    except ImportError:
-        raise RuntimeError(
-            "rawpy is required to open RAW files.\n"
-            "Install it with: pip install rawpy"
-        )
-    except Exception as e:
-        raise RuntimeError(f"Failed to open RAW file: {e}")
-
-
-def _fix_orientation(img_pil, filename):
-    try:
-        exif = img_pil.getexif()
-        orientation = exif.get(ExifTags.Base.Orientation, 1)
-        if orientation == 8:
-            img_pil = img_pil.rotate(90, expand=True)
-        elif orientation == 6:
-            img_pil = img_pil.rotate(-90, expand=True)
-        elif orientation == 3:
-            img_pil = img_pil.rotate(180, expand=True)
-    except Exception:
-        pass
-    return img_pil
+def load_card_image(filename):
+    """
+    Load an oriented card thumbnail through ImageManager; safe to call from
+    worker threads. Returns (thumbnail, ImageInfo).
+    """
+    source = RAW_PREVIEW if ImageManager.uses_raw_preview(filename) else ""
+    thumb, (width, height) = ImageManager.load(filename, (THUMB_WIDTH, CARD_HEIGHT))
+    preview_size = False
+    if source:
+        # load() reports the preview's size; show the sensor's, turned like the preview
+        raw = ImageManager.raw_size(filename)
+        if raw is None:
+            preview_size = True
+        elif (raw[0] > raw[1]) == (width > height):
+            width, height = raw
+        else:
+            height, width = raw
+    stat = os.stat(filename)
+    return thumb, ImageInfo(filename, width, height, stat.st_mtime, stat.st_size, source,
+                            preview_size)
 
 
 class ImageCard(QFrame):
-    def __init__(self, filename, sim_data, exif_fallback, settings, dark=True):
+    """
+    One identified photo. Until the CardVirtualizer materialises it the card
+    is an empty frame holding a spacer of the final size; the thumbnail,
+    info text and histogram widgets exist only while it is near the viewport.
+    """
+    def __init__(self, filename, sim_data, exif_fallback, settings, dark=True, nearest=None,
+                 thumb=None, info=None):
         super().__init__()
         self.setObjectName("imageCard")
         self.filename = filename
@@ -122,48 +129,27 @@ class ImageCard(QFrame):
         self.settings = settings
         self.dark = dark
         self.hist = None
+        self.img_label = None
+        self.info_label = None
+        self._hist_priority = 0
         self.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
 
         layout = QHBoxLayout(self)
-        layout.setSpacing(8)
+        layout.setSpacing(CARD_SPACING)
         layout.setContentsMargins(12, 12, 12, 12)
 
-        # ── Image ──
-        self.img_pil = _open_image(filename)
-        self.img_pil = _fix_orientation(self.img_pil, filename)
-
-        img_thumb = self.img_pil.copy()
-        img_thumb.thumbnail((THUMB_WIDTH, CARD_HEIGHT), Image.LANCZOS)
-
-        img_rgb = img_thumb.convert("RGB")
-        data = img_rgb.tobytes("raw", "RGB")
-        bytes_per_line = img_rgb.width * 3
-        qimg = QImage(data, img_rgb.width, img_rgb.height,
-                      bytes_per_line, QImage.Format.Format_RGB888)
-        pixmap = QPixmap.fromImage(qimg)
-
-        self.img_label = TooltipImageLabel(filename, self.img_pil)
-        img_label = self.img_label
-        img_label.setObjectName("imageLabel")
-        img_label.setPixmap(pixmap)
-        img_label.setFixedSize(THUMB_WIDTH, CARD_HEIGHT)
-        img_label.setScaledContents(False)
-        img_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-        layout.addWidget(img_label)
+        # Only the thumbnail is kept; the detail view re-decodes the file
+        self._thumb = None
+        self.info = info
+        self._text = self._info_text(filename, sim_data, exif_fallback, nearest)
 
-        # ── Info text ──
-        info_label = QLabel()
-        info_label.setObjectName("infoLabel")
-        info_label.setFont(QFont("Courier New", 10))
-        info_label.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
-        info_label.setWordWrap(True)
-        info_label.setMinimumWidth(INFO_MIN_W)
-        info_label.setMaximumWidth(INFO_MAX_W)
-        info_label.setFixedHeight(CARD_HEIGHT)
-        info_label.setContentsMargins(12, 8, 0, 0)
-        info_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
+        # ── Thumbnail + histogram ── built only once the CardVirtualizer finds the
+        # card near the viewport; the pipeline's thumbnail is kept until then
+        self._preloaded = thumb if info is not None else None
+        self._add_placeholder()
 
+    @staticmethod
+    def _info_text(filename, sim_data, exif_fallback, nearest):
         text = ""
         filename_base = os.path.basename(filename)
 
@@ -180,16 +166,122 @@ class ImageCard(QFrame):
             pcm = exif_fallback.get("Picture Control Name") 
             text = f"<b>{pcm}</b><br>"
             text += "<i>No matching simulation found</i><br><br>"
+            if nearest:
+                text += "Closest recipes:<br>"
+                for match in nearest:
+                    fields = ", ".join(match.diff) or "–"
+                    text += f"&nbsp;• <b>{match.name}</b> ({match.distance:.1f}) – {fields}<br>"
+                text += "<br>"
             text += f"File: {filename_base}<br>"
             for key, value in exif_fallback.items():
                 text += f"{key}: {value}<br>"
+        return text
+
+    # ── Child widgets ──
+
+    def _add_placeholder(self):
+        """Reserve the size of the materialised card without creating any widgets."""
+        width = THUMB_WIDTH + CARD_SPACING + INFO_MIN_W
+        if self.settings.get("show_histogram", True):
+            width += CARD_SPACING + INFO_MIN_W
+        self.layout().addItem(QSpacerItem(
+            width, CARD_HEIGHT, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed
+        ))
+
+    def _clear_layout(self):
+        layout = self.layout()
+        while layout.count():
+            item = layout.takeAt(0)
+            widget = item.widget()
+            if widget is not None:
+                widget.hide()
+                widget.deleteLater()
+
+    def _build(self):
+        self._clear_layout()
+        layout = self.layout()
+
+        # ── Image ──
+        self.img_label = TooltipImageLabel(self.filename, self.info)
+        img_label = self.img_label
+        img_label.setObjectName("imageLabel")
+        img_label.setFixedSize(THUMB_WIDTH, CARD_HEIGHT)
+        img_label.setScaledContents(False)
+        img_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        info_label.setText(text)
+        layout.addWidget(img_label)
+
+        # ── Info text ──
+        info_label = self.info_label = QLabel()
+        info_label.setObjectName("infoLabel")
+        info_label.setFont(QFont("Courier New", 10))
+        info_label.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        info_label.setWordWrap(True)
+        info_label.setMinimumWidth(INFO_MIN_W)
+        info_label.setMaximumWidth(INFO_MAX_W)
+        info_label.setFixedHeight(CARD_HEIGHT)
+        info_label.setContentsMargins(12, 8, 0, 0)
+        info_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
+        info_label.setText(self._text)
         layout.addWidget(info_label)
 
-        # ── Histogram ──
-        if settings.get("show_histogram", True):
-            self._add_histogram(layout, img_thumb)
+    # ── Materialise / evict (driven by CardVirtualizer) ──
+
+    @property
+    def materialized(self):
+        return self._thumb is not None
+
+    @property
+    def preloaded(self):
+        return self._preloaded is not None
+
+    def materialize(self):
+        """Show the thumbnail decoded by the pipeline; False if it has to be decoded again."""
+        thumb, self._preloaded = self._preloaded, None
+        if thumb is None:
+            return False
+        self.set_image(thumb, self.info)
+        return True
+
+    def set_image(self, thumb, info):
+        """Build the child widgets, show the thumbnail and build the histogram."""
+        if self.img_label is None:
+            self.info = info
+            self._build()
+        self._thumb = thumb
+        self.info = info
+        self.img_label.info = info
+
+        img_rgb = thumb.convert("RGB")
+        data = img_rgb.tobytes("raw", "RGB")
+        bytes_per_line = img_rgb.width * 3
+        qimg = QImage(data, img_rgb.width, img_rgb.height,
+                      bytes_per_line, QImage.Format.Format_RGB888)
+        self.img_label.setPixmap(QPixmap.fromImage(qimg))
+
+        self._remove_histogram()
+        if self.settings.get("show_histogram", True):
+            self._add_histogram(self.layout(), thumb)
+
+    def evict(self):
+        """Delete the child widgets and thumbnail; the card keeps its size and info."""
+        self._preloaded = None
+        self._thumb = None
+        self.hist = self.img_label = self.info_label = None
+        self._clear_layout()
+        self._add_placeholder()
+
+    def set_in_view(self, in_view):
+        """Histograms of cards inside the viewport are computed first."""
+        self._hist_priority = VISIBLE_PRIORITY if in_view else 0
+        if self.hist is not None:
+            self.hist.set_priority(self._hist_priority)
+
+    def _remove_histogram(self):
+        if self.hist is not None:
+            self.layout().removeWidget(self.hist)
+            self.hist.deleteLater()
+            self.hist = None
 
     def _add_histogram(self, layout, img_thumb):
         theme = self.settings.get("theme", DEFAULT_THEME)
@@ -200,7 +292,9 @@ class ImageCard(QFrame):
             hist_type=self.settings.get("histogram_type", "step"),
             bg=hist_bg, fg=hist_fg,
             size=(INFO_MAX_W, CARD_HEIGHT),
-            show_grid=self.settings.get("histogram_grid", True)
+            show_grid=self.settings.get("histogram_grid", True),
+            cache_key=(self.info.path, self.info.mtime, self.info.size, self.info.source),
+            priority=self._hist_priority
         )
         self.hist.setMinimumWidth(INFO_MIN_W)
         self.hist.setMaximumWidth(INFO_MAX_W)
@@ -210,43 +304,19 @@ class ImageCard(QFrame):
 
     def update_theme(self):
         if self.hist is not None:
-            layout = self.layout()
-            layout.removeWidget(self.hist)
-            self.hist.deleteLater()
-            theme = self.settings.get("theme", DEFAULT_THEME)
-            hist_bg, hist_fg = THEME_HISTOGRAM_COLORS.get(theme, ("#1d2021", "#ebdbb2"))
-            self.hist = HistogramWidget(
-                self.img_pil,
-                rgb=self.settings.get("rgb_histogram", True),
-                hist_type=self.settings.get("histogram_type", "step"),
-                bg=hist_bg, fg=hist_fg,
-                size=(INFO_MAX_W, CARD_HEIGHT),
-                show_grid=self.settings.get("histogram_grid", True)
-            )
-            self.hist.setMinimumWidth(INFO_MIN_W)
-            self.hist.setMaximumWidth(INFO_MAX_W)
-            self.hist.setFixedHeight(CARD_HEIGHT)
-            self.hist.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-            layout.addWidget(self.hist)
+            self._remove_histogram()
+            self._add_histogram(self.layout(), self._thumb)
 
     def update_histogram(self, settings):
         """Show or hide histogram based on settings; also refreshes theme/type changes."""
         self.settings = settings
-        show = settings.get("show_histogram", True)
-        layout = self.layout()
-        if not show:
-            if self.hist is not None:
-                layout.removeWidget(self.hist)
-                self.hist.deleteLater()
-                self.hist = None
-        else:
-            img_thumb = self.img_pil.copy()
-            img_thumb.thumbnail((THUMB_WIDTH, CARD_HEIGHT), Image.LANCZOS)
-            if self.hist is not None:
-                layout.removeWidget(self.hist)
-                self.hist.deleteLater()
-                self.hist = None
-            self._add_histogram(layout, img_thumb)
+        if self.img_label is None:
+            self._clear_layout()
+            self._add_placeholder()     # the reserved width depends on show_histogram
+            return
+        self._remove_histogram()
+        if settings.get("show_histogram", True) and self._thumb is not None:
+            self._add_histogram(self.layout(), self._thumb)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -256,13 +326,13 @@ class ImageCard(QFrame):
                 full_exif = self.exif_fallback
             dlg = ImageDetailDialog(
                 self.parent(), self.filename, self.sim_data,
-                full_exif, self.settings, self.dark
+                full_exif, self.settings, self.dark, thumb=self._thumb
             )
             dlg.exec()
 
     def contextMenuEvent(self, event):
         # Show context menu only when right-clicking on the image
-        if not self.img_label.geometry().contains(event.pos()):
+        if self.img_label is None or not self.img_label.geometry().contains(event.pos()):
             event.ignore()
             return
 
@@ -281,13 +351,14 @@ class ImageCard(QFrame):
 
         base = os.path.splitext(os.path.basename(self.filename))[0]
         recipe_name = self.sim_data.get("Name", base).replace(" ", "_")
-        suggested = os.path.join(os.path.dirname(self.filename), f"{recipe_name}_card.png")
+        suggested = os.path.join(os.path.dirname(self.filename), f"{recipe_name}_card.jpg")
 
-        out_path, _ = QFileDialog.getSaveFileName(
-            self, "Save Recipe Card", suggested, "PNG Image (*.png)"
+        out_path, name_filter = QFileDialog.getSaveFileName(
+            self, "Save Recipe Card", suggested, CARD_FILE_FILTER
         )
         if not out_path:
             return
+        out_path = with_card_extension(out_path, name_filter)
 
         try:
             export_recipe_card(self.filename, self.sim_data, out_path)
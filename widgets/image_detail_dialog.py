@@ -2,9 +2,10 @@
 # IMAGE DETAIL DIALOG
 # ──────────────────────────────────────────────
 import os
+import threading
+from collections import OrderedDict
 
-from PIL import Image, ExifTags
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import QEvent, QPointF, Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QImage, QPixmap
 from PyQt6.QtWidgets import (
     QDialog, QFileDialog, QHBoxLayout, QLabel, QMessageBox,
@@ -13,73 +14,66 @@ from PyQt6.QtWidgets import (
 
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-from exporters.recipe_card_exporter import export_recipe_card
+from exporters.recipe_card_exporter import CARD_FILE_FILTER, export_recipe_card, with_card_extension
+from managers import ImageManager
 
 INFO_PANEL_W = 280
 BTN_ROW_H    = 48
 MARGINS      = 32   # 16 * 2
 
-RAW_EXTENSIONS = ('.raf', '.nef', '.cr2', '.arw', '.dng')
+RESIZE_SETTLE_MS = 120   # smooth rescale once the window stops resizing
+SCALED_CACHE_SIZE = 6    # fitted pixmaps kept for repeated sizes
+MIN_MIP_SIDE = 256
 
 
-def _open_image(filename):
-    """Open any supported image file and return a PIL Image (RGB).
-    Falls back to rawpy for RAW formats not supported by Pillow."""
-    ext = os.path.splitext(filename)[1].lower()
-    if ext in RAW_EXTENSIONS:
-        try:
-            import rawpy
-            import numpy as np
-            with rawpy.imread(filename) as raw:
-                rgb = raw.postprocess(use_camera_wb=True, no_auto_bright=False, output_bps=8)
-            return Image.fromarray(rgb)
-        except ImportError:
-            raise RuntimeError(
-                "rawpy is required to open RAW files.\n"
-                "Install it with: pip install rawpy"
-            )
-        except Exception as e:
-            raise RuntimeError(f"Failed to open RAW file: {e}")
-    return Image.open(filename)
-
-
-def _fix_orientation(img_pil, filename):
-    """Apply EXIF orientation correction. Skips for RAW files (already corrected by rawpy)."""
-    ext = os.path.splitext(filename)[1].lower()
-    if ext in RAW_EXTENSIONS:
-        return img_pil
-    exif = img_pil.getexif()
-    orientation = exif.get(ExifTags.Base.Orientation, 1)
-    if orientation == 8:
-        img_pil = img_pil.rotate(90, expand=True)
-    elif orientation == 6:
-        img_pil = img_pil.rotate(-90, expand=True)
-    elif orientation == 3:
-        img_pil = img_pil.rotate(180, expand=True)
-    return img_pil
+def _pil_to_pixmap(img_pil):
+    img_rgb = img_pil.convert("RGB")
+    data = img_rgb.tobytes("raw", "RGB")
+    bpl = img_rgb.width * 3
+    qimg = QImage(data, img_rgb.width, img_rgb.height, bpl, QImage.Format.Format_RGB888)
+    return QPixmap.fromImage(qimg)
 
 
 class ImageDetailDialog(QDialog):
-    def __init__(self, parent, filename, sim_data, full_exif, settings, dark=True):
+    """
+    Opens instantly with the card thumbnail, then swaps in a screen-sized
+    decode from a background thread. Double-click toggles a 1:1 zoom that is
+    decoded on first use (unless the screen-sized decode already is full
+    resolution); only the part under the viewport is converted to a pixmap,
+    and dragging pans it. RAW files are shown from their embedded
+    preview until a full decode is requested with the "Full RAW Decode" button.
+    """
+    _loaded = pyqtSignal(int, str, object)   # generation, "screen" / "full", PIL image
+    _load_failed = pyqtSignal(int, str)
+
+    def __init__(self, parent, filename, sim_data, full_exif, settings, dark=True, thumb=None):
         super().__init__(parent)
         self.setWindowTitle(os.path.basename(filename))
         self.setMinimumSize(900, 600)
         self.resize(1800, 1150)
         self.setModal(True)
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
 
         self._filename = filename
         self._sim_data = sim_data
 
-        # ── Load & orient image ──
-        img_pil = _open_image(filename)
-        img_pil = _fix_orientation(img_pil, filename)
-
-        # Keep full-res pixmap for scaling
-        img_rgb = img_pil.convert("RGB")
-        data = img_rgb.tobytes("raw", "RGB")
-        bpl = img_rgb.width * 3
-        qimg = QImage(data, img_rgb.width, img_rgb.height, bpl, QImage.Format.Format_RGB888)
-        self._full_pixmap = QPixmap.fromImage(qimg)
+        # ── Image sources: thumbnail now, screen-sized and full-res later ──
+        self._set_source(_pil_to_pixmap(thumb) if thumb is not None else QPixmap())
+        self._full_img = None      # full-resolution PIL image, only for 1:1 zoom
+        self._zoom = False
+        self._zoom_pending = False
+        self._zoom_center = QPointF(0.5, 0.5)   # relative image position in the viewport centre
+        self._drag_pos = None
+        self._demosaic = None      # None = follow the RAW preview setting, True = full decode
+        self._generation = 0       # bumped on a source change; older loads are ignored
+        self._screen_box = None
+        self._loaded.connect(self._on_loaded)
+        self._load_failed.connect(self._on_load_failed)
+
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(RESIZE_SETTLE_MS)
+        self._resize_timer.timeout.connect(self._update_image)
 
         # ── Layout ──
         main_layout = QVBoxLayout(self)
@@ -94,6 +88,9 @@ class ImageDetailDialog(QDialog):
         self._img_label.setObjectName("imageLabel")
         self._img_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self._img_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self._img_label.setMinimumSize(1, 1)
+        self._img_label.setToolTip("Double-click to zoom to 100%")
+        self._img_label.installEventFilter(self)
         top_row.addWidget(self._img_label, stretch=1)
 
         # ── Info panel ──
@@ -138,6 +135,18 @@ class ImageDetailDialog(QDialog):
         export_btn.clicked.connect(self._on_export_card)
         btn_row.addWidget(export_btn)
 
+        self._raw_btn = None
+        if ImageManager.uses_raw_preview(filename):
+            self._raw_btn = QPushButton("Full RAW Decode")
+            self._raw_btn.setToolTip("Demosaic the RAW data instead of showing the embedded preview")
+            self._raw_btn.setStyleSheet(
+                "QPushButton { background-color: #5C6BC0; color: white; "
+                "border-radius: 6px; padding: 7px 24px; }"
+                "QPushButton:disabled { background-color: #9FA8DA; }"
+            )
+            self._raw_btn.clicked.connect(self._on_full_raw_decode)
+            btn_row.addWidget(self._raw_btn)
+
         close_btn = QPushButton("Close")
         close_btn.setStyleSheet(
             "QPushButton { background-color: #9E9E9E; color: white; "
@@ -147,27 +156,206 @@ class ImageDetailDialog(QDialog):
         btn_row.addWidget(close_btn)
         main_layout.addLayout(btn_row)
 
-        # Initial render
+        # Initial render from the thumbnail, then the screen-sized image in the background
         self._update_image()
+        screen = (parent.screen() if parent is not None else self.screen()).availableGeometry()
+        available_w, available_h = self._available_size()
+        dpr = self.devicePixelRatioF()
+        self._screen_box = (int(max(screen.width(), available_w) * dpr),
+                            int(max(screen.height(), available_h) * dpr))
+        self._start_load("screen", self._screen_box)
+
+    # ── Background loading ────────────────────────────────────────────────
+
+    def _start_load(self, kind, box):
+        generation, demosaic = self._generation, self._demosaic
+
+        def run():
+            try:
+                img, _size = ImageManager.load(self._filename, box, demosaic)
+            except Exception as e:
+                self._emit_safely("_load_failed", generation, str(e))
+            else:
+                self._emit_safely("_loaded", generation, kind, img)
+        threading.Thread(target=run, daemon=True).start()
+
+    def _on_full_raw_decode(self):
+        """Switch the RAW file from its embedded preview to a full demosaic."""
+        self._raw_btn.setEnabled(False)
+        self._raw_btn.setText("Decoding RAW…")
+        self._demosaic = True
+        self._generation += 1
+        self._full_img = None
+        self._zoom_pending = False
+        self._start_load("screen", self._screen_box)
+        if self._zoom:
+            self._zoom_pending = True
+            self._start_load("full", None)
+
+    def _emit_safely(self, signal_name, *args):
+        try:
+            getattr(self, signal_name).emit(*args)
+        except RuntimeError:
+            pass   # dialog already closed and deleted
+
+    def _on_loaded(self, generation, kind, img):
+        if generation != self._generation:
+            return
+        if kind == "screen" and self._demosaic and self._raw_btn is not None:
+            self._raw_btn.setText("RAW Decoded")
+        if kind == "screen":
+            self._set_source(_pil_to_pixmap(img))
+            if not self._zoom:
+                self._update_image()
+        else:
+            self._full_img = img
+            self._zoom_pending = False
+            if self._zoom:
+                self._update_image()
+
+    def _on_load_failed(self, generation, error):
+        if generation != self._generation:
+            return
+        self._zoom_pending = False
+        if self._raw_btn is not None and self._demosaic:
+            self._raw_btn.setText("RAW Decode Failed")
+            self._raw_btn.setToolTip(error)
+        if self._pixmap.isNull():
+            self._img_label.setText(f"Could not open image:\n{error}")
 
     # ── Responsive image ──────────────────────────────────────────────────
 
-    def _update_image(self):
-        """Scale pixmap to fit available space while keeping aspect ratio."""
+    def _available_size(self):
         available_w = self.width()  - MARGINS - INFO_PANEL_W - 16  # 16 = spacing
         available_h = self.height() - MARGINS - BTN_ROW_H - 12     # 12 = spacing
+        return available_w, available_h
+
+    def _set_source(self, pixmap):
+        """Use pixmap as the fit-mode source; builds its mip chain and drops cached scales."""
+        self._pixmap = pixmap
+        self._mips = [pixmap]
+        while not pixmap.isNull() and min(pixmap.width(), pixmap.height()) >= 2 * MIN_MIP_SIDE:
+            pixmap = pixmap.scaled(
+                pixmap.width() // 2, pixmap.height() // 2,
+                Qt.AspectRatioMode.IgnoreAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+            self._mips.append(pixmap)
+        self._scaled = OrderedDict()
+
+    def _mip_for(self, w, h):
+        """Smallest mip level that is not upscaled when fitted into w x h."""
+        for level in reversed(self._mips):
+            fit = level.size().scaled(w, h, Qt.AspectRatioMode.KeepAspectRatio)
+            if level.width() >= fit.width() and level.height() >= fit.height():
+                return level
+        return self._mips[0]
+
+    def _fitted(self, w, h, smooth):
+        key = (w, h)
+        if key in self._scaled:
+            self._scaled.move_to_end(key)
+            return self._scaled[key]
+        mode = (Qt.TransformationMode.SmoothTransformation if smooth
+                else Qt.TransformationMode.FastTransformation)
+        scaled = self._mip_for(w, h).scaled(w, h, Qt.AspectRatioMode.KeepAspectRatio, mode)
+        if smooth:
+            self._scaled[key] = scaled
+            while len(self._scaled) > SCALED_CACHE_SIZE:
+                self._scaled.popitem(last=False)
+        return scaled
+
+    def _update_image(self, smooth=True):
+        """Fit the best available pixmap, or show the 1:1 region under the viewport."""
+        available_w, available_h = self._available_size()
         if available_w < 1 or available_h < 1:
             return
-        scaled = self._full_pixmap.scaled(
-            available_w, available_h,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
+        if self._zoom and self._full_img is not None:
+            view_w = min(available_w, self._img_label.width())
+            view_h = min(available_h, self._img_label.height())
+            self._img_label.setPixmap(self._zoomed_region(view_w, view_h))
+            return
+        if self._pixmap.isNull():
+            return
+        self._img_label.setPixmap(self._fitted(available_w, available_h, smooth))
+
+    def _zoomed_region(self, view_w, view_h):
+        """Crop the full-res image to the viewport around the zoom centre."""
+        img_w, img_h = self._full_img.size
+        dpr = self.devicePixelRatioF()
+        crop_w, crop_h = min(img_w, int(view_w * dpr)), min(img_h, int(view_h * dpr))
+        left = int(self._zoom_center.x() * img_w - crop_w / 2)
+        top  = int(self._zoom_center.y() * img_h - crop_h / 2)
+        left = max(0, min(img_w - crop_w, left))
+        top  = max(0, min(img_h - crop_h, top))
+        # Keep the centre consistent with the clamped crop
+        self._zoom_center = QPointF((left + crop_w / 2) / img_w, (top + crop_h / 2) / img_h)
+        pixmap = _pil_to_pixmap(self._full_img.crop((left, top, left + crop_w, top + crop_h)))
+        pixmap.setDevicePixelRatio(dpr)
+        return pixmap
+
+    def _toggle_zoom(self, pos):
+        if self._zoom:
+            self._zoom = False
+            self._img_label.setCursor(Qt.CursorShape.ArrowCursor)
+            self._update_image()
+            return
+        # Centre the zoom on the clicked point of the fitted image
+        shown = self._img_label.pixmap()
+        if shown is not None and not shown.isNull():
+            sw = shown.width() / shown.devicePixelRatio()
+            sh = shown.height() / shown.devicePixelRatio()
+            ox = (self._img_label.width() - sw) / 2
+            oy = (self._img_label.height() - sh) / 2
+            self._zoom_center = QPointF(
+                min(1.0, max(0.0, (pos.x() - ox) / sw)),
+                min(1.0, max(0.0, (pos.y() - oy) / sh)),
+            )
+        self._zoom = True
+        self._img_label.setCursor(Qt.CursorShape.OpenHandCursor)
+        if self._full_img is None:
+            if not self._zoom_pending:
+                self._zoom_pending = True
+                self._start_load("full", None)
+        else:
+            self._update_image()
+
+    def _pan(self, delta):
+        img_w, img_h = self._full_img.size
+        dpr = self.devicePixelRatioF()
+        self._zoom_center = QPointF(
+            self._zoom_center.x() - delta.x() * dpr / img_w,
+            self._zoom_center.y() - delta.y() * dpr / img_h,
         )
-        self._img_label.setPixmap(scaled)
+        self._update_image()
+
+    def eventFilter(self, obj, event):
+        if obj is self._img_label:
+            etype = event.type()
+            if etype == QEvent.Type.MouseButtonDblClick:
+                self._toggle_zoom(event.position())
+                return True
+            if self._zoom and self._full_img is not None:
+                if etype == QEvent.Type.MouseButtonPress:
+                    self._drag_pos = event.position()
+                    self._img_label.setCursor(Qt.CursorShape.ClosedHandCursor)
+                    return True
+                if etype == QEvent.Type.MouseMove and self._drag_pos is not None:
+                    pos = event.position()
+                    self._pan(pos - self._drag_pos)
+                    self._drag_pos = pos
+                    return True
+                if etype == QEvent.Type.MouseButtonRelease:
+                    self._drag_pos = None
+                    self._img_label.setCursor(Qt.CursorShape.OpenHandCursor)
+                    return True
+        return super().eventFilter(obj, event)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        self._update_image()
+        # Cheap preview while the window is being dragged, one smooth scale when it settles
+        self._update_image(smooth=False)
+        self._resize_timer.start()
 
     # ── Export ────────────────────────────────────────────────────────────
 
@@ -178,13 +366,14 @@ class ImageDetailDialog(QDialog):
 
         base = os.path.splitext(os.path.basename(self._filename))[0]
         recipe_name = self._sim_data.get("Name", base).replace(" ", "_")
-        suggested = os.path.join(os.path.dirname(self._filename), f"{recipe_name}_card.png")
+        suggested = os.path.join(os.path.dirname(self._filename), f"{recipe_name}_card.jpg")
 
-        out_path, _ = QFileDialog.getSaveFileName(
-            self, "Save Recipe Card", suggested, "PNG Image (*.png)"
+        out_path, name_filter = QFileDialog.getSaveFileName(
+            self, "Save Recipe Card", suggested, CARD_FILE_FILTER
         )
         if not out_path:
             return
+        out_path = with_card_extension(out_path, name_filter)
 
         try:
             export_recipe_card(self._filename, self._sim_data, out_path)